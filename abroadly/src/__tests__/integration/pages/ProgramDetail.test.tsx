@@ -17,6 +17,7 @@ jest.mock('../../../services/api', () => ({
     listReviews: jest.fn(),
     listCourseReviews: jest.fn(),
     listHousingReviews: jest.fn(),
+    nearbyPlaces: jest.fn().mockResolvedValue([]),
     createReview: jest.fn(),
     createCourseReview: jest.fn(),
     createHousingReview: jest.fn(),
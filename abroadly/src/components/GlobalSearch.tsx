@@ -3,13 +3,7 @@
 
 import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { programsApi, placesApi, tripsApi, StudyAbroadProgram, Place, Trip } from '../services/api';
-
-interface SearchResults {
-  programs: StudyAbroadProgram[];
-  places: Place[];
-  trips: Trip[];
-}
+import { searchApi, SearchResults } from '../services/api';
 
 interface GlobalSearchProps {
   isMobile?: boolean;
@@ -56,20 +50,10 @@ const GlobalSearch: React.FC<GlobalSearchProps> = ({ isMobile = false, onClose }
 
     setIsLoading(true);
     try {
-      const [programsData, placesData, tripsData] = await Promise.all([
-        programsApi.list({ search: searchQuery, limit: 3 }),
-        placesApi.list({ search: searchQuery, limit: 3 }),
-        tripsApi.list({ search: searchQuery, limit: 3 }),
-      ]);
-
-      setResults({
-        programs: programsData.slice(0, 3),
-        places: placesData.slice(0, 3),
-        trips: tripsData.slice(0, 3),
-      });
-      
-      const hasResults = programsData.length > 0 || placesData.length > 0 || tripsData.length > 0;
-      setIsOpen(hasResults || searchQuery.length >= 2);
+      // One request searches all three entity types, ranked server-side
+      const data = await searchApi.search(searchQuery, 3);
+      setResults(data);
+      setIsOpen(true);
     } catch (error) {
       console.error('Search error:', error);
     } finally {
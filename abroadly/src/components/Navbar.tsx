@@ -35,8 +35,41 @@ const Navbar: React.FC = () => {
     // Fetch immediately on mount
     fetchUnreadCount();
 
-    // Poll every 60 seconds
-    const intervalId = setInterval(fetchUnreadCount, 60000);
+    // Poll every 60 seconds, but only while the event stream is down
+    let intervalId: ReturnType<typeof setInterval> | undefined;
+    const startPolling = () => {
+      if (intervalId === undefined) {
+        intervalId = setInterval(fetchUnreadCount, 60000);
+      }
+    };
+    const stopPolling = () => {
+      clearInterval(intervalId);
+      intervalId = undefined;
+    };
+
+    // Live updates: the stream opens with the current count, then pushes changes
+    let stream: EventSource | undefined;
+    if (typeof EventSource !== 'undefined') {
+      stream = messagesApi.openStream();
+      stream.addEventListener('open', stopPolling);
+      stream.addEventListener('error', startPolling);
+      stream.addEventListener('unread_count', (event) => {
+        setUnreadCount(JSON.parse((event as MessageEvent).data).unread_count);
+      });
+      // The server may have missed events while reconnecting to its event source
+      stream.addEventListener('resync', fetchUnreadCount);
+      stream.addEventListener('message', () => {
+        setUnreadCount((count) => count + 1);
+      });
+      stream.addEventListener('read', (event) => {
+        const data = JSON.parse((event as MessageEvent).data);
+        if (data.reader_id === user.id) {
+          setUnreadCount((count) => Math.max(0, count - data.message_ids.length));
+        }
+      });
+    } else {
+      startPolling();
+    }
 
     // Refetch when window regains focus
     const handleFocus = () => {
@@ -51,7 +84,8 @@ const Navbar: React.FC = () => {
     window.addEventListener('messageRead', handleMessageRead);
 
     return () => {
-      clearInterval(intervalId);
+      stream?.close();
+      stopPolling();
       window.removeEventListener('focus', handleFocus);
       window.removeEventListener('messageRead', handleMessageRead);
     };
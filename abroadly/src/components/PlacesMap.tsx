@@ -1,10 +1,12 @@
 // PlacesMap Component - Google Maps integration for Places page
-import React, { useState, useCallback } from 'react';
+import React, { useState, useCallback, useRef } from 'react';
 import { GoogleMap, useLoadScript, MarkerF, InfoWindowF } from '@react-google-maps/api';
-import { Place } from '../services/api';
+import { Place, PlaceCluster, placesApi } from '../services/api';
 
 interface PlacesMapProps {
   places: Place[];
+  // List filters applied to the viewport query, so the map matches the list
+  filters?: { city?: string; country?: string; category?: string };
   onPlaceClick?: (place: Place) => void;
 }
 
@@ -14,17 +16,49 @@ const containerStyle = {
   borderRadius: '0.5rem'
 };
 
+// Below this zoom the map shows server-side clusters instead of individual markers
+const CLUSTER_MAX_ZOOM = 12;
+
+// Web Mercator tiles covering the viewport at a zoom level
+const viewportTiles = (bounds: google.maps.LatLngBounds, zoom: number) => {
+  const tiles = 2 ** zoom;
+  const tileX = (lng: number) => Math.min(tiles - 1, Math.max(0, Math.floor((lng + 180) / 360 * tiles)));
+  const tileY = (lat: number) => {
+    const clamped = Math.max(-85.0511, Math.min(85.0511, lat)) * Math.PI / 180;
+    const y = (1 - Math.log(Math.tan(clamped) + 1 / Math.cos(clamped)) / Math.PI) / 2 * tiles;
+    return Math.min(tiles - 1, Math.max(0, Math.floor(y)));
+  };
+  const southWest = bounds.getSouthWest();
+  const northEast = bounds.getNorthEast();
+  const [x0, x1] = [tileX(southWest.lng()), tileX(northEast.lng())];
+  const xs = x0 <= x1
+    ? Array.from({ length: x1 - x0 + 1 }, (_, i) => x0 + i)
+    : [...Array.from({ length: tiles - x0 }, (_, i) => x0 + i), ...Array.from({ length: x1 + 1 }, (_, i) => i)];
+  const coords: Array<[number, number]> = [];
+  for (const x of xs) {
+    for (let y = tileY(northEast.lat()); y <= tileY(southWest.lat()); y++) {
+      coords.push([x, y]);
+    }
+  }
+  return coords;
+};
+
 // Default center (will be adjusted based on places)
 const defaultCenter = {
   lat: 48.8566,
   lng: 2.3522
 };
 
-const PlacesMap: React.FC<PlacesMapProps> = ({ places, onPlaceClick }) => {
+const PlacesMap: React.FC<PlacesMapProps> = ({ places, filters, onPlaceClick }) => {
   const [selectedPlace, setSelectedPlace] = useState<Place | null>(null);
   const [map, setMap] = useState<google.maps.Map | null>(null);
   const [userLocation, setUserLocation] = useState<{ lat: number; lng: number } | null>(null);
   const [locatingUser, setLocatingUser] = useState(false);
+  // Places inside the current viewport, or null until the first viewport query returns
+  const [visiblePlaces, setVisiblePlaces] = useState<Place[] | null>(null);
+  // Server-side clusters while zoomed out, null when showing individual markers
+  const [clusters, setClusters] = useState<PlaceCluster[] | null>(null);
+  const viewportRequest = useRef(0);
 
   const apiKey = import.meta.env.VITE_GOOGLE_MAPS_API_KEY;
 
@@ -83,6 +117,46 @@ const PlacesMap: React.FC<PlacesMapProps> = ({ places, onPlaceClick }) => {
     setMap(null);
   }, []);
 
+  // Load only the places inside the viewport once the map stops moving
+  const loadVisiblePlaces = useCallback(async () => {
+    const bounds = map?.getBounds();
+    if (!bounds) return;
+    const southWest = bounds.getSouthWest();
+    const northEast = bounds.getNorthEast();
+    const bbox = [southWest.lng(), southWest.lat(), northEast.lng(), northEast.lat()]
+      .map(value => value.toFixed(6))
+      .join(',');
+
+    const request = ++viewportRequest.current;
+    const zoom = Math.round(map?.getZoom() ?? 0);
+    // Clusters are computed over every place, so only use them when no filter is applied
+    const filtered = Boolean(filters?.city || filters?.country || filters?.category);
+    try {
+      if (zoom <= CLUSTER_MAX_ZOOM && !filtered) {
+        const tiles = await Promise.all(
+          viewportTiles(bounds, zoom).map(([x, y]) => placesApi.clusters(zoom, x, y))
+        );
+        if (request === viewportRequest.current) {
+          setClusters(tiles.flatMap(tile => tile.clusters));
+        }
+        return;
+      }
+      const data = await placesApi.list({ ...filters, bbox, limit: 500 });
+      // Ignore responses for viewports the user has already panned away from
+      if (request === viewportRequest.current) {
+        setClusters(null);
+        setVisiblePlaces(data);
+      }
+    } catch (error) {
+      console.error('Failed to load places in view:', error);
+    }
+  }, [map, filters]);
+
+  // Refresh the viewport query when the filters or the list change
+  React.useEffect(() => {
+    loadVisiblePlaces();
+  }, [loadVisiblePlaces, places]);
+
   const handleMarkerClick = (place: Place) => {
     setSelectedPlace(place);
     if (onPlaceClick) {
@@ -90,6 +164,20 @@ const PlacesMap: React.FC<PlacesMapProps> = ({ places, onPlaceClick }) => {
     }
   };
 
+  // A single-place cluster only carries its id; the place may not be in any loaded list
+  const handleClusterPlaceClick = async (placeId: number) => {
+    const loaded = [...places, ...(visiblePlaces ?? [])].find(p => p.id === placeId);
+    if (loaded) {
+      handleMarkerClick(loaded);
+      return;
+    }
+    try {
+      handleMarkerClick(await placesApi.get(placeId));
+    } catch (error) {
+      console.error('Failed to load place:', error);
+    }
+  };
+
   const getLocationFromIP = async () => {
     try {
       console.log('Trying IP-based geolocation...');
@@ -188,6 +276,11 @@ const PlacesMap: React.FC<PlacesMapProps> = ({ places, onPlaceClick }) => {
     place => place.latitude && place.longitude
   ), [places]);
 
+  // Markers for the viewport, falling back to the list until the map has bounds
+  const markerPlaces = React.useMemo(() => (visiblePlaces ?? places).filter(
+    place => place.latitude && place.longitude
+  ), [visiblePlaces, places]);
+
   // Memoize map options to prevent re-renders
   const mapOptions = React.useMemo(() => ({
     streetViewControl: false,
@@ -295,9 +388,30 @@ const PlacesMap: React.FC<PlacesMapProps> = ({ places, onPlaceClick }) => {
         zoom={12}
         onLoad={onLoad}
         onUnmount={onUnmount}
+        onIdle={loadVisiblePlaces}
         options={mapOptions}
       >
-        {placesWithCoordinates.map((place) => (
+        {clusters && clusters.map((cluster) => (
+          <MarkerF
+            key={`${cluster.latitude},${cluster.longitude}`}
+            position={{ lat: cluster.latitude, lng: cluster.longitude }}
+            label={cluster.count > 1 ? String(cluster.count) : undefined}
+            title={cluster.count > 1
+              ? `${cluster.count} places (mostly ${cluster.top_category})`
+              : getCategoryIcon(cluster.top_category)}
+            onClick={() => {
+              if (cluster.place_id) {
+                handleClusterPlaceClick(cluster.place_id);
+                return;
+              }
+              // Zoom in on a cluster to break it apart
+              map?.panTo({ lat: cluster.latitude, lng: cluster.longitude });
+              map?.setZoom(Math.min(CLUSTER_MAX_ZOOM + 1, (map.getZoom() ?? 0) + 2));
+            }}
+          />
+        ))}
+
+        {!clusters && markerPlaces.map((place) => (
           <MarkerF
             key={place.id}
             position={{
@@ -5,10 +5,17 @@ import React, { useState, useEffect } from "react";
 import { useAuth } from "../context/AuthContext";
 import { messagesApi, Message } from "../services/api";
 
+// Messages loaded per request; older ones come in with "Load older messages"
+const PAGE_SIZE = 50;
+
 const Messages: React.FC = () => {
   const { user } = useAuth();
   const [inboxMessages, setInboxMessages] = useState<Message[]>([]);
   const [sentMessages, setSentMessages] = useState<Message[]>([]);
+  // Cursors for the next (older) page of each list, null once it's fully loaded
+  const [inboxCursor, setInboxCursor] = useState<string | null>(null);
+  const [sentCursor, setSentCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [unreadCount, setUnreadCount] = useState(0);
   const [selectedMessage, setSelectedMessage] = useState<Message | null>(null);
   const [replyContent, setReplyContent] = useState("");
@@ -20,12 +27,14 @@ const Messages: React.FC = () => {
     const loadMessages = async () => {
       try {
         const [inbox, sent, unread] = await Promise.all([
-          messagesApi.getInbox(),
-          messagesApi.getSentMessages(),
+          messagesApi.getInboxPage({ limit: PAGE_SIZE }),
+          messagesApi.getSentPage({ limit: PAGE_SIZE }),
           messagesApi.getUnreadCount(),
         ]);
-        setInboxMessages(Array.isArray(inbox) ? inbox : []);
-        setSentMessages(Array.isArray(sent) ? sent : []);
+        setInboxMessages(inbox?.items ?? []);
+        setInboxCursor(inbox?.next_cursor ?? null);
+        setSentMessages(sent?.items ?? []);
+        setSentCursor(sent?.next_cursor ?? null);
         setUnreadCount(unread?.unread_count || 0);
       } catch (err) {
         console.error("Failed to load messages:", err);
@@ -39,6 +48,27 @@ const Messages: React.FC = () => {
     }
   }, [user]);
 
+  const loadMore = async () => {
+    const cursor = messageTab === "inbox" ? inboxCursor : sentCursor;
+    if (!cursor) return;
+    setLoadingMore(true);
+    try {
+      if (messageTab === "inbox") {
+        const page = await messagesApi.getInboxPage({ cursor, limit: PAGE_SIZE });
+        setInboxMessages((messages) => [...messages, ...page.items]);
+        setInboxCursor(page.next_cursor);
+      } else {
+        const page = await messagesApi.getSentPage({ cursor, limit: PAGE_SIZE });
+        setSentMessages((messages) => [...messages, ...page.items]);
+        setSentCursor(page.next_cursor);
+      }
+    } catch (err) {
+      console.error("Failed to load more messages:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (!user) {
     return (
       <div className="min-h-screen bg-gray-50 flex items-center justify-center">
@@ -70,7 +100,7 @@ const Messages: React.FC = () => {
                     : "text-gray-600 hover:text-gray-900 hover:bg-gray-50"
                 }`}
               >
-                Inbox {inboxMessages.length > 0 && `(${inboxMessages.length})`}
+                Inbox {inboxMessages.length > 0 && `(${inboxMessages.length}${inboxCursor ? "+" : ""})`}
                 {unreadCount > 0 && messageTab !== "inbox" && (
                   <span className="ml-2 bg-red-500 text-white text-xs rounded-full px-2 py-0.5">
                     {unreadCount}
@@ -85,7 +115,7 @@ const Messages: React.FC = () => {
                     : "text-gray-600 hover:text-gray-900 hover:bg-gray-50"
                 }`}
               >
-                Sent {sentMessages.length > 0 && `(${sentMessages.length})`}
+                Sent {sentMessages.length > 0 && `(${sentMessages.length}${sentCursor ? "+" : ""})`}
               </button>
             </div>
           </div>
@@ -158,6 +188,16 @@ const Messages: React.FC = () => {
                     </div>
                   ))
                 )}
+
+                {(messageTab === "inbox" ? inboxCursor : sentCursor) && (
+                  <button
+                    onClick={loadMore}
+                    disabled={loadingMore}
+                    className="w-full py-3 text-blue-600 hover:text-blue-700 font-semibold disabled:opacity-50"
+                  >
+                    {loadingMore ? "Loading..." : "Load older messages"}
+                  </button>
+                )}
               </div>
             )}
           </div>
@@ -245,8 +285,9 @@ const Messages: React.FC = () => {
                             setReplyContent("");
                             setSelectedMessage(null);
                             // Refresh sent messages
-                            const sent = await messagesApi.getSentMessages();
-                            setSentMessages(sent);
+                            const sent = await messagesApi.getSentPage({ limit: PAGE_SIZE });
+                            setSentMessages(sent.items);
+                            setSentCursor(sent.next_cursor);
                             alert("Reply sent!");
                           } catch (err: any) {
                             alert(err.response?.data?.detail || "Failed to send reply");
@@ -2,7 +2,7 @@
 // Gordon Song - Places Setup (1 hr)
 // Tae Kim - Places Page Enhancements (1 hr)
 
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { placesApi, Place } from '../services/api';
 import PlacesMap from '../components/PlacesMap';
@@ -50,6 +50,13 @@ const Places: React.FC = () => {
     fetchPlaces();
   }, [cityFilter, countryFilter, categoryFilter]);
 
+  // Same filters for the map's viewport queries
+  const mapFilters = useMemo(() => ({
+    city: cityFilter || undefined,
+    country: countryFilter || undefined,
+    category: categoryFilter || undefined,
+  }), [cityFilter, countryFilter, categoryFilter]);
+
   const fetchPlaces = async () => {
     setLoading(true);
     setError('');
@@ -223,7 +230,7 @@ const Places: React.FC = () => {
         {!loading && places.length > 0 && (
           <div className="mb-8">
             <h2 className="text-2xl font-bold text-gray-900 mb-4">Map View</h2>
-            <PlacesMap places={places} onPlaceClick={handlePlaceClick} />
+            <PlacesMap places={places} filters={mapFilters} onPlaceClick={handlePlaceClick} />
           </div>
         )}
 
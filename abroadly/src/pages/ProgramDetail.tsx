@@ -9,7 +9,8 @@ import {
   StudyAbroadProgram, 
   ProgramReview, 
   CourseReview, 
-  ProgramHousingReview 
+  ProgramHousingReview,
+  NearbyPlace
 } from '../services/api';
 import StarRating from '../components/StarRating';
 import BookmarkButton from '../components/BookmarkButton';
@@ -25,6 +26,7 @@ const ProgramDetail: React.FC = () => {
   const [reviews, setReviews] = useState<ProgramReview[]>([]);
   const [courseReviews, setCourseReviews] = useState<CourseReview[]>([]);
   const [housingReviews, setHousingReviews] = useState<ProgramHousingReview[]>([]);
+  const [nearbyPlaces, setNearbyPlaces] = useState<NearbyPlace[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [activeTab, setActiveTab] = useState<'overview' | 'courses' | 'housing'>('overview');
@@ -60,6 +62,24 @@ const ProgramDetail: React.FC = () => {
     }
   }, [id]);
 
+  // Nearby places are optional extras: load them on their own and ignore failures
+  useEffect(() => {
+    setNearbyPlaces([]);
+    if (!id) return;
+    let cancelled = false;
+    programsApi
+      .nearbyPlaces(Number(id), { k: 6 })
+      .then((places) => {
+        if (!cancelled) setNearbyPlaces(places);
+      })
+      .catch((err: any) => {
+        console.error(err);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [id]);
+
   const fetchProgramData = async () => {
     setLoading(true);
     try {
@@ -263,6 +283,34 @@ const ProgramDetail: React.FC = () => {
               <p className="text-gray-700 leading-relaxed">{program.description}</p>
             </div>
           )}
+
+          {nearbyPlaces.length > 0 && (
+            <div className="mt-6">
+              <h3 className="text-xl font-bold text-gray-900 mb-3">Places Nearby</h3>
+              <ul className="grid md:grid-cols-2 gap-3">
+                {nearbyPlaces.map((place) => (
+                  <li key={place.id}>
+                    <Link
+                      to={`/places/${place.id}`}
+                      className="flex items-center justify-between p-3 border rounded-lg hover:bg-gray-50 transition"
+                    >
+                      <div>
+                        <div className="font-semibold text-gray-900">{place.name}</div>
+                        <div className="text-sm text-gray-600 capitalize">
+                          {place.category} · {place.distance_km < 1
+                            ? `${Math.round(place.distance_km * 1000)} m`
+                            : `${place.distance_km.toFixed(1)} km`}
+                        </div>
+                      </div>
+                      {place.average_rating !== null && (
+                        <StarRating rating={place.average_rating} size="sm" />
+                      )}
+                    </Link>
+                  </li>
+                ))}
+              </ul>
+            </div>
+          )}
         </div>
 
         {/* Tabs */}
@@ -44,9 +44,15 @@ export const tripsApi = {
   createReview: jest.fn(),
 };
 
+export const searchApi = {
+  search: jest.fn(),
+  suggest: jest.fn(),
+};
+
 export default {
   authApi,
   programsApi,
   placesApi,
   tripsApi,
+  searchApi,
 };
@@ -104,6 +104,8 @@ export interface StudyAbroadProgram {
   cost?: number;
   housing_type?: string;
   location?: string;
+  latitude?: number;
+  longitude?: number;
   duration?: string;
   description?: string;
   created_at: string;
@@ -111,6 +113,20 @@ export interface StudyAbroadProgram {
   review_count?: number;
 }
 
+export interface NearbyPlace {
+  id: number;
+  name: string;
+  category: string;
+  city: string;
+  country: string;
+  latitude: number;
+  longitude: number;
+  address?: string;
+  average_rating: number | null;
+  review_count: number;
+  distance_km: number;
+}
+
 export interface ReviewerInfo {
   id: number | null;
   first_name: string | null;
@@ -170,6 +186,22 @@ export interface Place {
   created_at: string;
   average_rating?: number | null;
   review_count?: number;
+  distance_km?: number; // only on near= queries
+}
+
+export interface PlaceCluster {
+  count: number;
+  latitude: number;
+  longitude: number;
+  top_category: string;
+  place_id?: number; // set when the cluster is a single place
+}
+
+export interface PlaceClusterTile {
+  zoom: number;
+  x: number;
+  y: number;
+  clusters: PlaceCluster[];
 }
 
 export interface PlaceReview {
@@ -313,6 +345,15 @@ export const programsApi = {
     await api.delete(`/api/programs/${id}`);
   },
 
+  // The k places nearest the program, nearest first
+  nearbyPlaces: async (programId: number, params?: { k?: number; max_km?: number }) => {
+    const response = await api.get<NearbyPlace[]>(
+      `/api/programs/${programId}/nearby-places`,
+      { params }
+    );
+    return response.data;
+  },
+
   // Reviews
   listReviews: async (
     programId: number,
@@ -395,6 +436,9 @@ export const placesApi = {
     country?: string;
     category?: string;
     search?: string;
+    bbox?: string; // west,south,east,north
+    near?: string; // lat,lng
+    radius_km?: number;
     skip?: number;
     limit?: number;
   }) => {
@@ -423,6 +467,14 @@ export const placesApi = {
     await api.delete(`/api/places/${id}`);
   },
 
+  // Marker clusters for one Web Mercator map tile
+  clusters: async (zoom: number, x: number, y: number) => {
+    const response = await api.get<PlaceClusterTile>(
+      `/api/places/clusters/${zoom}/${x}/${y}`
+    );
+    return response.data;
+  },
+
   // Reviews
   listReviews: async (
     placeId: number,
@@ -504,6 +556,71 @@ export const tripsApi = {
   },
 };
 
+// ===== Search API =====
+
+export interface ProgramSearchHit {
+  type: "program";
+  id: number;
+  program_name: string;
+  city: string;
+  country: string;
+}
+
+export interface PlaceSearchHit {
+  type: "place";
+  id: number;
+  name: string;
+  category: string;
+  city: string;
+  country: string;
+}
+
+export interface TripSearchHit {
+  type: "trip";
+  id: number;
+  destination: string;
+  trip_type?: string;
+  country: string;
+}
+
+export interface SearchResults {
+  programs: ProgramSearchHit[];
+  places: PlaceSearchHit[];
+  trips: TripSearchHit[];
+}
+
+export type SuggestField =
+  | "city"
+  | "country"
+  | "institution"
+  | "program"
+  | "place"
+  | "destination";
+
+export interface Suggestion {
+  field: SuggestField;
+  value: string;
+}
+
+export const searchApi = {
+  // Search programs, places and trips in one request (best matches first)
+  search: async (q: string, limit = 3) => {
+    const response = await api.get<SearchResults>("/api/search", {
+      params: { q, limit },
+    });
+    return response.data;
+  },
+
+  // Autocomplete cities, countries, institutions and names from a prefix
+  suggest: async (q: string, fields?: SuggestField[], limit = 10) => {
+    const response = await api.get<Suggestion[]>("/api/suggest", {
+      params: { q, field: fields, limit },
+      paramsSerializer: { indexes: null },
+    });
+    return response.data;
+  },
+};
+
 // Bookmarks API
 export const bookmarksApi = {
   // Programs
@@ -593,6 +710,46 @@ export interface Message {
   parent_message_id?: number;
 }
 
+// Cursor page of messages; next_cursor is null on the last page
+export interface MessagePage {
+  items: Message[];
+  next_cursor: string | null;
+}
+
+export interface ConversationSummary {
+  id: number;
+  other_user_id: number;
+  other_user_name: string | null;
+  other_user_email: string;
+  last_message_id: number | null;
+  last_sender_id: number | null;
+  subject: string;
+  preview: string;
+  unread_count: number; // messages in this conversation the current user hasn't read
+  updated_at: string;
+}
+
+export interface ConversationPage {
+  items: ConversationSummary[];
+  next_cursor: string | null;
+}
+
+export interface ThreadMessage extends Message {
+  depth: number; // 0 for the root
+  reply_count: number;
+}
+
+export interface MessageThread {
+  root_id: number;
+  messages: ThreadMessage[]; // depth-first, replies oldest first
+}
+
+export interface MessagePageParams {
+  cursor?: string; // omit (or "") for the first page
+  limit?: number;
+  since?: string; // ISO timestamp of the last sync
+}
+
 // Messages API
 export const messagesApi = {
   // Send a message
@@ -615,12 +772,40 @@ export const messagesApi = {
     return response.data as Message[];
   },
 
+  // Get one page of the inbox, newest first
+  getInboxPage: async (params: MessagePageParams & { unread_only?: boolean } = {}) => {
+    const response = await api.get<MessagePage>("/messages/inbox", {
+      params: { ...params, cursor: params.cursor ?? "" },
+    });
+    return response.data;
+  },
+
+  // Get one page of sent messages, newest first
+  getSentPage: async (params: MessagePageParams = {}) => {
+    const response = await api.get<MessagePage>("/messages/sent", {
+      params: { ...params, cursor: params.cursor ?? "" },
+    });
+    return response.data;
+  },
+
+  // Get one page of conversations (one per person), most recently active first
+  getConversations: async (params: { cursor?: string; limit?: number } = {}) => {
+    const response = await api.get<ConversationPage>("/messages/conversations", {
+      params: { ...params, cursor: params.cursor ?? "" },
+    });
+    return response.data;
+  },
+
   // Get unread count
   getUnreadCount: async () => {
     const response = await api.get("/messages/unread-count");
     return response.data as { unread_count: number };
   },
 
+  // Server-sent events: unread_count on connect, then message and read events
+  openStream: () =>
+    new EventSource(`${API_BASE_URL}/messages/stream`, { withCredentials: true }),
+
   // Get a specific message
   getMessage: async (messageId: number) => {
     const response = await api.get(`/messages/${messageId}`);
@@ -633,6 +818,23 @@ export const messagesApi = {
     return response.data;
   },
 
+  // Get the whole reply thread a message belongs to
+  getThread: async (messageId: number) => {
+    const response = await api.get<MessageThread>(`/messages/${messageId}/thread`);
+    return response.data;
+  },
+
+  // Mark several messages read: explicit ids, or a message id and everything older
+  markManyAsRead: async (
+    body: { ids: number[] } | { up_to: number; sender_id?: number }
+  ) => {
+    const response = await api.put<{ message: string; message_ids: number[] }>(
+      "/messages/read",
+      body
+    );
+    return response.data;
+  },
+
   // Delete a message
   deleteMessage: async (messageId: number) => {
     const response = await api.delete(`/messages/${messageId}`);
@@ -644,6 +846,14 @@ export const messagesApi = {
     const response = await api.get(`/messages/conversation/${otherUserId}`);
     return response.data as Message[];
   },
+
+  // Get one page of a conversation, oldest first
+  getConversationPage: async (otherUserId: number, params: MessagePageParams = {}) => {
+    const response = await api.get<MessagePage>(`/messages/conversation/${otherUserId}`, {
+      params: { ...params, cursor: params.cursor ?? "" },
+    });
+    return response.data;
+  },
 };
 
 // ===== AI Trip Planner API =====
@@ -1 +1,6 @@
 """Abroadly - Peer-verified study abroad platform."""
+
+import time
+
+# When the package began importing; app.main reports cold-start import time from it
+IMPORT_STARTED = time.perf_counter()
@@ -0,0 +1,21 @@
+"""Lazily constructed OpenAI client.
+
+The ``openai`` SDK is one of the heaviest imports in the app, and most
+workers never plan a trip. It is imported on the first AI request instead of
+at startup, and one client per API key is reused so requests share its HTTP
+connection pool.
+"""
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+@lru_cache(maxsize=4)
+def openai_client(api_key: str) -> "OpenAI":
+    """Return the shared OpenAI client for an API key, importing the SDK on first use."""
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key)
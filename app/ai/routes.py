@@ -8,10 +8,10 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from openai import OpenAI
 from pydantic import BaseModel
 from sqlmodel import Session, select
 
+from app.ai.client import openai_client
 from app.db import get_session
 from app.deps import current_user
 
@@ -320,7 +320,7 @@ these bookmarked destinations. Reference specific reviews to explain why \
 you're recommending certain activities or places. Make it personal!"""
 
     # Call OpenAI
-    client = OpenAI(api_key=api_key)
+    client = openai_client(api_key)
 
     async def generate():
         """Stream the response from OpenAI."""
@@ -383,7 +383,7 @@ async def quick_suggestion(
 
     season = get_season_context(None)
 
-    client = OpenAI(api_key=api_key)
+    client = openai_client(api_key)
 
     user_prompt = (
         f"The user has {program_count} programs, {place_count} places, "
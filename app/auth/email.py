@@ -0,0 +1,15 @@
+"""Lazily loaded Resend email sender.
+
+The ``resend`` SDK is only imported when an email is actually sent, so
+workers running without email configuration (and every cold start) skip it.
+"""
+
+from typing import Any, Dict
+
+
+def send_email(api_key: str, params: Dict[str, Any]) -> Any:
+    """Send one email through Resend and return its API response."""
+    import resend
+
+    resend.api_key = api_key
+    return resend.Emails.send(params)
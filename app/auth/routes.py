@@ -5,14 +5,13 @@
 import logging
 from typing import Dict, List, Optional
 
-import resend
 from fastapi import APIRouter, Depends, HTTPException, Response, status
 from pydantic import BaseModel, EmailStr
 from sqlmodel import Session, select
 
 from ..config import settings
 from ..db import get_session
-from ..deps import current_user
+from ..deps import current_user, invalidate_cached_user
 from ..models import (
     CourseReview,
     Place,
@@ -24,6 +23,8 @@ from ..models import (
     TripReview,
     User,
 )
+from ..ratings import record_review
+from .email import send_email
 from .jwt import mint_jwt
 from .magic import make_magic_token, verify_magic_token
 
@@ -83,8 +84,6 @@ def request_link(body: RequestLinkBody) -> Dict[str, str]:
 
     # Send email
     try:
-        resend.api_key = settings.resend_api_key
-
         email_html = f"""  
         <!DOCTYPE html>
         <html>
@@ -162,7 +161,8 @@ def request_link(body: RequestLinkBody) -> Dict[str, str]:
         </html>
         """
 
-        result = resend.Emails.send(
+        result = send_email(
+            settings.resend_api_key,
             {
                 "from": settings.email_from,
                 "to": [email],
@@ -172,7 +172,7 @@ def request_link(body: RequestLinkBody) -> Dict[str, str]:
                     f"Click to sign in to Abroadly: {magic_url}\n\n"
                     "This link will expire in 15 minutes."
                 ),
-            }
+            },
         )
         logger.info(f"Email sent successfully to {email}, result: {result}")
         return {"sent": "email"}
@@ -185,7 +185,7 @@ def request_link(body: RequestLinkBody) -> Dict[str, str]:
 
 
 @router.get("/callback")
-def callback(token: str, response: Response):
+def callback(token: str, response: Response, session: Session = Depends(get_session)):
     email = verify_magic_token(token)
     if not email:
         raise HTTPException(
@@ -193,17 +193,14 @@ def callback(token: str, response: Response):
             detail="Invalid or expired token",
         )
 
-    from sqlmodel import select
-
-    with next(get_session()) as session:
-        existing = session.exec(select(User).where(User.email == email)).first()
-        if existing:
-            user = existing
-        else:
-            user = User(email=email)
-            session.add(user)
-            session.commit()
-            session.refresh(user)
+    existing = session.exec(select(User).where(User.email == email)).first()
+    if existing:
+        user = existing
+    else:
+        user = User(email=email)
+        session.add(user)
+        session.commit()
+        session.refresh(user)
 
     jwt_token = mint_jwt(int(user.id), email)
     # Determine if we're in production (HTTPS) for secure cookies
@@ -375,214 +372,225 @@ def get_user_reviews(user_id: int, session: Session = Depends(get_session)):
 
 
 @router.put("/profile")
-def update_profile(profile_data: ProfileUpdate, user=Depends(current_user)):
+def update_profile(
+    profile_data: ProfileUpdate,
+    user=Depends(current_user),
+    session: Session = Depends(get_session),
+):
     """Update user profile (for onboarding questionnaire)"""
-    with next(get_session()) as session:
-        # Get the user from database
-        db_user = session.get(User, user.id)
-        if not db_user:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-        # Update fields if provided
-        if profile_data.first_name is not None:
-            db_user.first_name = profile_data.first_name
-        if profile_data.last_name is not None:
-            db_user.last_name = profile_data.last_name
-        if profile_data.age is not None:
-            db_user.age = profile_data.age
-        if profile_data.institution is not None:
-            db_user.institution = profile_data.institution
-        if profile_data.majors is not None:
-            db_user.majors = profile_data.majors
-        if profile_data.minors is not None:
-            db_user.minors = profile_data.minors
-        if profile_data.profile_completed is not None:
-            db_user.profile_completed = profile_data.profile_completed
-        # Study abroad status fields
-        if profile_data.study_abroad_status is not None:
-            db_user.study_abroad_status = profile_data.study_abroad_status
-        if profile_data.program_name is not None:
-            db_user.program_name = profile_data.program_name
-        if profile_data.program_city is not None:
-            db_user.program_city = profile_data.program_city
-        if profile_data.program_country is not None:
-            db_user.program_country = profile_data.program_country
-        if profile_data.program_term is not None:
-            db_user.program_term = profile_data.program_term
-        if profile_data.onboarding_completed is not None:
-            db_user.onboarding_completed = profile_data.onboarding_completed
-
-        session.add(db_user)
-        session.commit()
-        session.refresh(db_user)
-
-        return {
-            "id": db_user.id,
-            "email": db_user.email,
-            "first_name": db_user.first_name,
-            "last_name": db_user.last_name,
-            "age": db_user.age,
-            "institution": db_user.institution,
-            "majors": db_user.majors or [],
-            "minors": db_user.minors or [],
-            "profile_completed": db_user.profile_completed,
-            "study_abroad_status": db_user.study_abroad_status,
-            "program_name": db_user.program_name,
-            "program_city": db_user.program_city,
-            "program_country": db_user.program_country,
-            "program_term": db_user.program_term,
-            "onboarding_completed": db_user.onboarding_completed,
-        }
+    # Get the user from database
+    db_user = session.get(User, user.id)
+    if not db_user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    # Update fields if provided
+    if profile_data.first_name is not None:
+        db_user.first_name = profile_data.first_name
+    if profile_data.last_name is not None:
+        db_user.last_name = profile_data.last_name
+    if profile_data.age is not None:
+        db_user.age = profile_data.age
+    if profile_data.institution is not None:
+        db_user.institution = profile_data.institution
+    if profile_data.majors is not None:
+        db_user.majors = profile_data.majors
+    if profile_data.minors is not None:
+        db_user.minors = profile_data.minors
+    if profile_data.profile_completed is not None:
+        db_user.profile_completed = profile_data.profile_completed
+    # Study abroad status fields
+    if profile_data.study_abroad_status is not None:
+        db_user.study_abroad_status = profile_data.study_abroad_status
+    if profile_data.program_name is not None:
+        db_user.program_name = profile_data.program_name
+    if profile_data.program_city is not None:
+        db_user.program_city = profile_data.program_city
+    if profile_data.program_country is not None:
+        db_user.program_country = profile_data.program_country
+    if profile_data.program_term is not None:
+        db_user.program_term = profile_data.program_term
+    if profile_data.onboarding_completed is not None:
+        db_user.onboarding_completed = profile_data.onboarding_completed
+
+    session.add(db_user)
+    session.commit()
+    session.refresh(db_user)
+    # The identity cache holds the old profile; drop it so /me reflects the change
+    invalidate_cached_user(db_user.id)
+
+    return {
+        "id": db_user.id,
+        "email": db_user.email,
+        "first_name": db_user.first_name,
+        "last_name": db_user.last_name,
+        "age": db_user.age,
+        "institution": db_user.institution,
+        "majors": db_user.majors or [],
+        "minors": db_user.minors or [],
+        "profile_completed": db_user.profile_completed,
+        "study_abroad_status": db_user.study_abroad_status,
+        "program_name": db_user.program_name,
+        "program_city": db_user.program_city,
+        "program_country": db_user.program_country,
+        "program_term": db_user.program_term,
+        "onboarding_completed": db_user.onboarding_completed,
+    }
 
 
 @router.get("/my-reviews")
-def get_my_reviews(user=Depends(current_user)):
+def get_my_reviews(user=Depends(current_user), session: Session = Depends(get_session)):
     """Get all reviews by the current user"""
-    with next(get_session()) as session:
-        # Get all review types
-        program_reviews = session.exec(
-            select(ProgramReview).where(ProgramReview.user_id == user.id)
-        ).all()
-        course_reviews = session.exec(
-            select(CourseReview).where(CourseReview.user_id == user.id)
-        ).all()
-        housing_reviews = session.exec(
-            select(ProgramHousingReview).where(ProgramHousingReview.user_id == user.id)
-        ).all()
-        place_reviews = session.exec(
-            select(PlaceReview).where(PlaceReview.user_id == user.id)
-        ).all()
-        trip_reviews = session.exec(select(TripReview).where(TripReview.user_id == user.id)).all()
-
-        return {
-            "program_reviews": [
-                {
-                    "id": r.id,
-                    "program_id": r.program_id,
-                    "rating": r.rating,
-                    "review_text": r.review_text,
-                    "date": r.date.isoformat(),
-                }
-                for r in program_reviews
-            ],
-            "course_reviews": [
-                {
-                    "id": r.id,
-                    "program_id": r.program_id,
-                    "course_name": r.course_name,
-                    "instructor_name": r.instructor_name,
-                    "rating": r.rating,
-                    "review_text": r.review_text,
-                    "date": r.date.isoformat(),
-                }
-                for r in course_reviews
-            ],
-            "housing_reviews": [
-                {
-                    "id": r.id,
-                    "program_id": r.program_id,
-                    "housing_description": r.housing_description,
-                    "rating": r.rating,
-                    "review_text": r.review_text,
-                    "date": r.date.isoformat(),
-                }
-                for r in housing_reviews
-            ],
-            "place_reviews": [
-                {
-                    "id": r.id,
-                    "place_id": r.place_id,
-                    "rating": r.rating,
-                    "review_text": r.review_text,
-                    "date": r.date.isoformat(),
-                }
-                for r in place_reviews
-            ],
-            "trip_reviews": [
-                {
-                    "id": r.id,
-                    "trip_id": r.trip_id,
-                    "rating": r.rating,
-                    "review_text": r.review_text,
-                    "date": r.date.isoformat(),
-                }
-                for r in trip_reviews
-            ],
-        }
+    # Get all review types
+    program_reviews = session.exec(
+        select(ProgramReview).where(ProgramReview.user_id == user.id)
+    ).all()
+    course_reviews = session.exec(select(CourseReview).where(CourseReview.user_id == user.id)).all()
+    housing_reviews = session.exec(
+        select(ProgramHousingReview).where(ProgramHousingReview.user_id == user.id)
+    ).all()
+    place_reviews = session.exec(select(PlaceReview).where(PlaceReview.user_id == user.id)).all()
+    trip_reviews = session.exec(select(TripReview).where(TripReview.user_id == user.id)).all()
+
+    return {
+        "program_reviews": [
+            {
+                "id": r.id,
+                "program_id": r.program_id,
+                "rating": r.rating,
+                "review_text": r.review_text,
+                "date": r.date.isoformat(),
+            }
+            for r in program_reviews
+        ],
+        "course_reviews": [
+            {
+                "id": r.id,
+                "program_id": r.program_id,
+                "course_name": r.course_name,
+                "instructor_name": r.instructor_name,
+                "rating": r.rating,
+                "review_text": r.review_text,
+                "date": r.date.isoformat(),
+            }
+            for r in course_reviews
+        ],
+        "housing_reviews": [
+            {
+                "id": r.id,
+                "program_id": r.program_id,
+                "housing_description": r.housing_description,
+                "rating": r.rating,
+                "review_text": r.review_text,
+                "date": r.date.isoformat(),
+            }
+            for r in housing_reviews
+        ],
+        "place_reviews": [
+            {
+                "id": r.id,
+                "place_id": r.place_id,
+                "rating": r.rating,
+                "review_text": r.review_text,
+                "date": r.date.isoformat(),
+            }
+            for r in place_reviews
+        ],
+        "trip_reviews": [
+            {
+                "id": r.id,
+                "trip_id": r.trip_id,
+                "rating": r.rating,
+                "review_text": r.review_text,
+                "date": r.date.isoformat(),
+            }
+            for r in trip_reviews
+        ],
+    }
 
 
 @router.delete("/my-reviews/{review_type}/{review_id}")
-def delete_my_review(review_type: str, review_id: int, user=Depends(current_user)):
+def delete_my_review(
+    review_type: str,
+    review_id: int,
+    user=Depends(current_user),
+    session: Session = Depends(get_session),
+):
     """Delete a review by the current user"""
-    with next(get_session()) as session:
-        # Map review types to models
-        review_models = {
-            "program": ProgramReview,
-            "course": CourseReview,
-            "housing": ProgramHousingReview,
-            "place": PlaceReview,
-            "trip": TripReview,
-        }
+    # Map review types to models
+    review_models = {
+        "program": ProgramReview,
+        "course": CourseReview,
+        "housing": ProgramHousingReview,
+        "place": PlaceReview,
+        "trip": TripReview,
+    }
+
+    if review_type not in review_models:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid review type. Must be one of: {list(review_models.keys())}",
+        )
 
-        if review_type not in review_models:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid review type. Must be one of: {list(review_models.keys())}",
-            )
+    ReviewModel = review_models[review_type]
+    review = session.get(ReviewModel, review_id)
 
-        ReviewModel = review_models[review_type]
-        review = session.get(ReviewModel, review_id)
+    if not review:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
 
-        if not review:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
+    # Verify the review belongs to the current user
+    if review.user_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only delete your own reviews",
+        )
 
-        # Verify the review belongs to the current user
-        if review.user_id != user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only delete your own reviews",
-            )
+    # Keep the reviewed entity's rating summary in step with the delete
+    rated_entities = {
+        "program": (StudyAbroadProgram, "program_id"),
+        "place": (Place, "place_id"),
+        "trip": (Trip, "trip_id"),
+    }
+    if review_type in rated_entities:
+        entity_model, foreign_key = rated_entities[review_type]
+        record_review(session, entity_model, getattr(review, foreign_key), review.rating, delta=-1)
 
-        session.delete(review)
-        session.commit()
+    session.delete(review)
+    session.commit()
 
-        return {"ok": True, "message": "Review deleted successfully"}
+    return {"ok": True, "message": "Review deleted successfully"}
 
 
 @router.get("/my-trips")
-def get_my_trips(user=Depends(current_user)):
+def get_my_trips(user=Depends(current_user), session: Session = Depends(get_session)):
     """Get all trips posted by the current user"""
-    with next(get_session()) as session:
-        trips = session.exec(select(Trip).where(Trip.user_id == user.id)).all()
-        return [
-            {
-                "id": t.id,
-                "destination": t.destination,
-                "country": t.country,
-                "description": t.description,
-                "trip_type": t.trip_type,
-                "created_at": t.created_at.isoformat(),
-            }
-            for t in trips
-        ]
+    trips = session.exec(select(Trip).where(Trip.user_id == user.id)).all()
+    return [
+        {
+            "id": t.id,
+            "destination": t.destination,
+            "country": t.country,
+            "description": t.description,
+            "trip_type": t.trip_type,
+            "created_at": t.created_at.isoformat(),
+        }
+        for t in trips
+    ]
 
 
 @router.get("/my-programs")
-def get_my_programs(user=Depends(current_user)):
+def get_my_programs(user=Depends(current_user), session: Session = Depends(get_session)):
     """Get all programs posted by the current user"""
-    with next(get_session()) as session:
-        programs = session.exec(
-            select(StudyAbroadProgram).where(StudyAbroadProgram.user_id == user.id)
-        ).all()
-        return programs
+    programs = session.exec(
+        select(StudyAbroadProgram).where(StudyAbroadProgram.user_id == user.id)
+    ).all()
+    return programs
 
 
 @router.get("/my-places")
-def get_my_places(user=Depends(current_user)):
+def get_my_places(user=Depends(current_user), session: Session = Depends(get_session)):
     """Get all places posted by the current user"""
-    with next(get_session()) as session:
-        places = session.exec(select(Place).where(Place.user_id == user.id)).all()
-        return places
+    places = session.exec(select(Place).where(Place.user_id == user.id)).all()
+    return places
 
 
 @router.post("/logout")
@@ -1,20 +1,26 @@
 # Contributors:
 # Cursor AI Assistant - Bookmarks feature implementation
 
+from datetime import datetime
+from typing import List, Tuple, Type
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db import get_session
-from app.deps import current_user
+from app.db import get_async_session, get_session
+from app.deps import current_user, current_user_async
 from app.models import (
     Place,
     PlaceBookmark,
     ProgramBookmark,
+    RatingSummary,
     StudyAbroadProgram,
     Trip,
     TripBookmark,
 )
+from app.ratings import average_rating
 
 router = APIRouter(prefix="/bookmarks", tags=["bookmarks"])
 
@@ -24,6 +30,34 @@ def get_user_id(user=Depends(current_user)) -> int:
     return user.id
 
 
+async def get_async_user_id(user=Depends(current_user_async)) -> int:
+    """get_user_id for async handlers (resolved on the handler's async session)."""
+    return user.id
+
+
+async def bookmarked(
+    db: AsyncSession, user_id: int, entity_model: Type[RatingSummary], bookmark_model, foreign_key
+) -> List[Tuple[RatingSummary, datetime]]:
+    """(entity, bookmark created_at) for a user's bookmarks of one kind, oldest bookmark first.
+
+    One join of the bookmark table to the entity table; bookmarks whose entity is gone
+    drop out of the join.
+    """
+    return (
+        await db.exec(
+            select(entity_model, bookmark_model.created_at)
+            .join(bookmark_model, foreign_key == entity_model.id)
+            .where(bookmark_model.user_id == user_id)
+            .order_by(bookmark_model.id)
+        )
+    ).all()
+
+
+def rating_fields(entity: RatingSummary) -> dict:
+    """Rating summary from the entity's denormalized columns (see app/ratings.py)."""
+    return {"average_rating": average_rating(entity), "review_count": entity.review_count}
+
+
 # ===== PROGRAM BOOKMARKS =====
 
 
@@ -86,32 +120,28 @@ def unbookmark_program(
 
 
 @router.get("/programs")
-def get_bookmarked_programs(
-    user_id: int = Depends(get_user_id), db: Session = Depends(get_session)
+async def get_bookmarked_programs(
+    user_id: int = Depends(get_async_user_id), db: AsyncSession = Depends(get_async_session)
 ):
     """Get all bookmarked programs for the current user."""
-    bookmarks = db.exec(select(ProgramBookmark).where(ProgramBookmark.user_id == user_id)).all()
-
-    # Fetch the actual programs
-    programs = []
-    for bookmark in bookmarks:
-        program = db.get(StudyAbroadProgram, bookmark.program_id)
-        if program:
-            programs.append(
-                {
-                    "id": program.id,
-                    "program_name": program.program_name,
-                    "institution": program.institution,
-                    "city": program.city,
-                    "country": program.country,
-                    "cost": program.cost,
-                    "duration": program.duration,
-                    "description": program.description,
-                    "bookmarked_at": bookmark.created_at.isoformat(),
-                }
-            )
-
-    return programs
+    rows = await bookmarked(
+        db, user_id, StudyAbroadProgram, ProgramBookmark, ProgramBookmark.program_id
+    )
+    return [
+        {
+            "id": program.id,
+            "program_name": program.program_name,
+            "institution": program.institution,
+            "city": program.city,
+            "country": program.country,
+            "cost": program.cost,
+            "duration": program.duration,
+            "description": program.description,
+            **rating_fields(program),
+            "bookmarked_at": bookmarked_at.isoformat(),
+        }
+        for program, bookmarked_at in rows
+    ]
 
 
 # ===== PLACE BOOKMARKS =====
@@ -174,29 +204,25 @@ def unbookmark_place(
 
 
 @router.get("/places")
-def get_bookmarked_places(user_id: int = Depends(get_user_id), db: Session = Depends(get_session)):
+async def get_bookmarked_places(
+    user_id: int = Depends(get_async_user_id), db: AsyncSession = Depends(get_async_session)
+):
     """Get all bookmarked places for the current user."""
-    bookmarks = db.exec(select(PlaceBookmark).where(PlaceBookmark.user_id == user_id)).all()
-
-    # Fetch the actual places
-    places = []
-    for bookmark in bookmarks:
-        place = db.get(Place, bookmark.place_id)
-        if place:
-            places.append(
-                {
-                    "id": place.id,
-                    "name": place.name,
-                    "category": place.category,
-                    "city": place.city,
-                    "country": place.country,
-                    "description": place.description,
-                    "address": place.address,
-                    "bookmarked_at": bookmark.created_at.isoformat(),
-                }
-            )
-
-    return places
+    rows = await bookmarked(db, user_id, Place, PlaceBookmark, PlaceBookmark.place_id)
+    return [
+        {
+            "id": place.id,
+            "name": place.name,
+            "category": place.category,
+            "city": place.city,
+            "country": place.country,
+            "description": place.description,
+            "address": place.address,
+            **rating_fields(place),
+            "bookmarked_at": bookmarked_at.isoformat(),
+        }
+        for place, bookmarked_at in rows
+    ]
 
 
 # ===== TRIP BOOKMARKS =====
@@ -255,101 +281,90 @@ def unbookmark_trip(
 
 
 @router.get("/trips")
-def get_bookmarked_trips(user_id: int = Depends(get_user_id), db: Session = Depends(get_session)):
+async def get_bookmarked_trips(
+    user_id: int = Depends(get_async_user_id), db: AsyncSession = Depends(get_async_session)
+):
     """Get all bookmarked trips for the current user."""
-    bookmarks = db.exec(select(TripBookmark).where(TripBookmark.user_id == user_id)).all()
-
-    # Fetch the actual trips
-    trips = []
-    for bookmark in bookmarks:
-        trip = db.get(Trip, bookmark.trip_id)
-        if trip:
-            trips.append(
-                {
-                    "id": trip.id,
-                    "destination": trip.destination,
-                    "country": trip.country,
-                    "description": trip.description,
-                    "trip_type": trip.trip_type,
-                    "bookmarked_at": bookmark.created_at.isoformat(),
-                }
-            )
-
-    return trips
+    rows = await bookmarked(db, user_id, Trip, TripBookmark, TripBookmark.trip_id)
+    return [
+        {
+            "id": trip.id,
+            "destination": trip.destination,
+            "country": trip.country,
+            "description": trip.description,
+            "trip_type": trip.trip_type,
+            **rating_fields(trip),
+            "bookmarked_at": bookmarked_at.isoformat(),
+        }
+        for trip, bookmarked_at in rows
+    ]
 
 
 # ===== GET ALL BOOKMARKS =====
 
 
 @router.get("")
-def get_all_bookmarks(user_id: int = Depends(get_user_id), db: Session = Depends(get_session)):
-    """Get all bookmarks for the current user (programs, places, trips)."""
+async def get_all_bookmarks(
+    user_id: int = Depends(get_async_user_id), db: AsyncSession = Depends(get_async_session)
+):
+    """Get all bookmarks for the current user (programs, places, trips).
+
+    Three queries however many items are saved: one bookmark-to-entity join per kind.
+    """
     try:
-        # Fetch all bookmark types
-        program_bookmarks = db.exec(
-            select(ProgramBookmark).where(ProgramBookmark.user_id == user_id)
-        ).all()
-        place_bookmarks = db.exec(
-            select(PlaceBookmark).where(PlaceBookmark.user_id == user_id)
-        ).all()
-        trip_bookmarks = db.exec(select(TripBookmark).where(TripBookmark.user_id == user_id)).all()
-
-        # Build response with full objects
-        programs = []
-        for bookmark in program_bookmarks:
-            program = db.get(StudyAbroadProgram, bookmark.program_id)
-            if program:
-                programs.append(
-                    {
-                        "id": program.id,
-                        "program_name": program.program_name,
-                        "institution": program.institution,
-                        "city": program.city,
-                        "country": program.country,
-                        "cost": program.cost,
-                        "duration": program.duration,
-                        "description": program.description,
-                        "housing_type": program.housing_type,
-                        "location": program.location,
-                        "created_at": program.created_at.isoformat()
-                        if program.created_at
-                        else None,
-                    }
-                )
-
-        places = []
-        for bookmark in place_bookmarks:
-            place = db.get(Place, bookmark.place_id)
-            if place:
-                places.append(
-                    {
-                        "id": place.id,
-                        "name": place.name,
-                        "category": place.category,
-                        "city": place.city,
-                        "country": place.country,
-                        "description": place.description,
-                        "address": place.address,
-                        "latitude": place.latitude,
-                        "longitude": place.longitude,
-                        "created_at": place.created_at.isoformat() if place.created_at else None,
-                    }
-                )
-
-        trips = []
-        for bookmark in trip_bookmarks:
-            trip = db.get(Trip, bookmark.trip_id)
-            if trip:
-                trips.append(
-                    {
-                        "id": trip.id,
-                        "destination": trip.destination,
-                        "country": trip.country,
-                        "description": trip.description,
-                        "trip_type": trip.trip_type,
-                        "created_at": trip.created_at.isoformat() if trip.created_at else None,
-                    }
-                )
+        program_rows = await bookmarked(
+            db, user_id, StudyAbroadProgram, ProgramBookmark, ProgramBookmark.program_id
+        )
+        place_rows = await bookmarked(db, user_id, Place, PlaceBookmark, PlaceBookmark.place_id)
+        trip_rows = await bookmarked(db, user_id, Trip, TripBookmark, TripBookmark.trip_id)
+
+        programs = [
+            {
+                "id": program.id,
+                "program_name": program.program_name,
+                "institution": program.institution,
+                "city": program.city,
+                "country": program.country,
+                "cost": program.cost,
+                "duration": program.duration,
+                "description": program.description,
+                "housing_type": program.housing_type,
+                "location": program.location,
+                **rating_fields(program),
+                "created_at": program.created_at.isoformat() if program.created_at else None,
+            }
+            for program, _ in program_rows
+        ]
+
+        places = [
+            {
+                "id": place.id,
+                "name": place.name,
+                "category": place.category,
+                "city": place.city,
+                "country": place.country,
+                "description": place.description,
+                "address": place.address,
+                "latitude": place.latitude,
+                "longitude": place.longitude,
+                **rating_fields(place),
+                "created_at": place.created_at.isoformat() if place.created_at else None,
+            }
+            for place, _ in place_rows
+        ]
+
+        trips = [
+            {
+                "id": trip.id,
+                "destination": trip.destination,
+                "country": trip.country,
+                "description": trip.description,
+                "trip_type": trip.trip_type,
+                **rating_fields(trip),
+                "created_at": trip.created_at.isoformat() if trip.created_at else None,
+            }
+            for trip, _ in trip_rows
+        ]
 
         return {"programs": programs, "places": places, "trips": trips}
     except Exception as e:
@@ -0,0 +1,192 @@
+"""Server-side marker clustering for the places map.
+
+The map asks for Web Mercator tiles (``z/x/y``, the same scheme Google Maps
+and OpenStreetMap use). Each tile is answered with at most a few dozen
+clusters, so a payload stays a few KB however many places there are.
+
+Clusters come from grouping the tile's places by a geohash prefix. The prefix
+length grows with the zoom so each tile is split into roughly an 8-column
+grid, and the grouping runs in the database over the indexed geohash column
+(see app/geo.py).
+
+Finished tiles are kept in a per-process LRU. Creating, moving or deleting a
+place evicts only the cached tiles that contain its old or new position, in
+the process that handled the write; tiles also expire after
+settings.cluster_cache_ttl_sec seconds, which bounds how long another
+worker's tiles can miss the change.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .config import settings
+from .geo import GEOHASH_PRECISION, bbox_filter
+from .models import Place
+
+MAX_ZOOM = 20
+# Grid columns per tile is 2**TILE_GRID_BITS
+TILE_GRID_BITS = 3
+# Web Mercator stops short of the poles
+MAX_LATITUDE = 85.0511287798
+
+Tile = Tuple[int, int, int]
+
+
+def _tile_latitude(y: int, zoom: int) -> float:
+    """Latitude of the north edge of tile row y."""
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / (1 << zoom)))))
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(west, south, east, north) of a tile."""
+    tiles = 1 << zoom
+    west = x / tiles * 360.0 - 180.0
+    east = (x + 1) / tiles * 360.0 - 180.0
+    return west, _tile_latitude(y + 1, zoom), east, _tile_latitude(y, zoom)
+
+
+def tile_precision(zoom: int) -> int:
+    """Shortest geohash prefix whose cells are at most 1/8 of a tile wide."""
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        if (5 * precision + 1) // 2 >= zoom + TILE_GRID_BITS:
+            return precision
+    return GEOHASH_PRECISION
+
+
+def check_tile(zoom: int, x: int, y: int) -> None:
+    """Raise a 400 for tile coordinates outside the zoom level's grid."""
+    if not (0 <= zoom <= MAX_ZOOM):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Zoom must be between 0 and {MAX_ZOOM}",
+        )
+    if not (0 <= x < 1 << zoom and 0 <= y < 1 << zoom):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tile {x}/{y} is outside zoom level {zoom}",
+        )
+
+
+class ClusterCache:
+    """LRU of cluster tiles with a TTL and per-tile invalidation by position."""
+
+    def __init__(self, ttl_sec: int, maxsize: int = 2048) -> None:
+        self.ttl_sec = ttl_sec
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tile, Tuple[float, List[dict]]]" = OrderedDict()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def _live(self, tile: Tile) -> Optional[Tuple[float, List[dict]]]:
+        """The tile's entry if it hasn't expired, dropping it if it has (hold the lock)."""
+        entry = self._entries.get(tile)
+        if entry is not None and entry[0] < time.monotonic():
+            del self._entries[tile]
+            return None
+        return entry
+
+    def get(self, tile: Tile) -> Optional[List[dict]]:
+        with self._lock:
+            entry = self._live(tile)
+            if entry is None:
+                return None
+            self._entries.move_to_end(tile)
+            return entry[1]
+
+    def put(self, tile: Tile, clusters: List[dict], generation: int) -> None:
+        if self.ttl_sec <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return  # a place moved while this tile was being clustered
+            self._entries[tile] = (time.monotonic() + self.ttl_sec, clusters)
+            self._entries.move_to_end(tile)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_point(self, latitude: Optional[float], longitude: Optional[float]) -> None:
+        """Evict the cached tiles containing a position (call after a place there changes)."""
+        if latitude is None or longitude is None:
+            return
+        with self._lock:
+            self._generation += 1
+            for tile in list(self._entries):
+                west, south, east, north = tile_bounds(*tile)
+                if west <= longitude <= east and south <= latitude <= north:
+                    del self._entries[tile]
+
+    def __contains__(self, tile: Tile) -> bool:
+        with self._lock:
+            return self._live(tile) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+cluster_cache = ClusterCache(settings.cluster_cache_ttl_sec)
+
+
+async def tile_clusters(session: AsyncSession, zoom: int, x: int, y: int) -> List[dict]:
+    """Clusters (count, centroid, top category) for the places in one tile."""
+    tile = (zoom, x, y)
+    cached = cluster_cache.get(tile)
+    if cached is not None:
+        return cached
+    generation = cluster_cache.generation
+
+    cell = func.substr(Place.geohash, 1, tile_precision(zoom)).label("cell")
+    in_tile = bbox_filter(Place.geohash, Place.latitude, Place.longitude, tile_bounds(*tile))
+    rows = (
+        await session.exec(
+            select(
+                cell,
+                func.count(),
+                func.avg(Place.latitude),
+                func.avg(Place.longitude),
+                func.min(Place.id),
+            )
+            .where(in_tile)
+            .group_by(cell)
+        )
+    ).all()
+    category_rows = (
+        await session.exec(
+            select(cell, Place.category, func.count()).where(in_tile).group_by(cell, Place.category)
+        )
+    ).all()
+
+    # Most common category per cell, ties broken alphabetically
+    top_categories: Dict[str, Tuple[int, str]] = {}
+    for cell_key, category, count in category_rows:
+        best = top_categories.get(cell_key)
+        if best is None or (-count, category) < (-best[0], best[1]):
+            top_categories[cell_key] = (count, category)
+
+    clusters = []
+    for cell_key, count, latitude, longitude, first_id in sorted(rows, key=lambda row: row[0]):
+        cluster = {
+            "count": count,
+            "latitude": round(latitude, 5),
+            "longitude": round(longitude, 5),
+            "top_category": top_categories[cell_key][1],
+        }
+        if count == 1:
+            cluster["place_id"] = first_id  # lets the map link a lone marker straight away
+        clusters.append(cluster)
+
+    cluster_cache.put(tile, clusters, generation)
+    return clusters
@@ -18,6 +18,11 @@ def _split_domains(value: str) -> List[str]:
     return [d.strip().lower() for d in value.split(",") if d.strip()]
 
 
+def _optional_int(name: str) -> int | None:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
 @dataclass
 class Settings:
     app_url: str = os.getenv("APP_URL", "http://localhost:5173")
@@ -34,6 +39,32 @@ class Settings:
     resend_api_key: str | None = os.getenv("RESEND_API_KEY")
     email_from: str | None = os.getenv("EMAIL_FROM")
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+    # Connection pool profile: supabase-session, pgbouncer-transaction or dedicated
+    db_pool_profile: str = os.getenv("DB_POOL_PROFILE", "supabase-session")
+    # Optional overrides of the profile's pool size, overflow and checkout timeout; size and
+    # overflow are per worker, split between the sync and async engines
+    db_pool_size: int | None = _optional_int("DB_POOL_SIZE")
+    db_max_overflow: int | None = _optional_int("DB_MAX_OVERFLOW")
+    db_pool_timeout: int | None = _optional_int("DB_POOL_TIMEOUT")
+    # Alembic-only mode: skip create_all at startup and require the schema to be at head
+    skip_create_all: bool = os.getenv("SKIP_CREATE_ALL", "false").lower() in ("1", "true", "yes")
+    # SQLite only: WAL/pragma tuning with a single writer connection, and its lock wait
+    sqlite_tuned: bool = os.getenv("SQLITE_TUNED", "true").lower() in ("1", "true", "yes")
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    # Seconds an authenticated user stays in the per-process identity cache (0 disables)
+    user_cache_ttl_sec: int = int(os.getenv("USER_CACHE_TTL_SEC", "30"))
+    # Seconds a per-process unread message count is trusted before recounting (0 disables)
+    unread_count_ttl_sec: int = int(os.getenv("UNREAD_COUNT_TTL_SEC", "30"))
+    # Seconds per-process facet counts are reused before recounting (0 disables)
+    facet_cache_ttl_sec: int = int(os.getenv("FACET_CACHE_TTL_SEC", "30"))
+    # Seconds a per-process map cluster tile is reused before reclustering (0 disables)
+    cluster_cache_ttl_sec: int = int(os.getenv("CLUSTER_CACHE_TTL_SEC", "60"))
+    # Seconds before the per-process nearby-places index is rebuilt from the database (0 disables)
+    place_tree_ttl_sec: int = int(os.getenv("PLACE_TREE_TTL_SEC", "60"))
+    # Seconds before the per-process suggestion index is rebuilt from the database (0 disables)
+    suggest_index_ttl_sec: int = int(os.getenv("SUGGEST_INDEX_TTL_SEC", "60"))
+    # Where message stream events are fanned out: memory (one process) or postgres (all workers)
+    message_events_backend: str = os.getenv("MESSAGE_EVENTS_BACKEND", "memory").lower()
     cors_origins: List[str] = field(
         default_factory=lambda: _split_domains(
             os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000")
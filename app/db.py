@@ -1,42 +1,164 @@
 # Contributors:
 # Lucas Slater: DB initialization (1 hr)
 
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
+from pathlib import Path
 from typing import Optional
 
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .config import settings
+from .pool import (
+    TimedAsyncAdaptedQueuePool,
+    TimedQueuePool,
+    pool_args,
+    resolve_profile,
+    split_profile,
+)
+from .search.fts import ensure_search_indexes
+from .sqlite import RoutingSession, install_pragmas, sqlite_pragmas
 
 connect_args: Optional[dict] = (
     {"check_same_thread": False} if settings.database_url.startswith("sqlite") else None
 )
 
-# Configure connection pool for Supabase/PostgreSQL
-# Limit pool size to avoid hitting Supabase connection limits
-# Supabase free tier in Session mode allows only 1-2 connections
-pool_args = {}
-if not settings.database_url.startswith("sqlite"):
-    pool_args = {
-        "pool_size": 1,  # Maximum number of connections in the pool (Supabase free tier limit)
-        "max_overflow": 0,  # No overflow connections allowed
-        "pool_pre_ping": True,  # Verify connections before using them
-        "pool_recycle": 300,  # Recycle connections after 5 minutes
-        "pool_reset_on_return": "commit",  # Reset connection state on return
-    }
+# Backend name ("sqlite", "postgresql") picks the full-text search implementation
+database_dialect = make_url(settings.database_url).get_backend_name()
+
+# Connection pool profile (see app/pool.py); SQLite just gets the instrumented default pool
+is_sqlite = settings.database_url.startswith("sqlite")
+pool_profile = resolve_profile(
+    settings.db_pool_profile,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+)
+# The profile is one worker's budget, shared by both engines and the events LISTEN connection
+sync_pool_profile, async_pool_profile = (
+    split_profile(pool_profile, listener=settings.message_events_backend == "postgres")
+    if not is_sqlite
+    else (pool_profile, pool_profile)
+)
 
+# Sync engine: write endpoints, seed_data.py and Alembic
 engine = create_engine(
     settings.database_url,
     echo=False,
     connect_args=connect_args or {},
-    **pool_args
+    **({"poolclass": TimedQueuePool} if is_sqlite else pool_args(sync_pool_profile)),
+)
+
+
+def async_database_url(url: str) -> str:
+    """Map the configured sync URL onto its async driver (aiosqlite / asyncpg)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend in ("postgresql", "postgres"):
+        query = dict(parsed.query)
+        # asyncpg spells libpq's sslmode as ssl
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(
+            hide_password=False
+        )
+    return url
+
+
+# Async engine: hot read endpoints run on the event loop instead of the threadpool
+async_connect_args: dict = {}
+if not is_sqlite and pool_profile.external_pooler:
+    # Transaction-mode poolers can't keep asyncpg's per-connection prepared statements
+    async_connect_args = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    echo=False,
+    connect_args=async_connect_args,
+    **(
+        {"poolclass": TimedAsyncAdaptedQueuePool}
+        if is_sqlite
+        else pool_args(async_pool_profile, is_async=True)
+    ),
 )
 
 
+# Tuned SQLite: every connection gets the WAL pragmas, and writes are serialized
+# through a one-connection writer engine, sync and async (see app/sqlite.py)
+writer_engine: Optional[Engine] = None
+async_writer_engine: Optional[AsyncEngine] = None
+if is_sqlite and settings.sqlite_tuned:
+    pragmas = sqlite_pragmas(settings.sqlite_busy_timeout_ms)
+    install_pragmas(engine, pragmas)
+    install_pragmas(async_engine.sync_engine, pragmas)
+    writer_engine = create_engine(
+        settings.database_url,
+        echo=False,
+        connect_args=connect_args or {},
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    install_pragmas(writer_engine, pragmas)
+    async_writer_engine = create_async_engine(
+        async_database_url(settings.database_url),
+        echo=False,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    install_pragmas(async_writer_engine.sync_engine, pragmas)
+
+
 def init_db() -> None:
     SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        ensure_search_indexes(connection)
+
+
+def check_schema_version(db_engine: Optional[Engine] = None) -> None:
+    """Fail fast when the database isn't migrated to the latest Alembic revision."""
+    # Alembic is only needed in Alembic-only mode, so keep it out of the import path
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = Config(str(Path(__file__).resolve().parent.parent / "alembic.ini"))
+    expected = set(ScriptDirectory.from_config(config).get_heads())
+    with (db_engine or engine).connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected "
+            f"{sorted(expected)}; run `alembic upgrade head` before starting the app"
+        )
 
 
 def get_session() -> Generator[Session, None, None]:
+    if writer_engine is not None:
+        with RoutingSession(engine, writer_engine) as session:
+            yield session
+        return
     with Session(engine) as session:
         yield session
+
+
+def async_session() -> AsyncSession:
+    """A new AsyncSession on the async engine, for code that scopes its own session."""
+    if async_writer_engine is not None:
+        return AsyncSession(
+            async_engine,
+            sync_session_class=RoutingSession,
+            writer=async_writer_engine.sync_engine,
+            expire_on_commit=False,
+        )
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    async with async_session() as session:
+        yield session
@@ -3,15 +3,70 @@
 # Trey Fisher: Enhancements (.5 hr)
 
 import logging
-from typing import Dict, Optional
+import threading
+import time
+from typing import Dict, Optional, Tuple
 
-from fastapi import Cookie, Header, HTTPException, status
+from fastapi import Cookie, Depends, Header, HTTPException, status
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .auth.jwt import parse_jwt
 from .config import settings
-from .db import get_session
+from .db import async_session, get_async_session, get_session
 from .models import User
 
+# Short-lived identity cache: (sub, iat) -> (expires_at, detached User copy).
+# It is per process, so a profile change is visible to other workers after at
+# most settings.user_cache_ttl_sec seconds.
+_USER_CACHE_MAX_ENTRIES = 1024
+_user_cache: Dict[Tuple[str, int], Tuple[float, User]] = {}
+_user_cache_lock = threading.Lock()
+
+
+def _detached_copy(user: User) -> User:
+    """Copy a user out of its session so it can outlive the request that loaded it."""
+    return User(**user.model_dump())
+
+
+def _cache_get(key: Tuple[str, int], email: str) -> Optional[User]:
+    with _user_cache_lock:
+        entry = _user_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic() or user.email != email:
+            _user_cache.pop(key, None)
+            return None
+    return _detached_copy(user)
+
+
+def _cache_put(key: Tuple[str, int], user: User) -> None:
+    if settings.user_cache_ttl_sec <= 0:
+        return
+    now = time.monotonic()
+    with _user_cache_lock:
+        if len(_user_cache) >= _USER_CACHE_MAX_ENTRIES:
+            for stale_key in [k for k, (expires_at, _) in _user_cache.items() if expires_at < now]:
+                del _user_cache[stale_key]
+            while len(_user_cache) >= _USER_CACHE_MAX_ENTRIES:
+                del _user_cache[next(iter(_user_cache))]
+        _user_cache[key] = (now + settings.user_cache_ttl_sec, _detached_copy(user))
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Forget every cached identity for a user, e.g. after their profile changes."""
+    sub = str(user_id)
+    with _user_cache_lock:
+        for key in [k for k in _user_cache if k[0] == sub]:
+            del _user_cache[key]
+
+
+def clear_user_cache() -> None:
+    """Empty the identity cache."""
+    with _user_cache_lock:
+        _user_cache.clear()
+
 
 def _extract_bearer_token(authorization: Optional[str]) -> Optional[str]:
     if not authorization:
@@ -22,16 +77,18 @@ def _extract_bearer_token(authorization: Optional[str]) -> Optional[str]:
     return None
 
 
-def current_user(
-    session_cookie: Optional[str] = Cookie(default=None, alias=settings.cookie_name),
-    authorization: Optional[str] = Header(default=None, alias="Authorization"),
-) -> Dict:
+def _token_identity(
+    session_cookie: Optional[str], authorization: Optional[str]
+) -> Tuple[Tuple[str, int], int, str]:
+    """Validate the request's token; return (identity cache key, user id, email)."""
     # Temporary logging to debug auth issues
     logger = logging.getLogger(__name__)
-    logger.info(f"current_user called - Cookie present: {session_cookie is not None}, Auth header present: {authorization is not None}")
+    logger.info(
+        f"current_user called - Cookie present: {session_cookie is not None}, Auth header present: {authorization is not None}"
+    )
     if authorization:
         logger.info(f"Authorization header value: {authorization[:30]}...")
-    
+
     token = session_cookie or _extract_bearer_token(authorization)
     if not token:
         logger.warning("No token found - missing both cookie and authorization header")
@@ -51,12 +108,72 @@ def current_user(
             detail="Invalid token payload",
         )
 
-    from sqlmodel import select
+    return (str(user_id), int(payload.get("iat") or 0)), int(user_id), email
 
-    with next(get_session()) as session:  # get a session and close it immediately after
-        result = session.exec(select(User).where(User.id == int(user_id), User.email == email))
-        user = result.first()
+
+def _resolved_user(cache_key: Tuple[str, int], user: Optional[User]) -> User:
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    _cache_put(cache_key, user)
+    # Hand out a detached copy so a commit in the route handler cannot expire it
+    return _detached_copy(user)
+
+
+def current_user(
+    session_cookie: Optional[str] = Cookie(default=None, alias=settings.cookie_name),
+    authorization: Optional[str] = Header(default=None, alias="Authorization"),
+    session: Session = Depends(get_session),
+) -> User:
+    """Resolve the signed-in user from the session cookie or bearer token.
+
+    Uses the request-scoped session (the same one the route handler gets), and
+    serves repeat calls with the same token from the identity cache without
+    checking out a connection at all.
+    """
+    cache_key, user_id, email = _token_identity(session_cookie, authorization)
+    cached = _cache_get(cache_key, email)
+    if cached is not None:
+        return cached
+
+    user = session.exec(select(User).where(User.id == user_id, User.email == email)).first()
+    return _resolved_user(cache_key, user)
+
+
+async def current_user_async(
+    session_cookie: Optional[str] = Cookie(default=None, alias=settings.cookie_name),
+    authorization: Optional[str] = Header(default=None, alias="Authorization"),
+    session: AsyncSession = Depends(get_async_session),
+) -> User:
+    """current_user for async handlers, looked up on the request's async session.
+
+    Async routes depend on get_async_session themselves, so the lookup shares
+    their connection instead of checking out a second one from the sync pool.
+    """
+    cache_key, user_id, email = _token_identity(session_cookie, authorization)
+    cached = _cache_get(cache_key, email)
+    if cached is not None:
+        return cached
+
+    user = (await session.exec(select(User).where(User.id == user_id, User.email == email))).first()
+    return _resolved_user(cache_key, user)
+
+
+async def current_user_unpooled(
+    session_cookie: Optional[str] = Cookie(default=None, alias=settings.cookie_name),
+    authorization: Optional[str] = Header(default=None, alias="Authorization"),
+) -> User:
+    """current_user for long-lived responses such as the message stream.
+
+    Not a yield dependency: a cache miss is looked up on a session that is closed
+    before the handler runs, so an open stream keeps no pooled connection.
+    """
+    cache_key, user_id, email = _token_identity(session_cookie, authorization)
+    cached = _cache_get(cache_key, email)
+    if cached is not None:
+        return cached
 
-    return user  # type: ignore[return-value]
+    async with async_session() as session:
+        user = (
+            await session.exec(select(User).where(User.id == user_id, User.email == email))
+        ).first()
+    return _resolved_user(cache_key, user)
@@ -0,0 +1,150 @@
+"""Faceted filter counts shared by the program, place and trip list endpoints.
+
+``facets=country,city`` on a list endpoint adds per-value counts for those
+columns under the request's current filters, e.g. how many programs each
+country has once ``search=art`` is applied. Each facet is one
+``GROUP BY`` query over the filtered rows; a places ``near`` query instead
+tallies the rows inside its circle, which it has already loaded.
+
+Results are kept in a small per-process LRU keyed by entity, filters and
+facets. Every program, place or trip write invalidates its kind in the
+process that handled it, and entries expire after
+settings.facet_cache_ttl_sec seconds, which bounds how long counts can stay
+stale after a write handled by another worker.
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .config import settings
+from .models import Place, StudyAbroadProgram, Trip
+
+# kind -> {facet name: column}
+FACET_COLUMNS = {
+    "program": {
+        "country": StudyAbroadProgram.country,
+        "city": StudyAbroadProgram.city,
+        "housing_type": StudyAbroadProgram.housing_type,
+    },
+    "place": {"category": Place.category, "country": Place.country, "city": Place.city},
+    "trip": {"country": Trip.country, "trip_type": Trip.trip_type},
+}
+
+
+def parse_facets(kind: str, facets: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Split a comma-separated facets parameter, rejecting unknown names with a 400."""
+    if facets is None:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in facets.split(",") if name.strip()))
+    unknown = [name for name in names if name not in FACET_COLUMNS[kind]]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Unknown facet(s): {', '.join(unknown)}. "
+                f"Available: {', '.join(FACET_COLUMNS[kind])}"
+            ),
+        )
+    return names
+
+
+def tally_facets(kind: str, rows, names: Sequence[str]) -> Dict[str, List[dict]]:
+    """Per-value counts for each named facet over rows already loaded, like facet_counts."""
+    counts = {}
+    for name in names:
+        key = FACET_COLUMNS[kind][name].key
+        tally = Counter(getattr(row, key) for row in rows)
+        tally.pop(None, None)
+        ordered = sorted(tally.items(), key=lambda item: (-item[1], item[0]))
+        counts[name] = [{"value": value, "count": count} for value, count in ordered]
+    return counts
+
+
+class FacetCache:
+    """LRU of facet counts with a TTL, versioned per entity kind so writes invalidate it."""
+
+    def __init__(self, ttl_sec: int, maxsize: int = 256) -> None:
+        self.ttl_sec = ttl_sec
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, Tuple[float, Dict[str, List[dict]]]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+
+    def key(self, kind: str, filters: Dict[str, Any], names: Sequence[str]) -> tuple:
+        with self._lock:
+            version = self._versions.get(kind, 0)
+        return (kind, version, tuple(sorted(filters.items())), tuple(names))
+
+    def get(self, key: tuple) -> Optional[Dict[str, List[dict]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple, counts: Dict[str, List[dict]]) -> None:
+        if self.ttl_sec <= 0:
+            return
+        with self._lock:
+            if key[1] != self._versions.get(key[0], 0):
+                return  # a write landed while these were being counted
+            self._entries[key] = (time.monotonic() + self.ttl_sec, counts)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, kind: str) -> None:
+        """Drop every cached count for an entity kind (call after its rows change)."""
+        with self._lock:
+            self._versions[kind] = self._versions.get(kind, 0) + 1
+            for key in [key for key in self._entries if key[0] == kind]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+facet_cache = FacetCache(settings.facet_cache_ttl_sec)
+
+
+async def facet_counts(
+    session: AsyncSession,
+    kind: str,
+    query,
+    names: Sequence[str],
+    filters: Dict[str, Any],
+) -> Dict[str, List[dict]]:
+    """Per-value counts for each named facet over the rows the filtered query selects."""
+    key = facet_cache.key(kind, filters, names)
+    cached = facet_cache.get(key)
+    if cached is not None:
+        return cached
+
+    filtered = query.order_by(None).subquery()
+    counts = {}
+    for name in names:
+        column = filtered.c[FACET_COLUMNS[kind][name].key]
+        rows = (
+            await session.exec(
+                select(column, func.count())
+                .where(column.is_not(None))
+                .group_by(column)
+                .order_by(func.count().desc(), column)
+            )
+        ).all()
+        counts[name] = [{"value": value, "count": count} for value, count in rows]
+
+    facet_cache.put(key, counts)
+    return counts
@@ -0,0 +1,184 @@
+"""Geohash spatial index helpers for place map queries.
+
+Every place with coordinates stores a precision-9 geohash (a ~5 m cell) in an
+indexed column. Points that are close together share a geohash prefix, so a
+bounding box is covered by a handful of prefixes and each prefix is one range
+scan on the b-tree index:
+
+    geohash >= 'u09t' AND geohash < 'u09t{'
+
+The rows those ranges return are then checked against the exact box (or the
+exact radius, for ``near`` queries) in Python, and radius results are sorted
+by great-circle distance. This works the same way on SQLite and PostgreSQL
+without PostGIS.
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+# Most geohash prefixes a bounding box query will OR together
+MAX_COVER_CELLS = 32
+# Largest ``near`` radius; keeps the candidate box a bounded index scan
+MAX_RADIUS_KM = 500.0
+
+# (west, south, east, north) in degrees
+BBox = Tuple[float, float, float, float]
+
+
+def _cell_bits(precision: int) -> Tuple[int, int]:
+    """(longitude bits, latitude bits) in a geohash of the given length."""
+    bits = 5 * precision
+    return (bits + 1) // 2, bits // 2
+
+
+def _encode_cell(lng_index: int, lat_index: int, precision: int) -> str:
+    """Geohash of the cell at integer grid position (lng_index, lat_index)."""
+    lng_bits, lat_bits = _cell_bits(precision)
+    value = 0
+    for bit in range(5 * precision):
+        # Bits alternate longitude, latitude, starting with the most significant
+        if bit % 2 == 0:
+            lng_bits -= 1
+            value = (value << 1) | ((lng_index >> lng_bits) & 1)
+        else:
+            lat_bits -= 1
+            value = (value << 1) | ((lat_index >> lat_bits) & 1)
+    return "".join(BASE32[(value >> shift) & 31] for shift in range(5 * (precision - 1), -1, -5))
+
+
+def _grid_index(value: float, low: float, span: float, cells: int) -> int:
+    return min(max(int((value - low) / span * cells), 0), cells - 1)
+
+
+def encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Geohash of a point."""
+    lng_bits, lat_bits = _cell_bits(precision)
+    return _encode_cell(
+        _grid_index(longitude, -180.0, 360.0, 1 << lng_bits),
+        _grid_index(latitude, -90.0, 180.0, 1 << lat_bits),
+        precision,
+    )
+
+
+def place_geohash(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    """Geohash to store for a place, or None when it has no coordinates."""
+    if latitude is None or longitude is None:
+        return None
+    return encode(latitude, longitude)
+
+
+def cover(bbox: BBox) -> List[str]:
+    """The longest geohash prefixes that cover a box in at most MAX_COVER_CELLS cells."""
+    west, south, east, north = bbox
+    best: List[str] = [""]
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        lng_bits, lat_bits = _cell_bits(precision)
+        lng_cells, lat_cells = 1 << lng_bits, 1 << lat_bits
+        x0, x1 = (_grid_index(v, -180.0, 360.0, lng_cells) for v in (west, east))
+        y0, y1 = (_grid_index(v, -90.0, 180.0, lat_cells) for v in (south, north))
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_COVER_CELLS:
+            break
+        best = [_encode_cell(x, y, precision) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+    return best
+
+
+def split_antimeridian(bbox: BBox) -> List[BBox]:
+    """A box whose west edge is east of its east edge wraps the 180th meridian; split it."""
+    west, south, east, north = bbox
+    if west <= east:
+        return [bbox]
+    return [(west, south, 180.0, north), (-180.0, south, east, north)]
+
+
+def bbox_filter(geohash_column, latitude_column, longitude_column, bbox: BBox):
+    """WHERE clause: geohash prefix ranges (index scans) refined by the exact box."""
+    clauses = []
+    for west, south, east, north in split_antimeridian(bbox):
+        prefixes = [prefix for prefix in cover((west, south, east, north)) if prefix]
+        ranges = [
+            and_(geohash_column >= prefix, geohash_column < prefix + "{") for prefix in prefixes
+        ]
+        clauses.append(
+            and_(
+                or_(*ranges) if ranges else geohash_column.is_not(None),
+                latitude_column.between(south, north),
+                longitude_column.between(west, east),
+            )
+        )
+    return or_(*clauses)
+
+
+def distance_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle (haversine) distance between two points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> BBox:
+    """Smallest lat/lng box containing every point within radius_km of the center."""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = max(latitude - d_lat, -90.0), min(latitude + d_lat, 90.0)
+    if south == -90.0 or north == 90.0:
+        return (-180.0, south, 180.0, north)  # the circle covers a pole
+    ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))
+    d_lng = math.degrees(math.asin(min(1.0, ratio)))
+    if ratio >= 1.0:
+        return (-180.0, south, 180.0, north)
+    west = (longitude - d_lng + 540.0) % 360.0 - 180.0
+    east = (longitude + d_lng + 540.0) % 360.0 - 180.0
+    return (west, south, east, north)
+
+
+def by_distance(rows, latitude: float, longitude: float, radius_km: float) -> List[tuple]:
+    """(distance_km, row) for rows within radius_km of the center, nearest first."""
+    hits = []
+    for row in rows:
+        distance = distance_km(latitude, longitude, row.latitude, row.longitude)
+        if distance <= radius_km:
+            hits.append((distance, row))
+    hits.sort(key=lambda hit: (hit[0], hit[1].id))
+    return hits
+
+
+def _parse_floats(value: str, count: int, name: str) -> List[float]:
+    try:
+        numbers = [float(part) for part in value.split(",")]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count or not all(math.isfinite(n) for n in numbers):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{name} must be {count} comma-separated numbers",
+        )
+    return numbers
+
+
+def parse_bbox(value: str) -> BBox:
+    """Parse ``west,south,east,north`` (GeoJSON order), or raise a 400."""
+    west, south, east, north = _parse_floats(value, 4, "bbox")
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox must be west,south,east,north within -180..180 and -90..90",
+        )
+    return west, south, east, north
+
+
+def parse_point(value: str) -> Tuple[float, float]:
+    """Parse ``lat,lng``, or raise a 400."""
+    latitude, longitude = _parse_floats(value, 2, "near")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="near must be lat,lng within -90..90 and -180..180",
+        )
+    return latitude, longitude
@@ -2,21 +2,74 @@
 # Lucas Slater: Setup and app creation (.5 hr)
 # Trey Fisher: Enhancements and route inclusion (.5 hr)
 
+import logging
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlmodel import Session
 
+from . import IMPORT_STARTED
 from .ai.routes import router as ai_router
 from .auth.routes import router as auth_router
 from .bookmarks.routes import router as bookmarks_router
-from .db import init_db
+from .config import settings
+from .db import (
+    async_engine,
+    async_writer_engine,
+    check_schema_version,
+    engine,
+    init_db,
+    writer_engine,
+)
+from .messages.events import broker as message_broker
 from .messages.routes import router as messages_router
+from .nearby import place_tree
 from .places.routes import router as places_router
+from .pool import pool_status
 from .programs.routes import router as programs_router
+from .search.routes import router as search_router
+from .search.suggest import suggest_index
 from .trips.routes import router as trips_router
 
+logger = logging.getLogger(__name__)
+
+# Cold-start timings in milliseconds, reported by /health/startup
+startup_timings: dict = {}
+
+
+def prepare_database() -> None:
+    """Create missing tables in dev, or verify the Alembic revision in Alembic-only mode."""
+    if settings.skip_create_all:
+        check_schema_version()
+    else:
+        init_db()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    prepare_database()
+    startup_timings["database_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    started = time.perf_counter()
+    with Session(engine) as session:
+        suggest_index.rebuild(session)
+    startup_timings["suggest_index_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    started = time.perf_counter()
+    with Session(engine) as session:
+        place_tree.rebuild(session)
+    startup_timings["place_tree_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info("Startup timings (ms): %s", startup_timings)
+    await message_broker.start()
+    yield
+    await message_broker.stop()
+
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Abroadly API")
+    app = FastAPI(title="Abroadly API", lifespan=lifespan)
 
     # Add CORS middleware for frontend integration
     # Use wildcard for development to avoid CORS issues with error responses
@@ -34,15 +87,35 @@ def create_app() -> FastAPI:
     app.include_router(trips_router)
     app.include_router(bookmarks_router)
     app.include_router(messages_router)
+    app.include_router(search_router)
     app.include_router(ai_router)
 
     @app.get("/")
     def root() -> dict:
         return {"ok": True}
 
+    @app.get("/health/pool")
+    def health_pool() -> dict:
+        """Connection checkout wait times and pool utilization, for sizing workers."""
+        return {
+            "profile": settings.db_pool_profile,
+            "sync": pool_status(engine),
+            "async": pool_status(async_engine),
+            "writer": pool_status(writer_engine) if writer_engine is not None else None,
+            "async_writer": (
+                pool_status(async_writer_engine.sync_engine)
+                if async_writer_engine is not None
+                else None
+            ),
+        }
+
+    @app.get("/health/startup")
+    def health_startup() -> dict:
+        """How long the last cold start spent importing the app and preparing the database."""
+        return startup_timings
+
     return app
 
 
 app = create_app()
-# Ensure tables are created on import (dev convenience)
-init_db()
+startup_timings["import_ms"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
@@ -0,0 +1,127 @@
+"""Materialized conversation list for the messages page.
+
+Each pair of users who have exchanged messages has one ``conversation`` row
+holding the latest message (id, sender, subject and a short preview), when it
+was sent and how many messages each side hasn't read yet. The message routes
+keep it current in the same transaction as the message write:
+
+- sending upserts the pair's row and bumps the recipient's unread count
+- reading lowers the reader's count by the number of messages it marked
+- deleting lowers the count if the message was unread and, when it was the
+  latest, points the row at the message before it (or drops the row)
+
+so ``/messages/conversations`` reads this table in one indexed query instead
+of grouping a user's whole inbox and sent lists.
+"""
+
+from typing import Tuple
+
+from sqlalchemy import case, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from app.models import Conversation, Message
+
+# Characters of the latest message shown in the thread list
+PREVIEW_LENGTH = 140
+
+# INSERT ... ON CONFLICT constructs per backend, for the atomic upsert on send
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def conversation_pair(user_id: int, other_user_id: int) -> Tuple[int, int]:
+    """The pair's key as stored: lowest user id first."""
+    return min(user_id, other_user_id), max(user_id, other_user_id)
+
+
+def messages_between(user_id: int, other_user_id: int):
+    """Filter for the messages exchanged by two users, in either direction."""
+    return ((Message.sender_id == user_id) & (Message.recipient_id == other_user_id)) | (
+        (Message.sender_id == other_user_id) & (Message.recipient_id == user_id)
+    )
+
+
+def _pair_filter(user_id: int, other_user_id: int):
+    low, high = conversation_pair(user_id, other_user_id)
+    return (Conversation.user_low_id == low) & (Conversation.user_high_id == high)
+
+
+def _unread_column(user_id: int, other_user_id: int):
+    """The unread count column belonging to user_id in its conversation with other_user_id."""
+    if user_id < other_user_id:
+        return Conversation.low_unread_count
+    return Conversation.high_unread_count
+
+
+def message_preview(content: str) -> str:
+    """The start of a message on one line, cut to PREVIEW_LENGTH characters."""
+    text = " ".join(content.split())
+    if len(text) <= PREVIEW_LENGTH:
+        return text
+    return text[: PREVIEW_LENGTH - 1].rstrip() + "…"
+
+
+def _latest(message: Message) -> dict:
+    return {
+        "last_message_id": message.id,
+        "last_sender_id": message.sender_id,
+        "subject": message.subject,
+        "preview": message_preview(message.content),
+        "updated_at": message.created_at,
+    }
+
+
+def record_sent(db: Session, message: Message) -> None:
+    """Make a new (flushed) message the latest in its conversation, creating it if needed.
+
+    A single ``INSERT ... ON CONFLICT DO UPDATE``, so two first messages racing
+    between the same pair still end up in one row.
+    """
+    low, high = conversation_pair(message.sender_id, message.recipient_id)
+    unread = _unread_column(message.recipient_id, message.sender_id)
+    insert = UPSERT_INSERTS[db.get_bind().dialect.name]
+    db.exec(
+        insert(Conversation)
+        .values(user_low_id=low, user_high_id=high, **_latest(message), **{unread.key: 1})
+        .on_conflict_do_update(
+            index_elements=["user_low_id", "user_high_id"],
+            set_={**_latest(message), unread.key: unread + 1},
+        )
+    )
+
+
+def read_update(reader_id: int, other_user_id: int, count: int):
+    """UPDATE lowering the reader's unread count once it has read ``count`` messages."""
+    unread = _unread_column(reader_id, other_user_id)
+    return (
+        update(Conversation)
+        .where(_pair_filter(reader_id, other_user_id))
+        .values({unread: case((unread > count, unread - count), else_=0)})
+    )
+
+
+def record_deleted(db: Session, message: Message) -> None:
+    """Take a message out of its conversation; call before deleting it, in the same transaction."""
+    if not message.read:
+        db.exec(read_update(message.recipient_id, message.sender_id, 1))
+
+    conversation = db.exec(
+        select(Conversation).where(_pair_filter(message.sender_id, message.recipient_id))
+    ).first()
+    if conversation is None or conversation.last_message_id != message.id:
+        return
+
+    previous = db.exec(
+        select(Message)
+        .where(messages_between(message.sender_id, message.recipient_id), Message.id != message.id)
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(1)
+    ).first()
+    if previous is None:
+        db.delete(conversation)
+    else:
+        for key, value in _latest(previous).items():
+            setattr(conversation, key, value)
+        db.add(conversation)
+    # Written before the message delete so the row never points at a missing message
+    db.flush()
@@ -0,0 +1,251 @@
+"""Push channel for message events, streamed to clients over server-sent events.
+
+``/messages/stream`` keeps one response open per browser tab and writes an
+event whenever something happens to the user's messages:
+
+- ``message``: a message was sent to the user
+- ``read``: messages were read; sent both to the reader (so other tabs can
+  update their unread badge) and to each sender as a read receipt
+
+Routes call publish(); the broker fans events out to the user's open streams.
+The default broker only reaches streams served by the same process. With
+MESSAGE_EVENTS_BACKEND=postgres, events go through PostgreSQL LISTEN/NOTIFY so
+every worker delivers them. That needs a connection that keeps session state,
+so it doesn't work behind a transaction-mode pooler. When the LISTEN connection
+drops it is reopened with exponential backoff; events published meanwhile only
+reach this worker's streams, and once it is back every stream gets a ``resync``
+event so clients refetch what they may have missed.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Events a slow stream may fall behind by before the oldest are dropped
+STREAM_QUEUE_SIZE = 100
+NOTIFY_CHANNEL = "abroadly_message_events"
+# Backoff between attempts to reopen a lost LISTEN connection
+RECONNECT_MIN_SEC = 1.0
+RECONNECT_MAX_SEC = 30.0
+# Idle seconds between checks that the LISTEN connection is still alive
+LISTEN_HEALTH_CHECK_SEC = 30.0
+
+
+@dataclass(eq=False)
+class Subscription:
+    """One open stream: the queue its events arrive on and the loop that drains it."""
+
+    user_id: int
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(STREAM_QUEUE_SIZE))
+
+
+def _offer(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+    """Queue an event, dropping the oldest one if the stream has fallen behind."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+class MessageBroker:
+    """In-process fan-out of events to the streams open in this worker."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[subscription.user_id]
+
+    def connected(self, user_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(user_id, ()))
+
+    def deliver(self, user_id: int, event: Dict[str, Any]) -> None:
+        """Hand an event to this worker's streams for a user (safe from any thread)."""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(_offer, subscription.queue, event)
+            except RuntimeError:
+                self.unsubscribe(subscription)  # its event loop has shut down
+
+    def deliver_all(self, event: Dict[str, Any]) -> None:
+        """Hand an event to every stream open in this worker."""
+        with self._lock:
+            user_ids = list(self._subscribers)
+        for user_id in user_ids:
+            self.deliver(user_id, event)
+
+    def publish(self, user_id: int, event: Dict[str, Any]) -> None:
+        """Send an event to every stream a user has open."""
+        self.deliver(user_id, event)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class PostgresMessageBroker(MessageBroker):
+    """Shares events between workers with PostgreSQL LISTEN/NOTIFY."""
+
+    def __init__(self, database_url: str) -> None:
+        super().__init__()
+        self.dsn = (
+            make_url(database_url)
+            .set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        self._connection = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._send_lock: Optional[asyncio.Lock] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._send_lock = asyncio.Lock()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+
+    async def _listen(self) -> None:
+        """Hold the LISTEN connection, reopening it with exponential backoff when it drops."""
+        import asyncpg
+
+        delay = RECONNECT_MIN_SEC
+        reconnecting = False
+        while True:
+            lost = asyncio.Event()
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(NOTIFY_CHANNEL, self._on_notify)
+            except Exception as exc:
+                logger.warning("Can't listen for message events (%s); retrying in %ss", exc, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SEC)
+                continue
+
+            self._connection = connection
+            delay = RECONNECT_MIN_SEC
+            if reconnecting:
+                self.deliver_all({"type": "resync"})  # notifications may have been missed
+            try:
+                await self._watch(connection, lost)
+                logger.warning("Lost the message events connection; reconnecting")
+            finally:
+                self._connection = None
+                if not connection.is_closed():
+                    connection.terminate()
+            reconnecting = True
+
+    async def _watch(self, connection, lost: asyncio.Event) -> None:
+        """Return once the connection is closed or stops answering a health check."""
+        while not lost.is_set():
+            try:
+                await asyncio.wait_for(lost.wait(), LISTEN_HEALTH_CHECK_SEC)
+            except asyncio.TimeoutError:
+                try:
+                    async with self._send_lock:
+                        await asyncio.wait_for(connection.execute("SELECT 1"), 10)
+                except Exception:
+                    return
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        message = json.loads(payload)
+        self.deliver(message["user_id"], message["event"])
+
+    async def _notify(self, user_id: int, event: Dict[str, Any]) -> None:
+        payload = json.dumps({"user_id": user_id, "event": event}, default=str)
+        async with self._send_lock:
+            connection = self._connection
+            if connection is None:
+                self.deliver(user_id, event)  # dropped since publish(); stay local
+                return
+            try:
+                await connection.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, payload)
+            except Exception:
+                self.deliver(user_id, event)
+                raise
+
+    def publish(self, user_id: int, event: Dict[str, Any]) -> None:
+        if self._connection is None:
+            self.deliver(user_id, event)  # not started, or reconnecting; stay local
+            return
+        future = asyncio.run_coroutine_threadsafe(self._notify(user_id, event), self._loop)
+        future.add_done_callback(_log_failure)
+
+
+def _log_failure(future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Failed to publish message event: %s", future.exception())
+
+
+def _make_broker() -> MessageBroker:
+    if settings.message_events_backend == "postgres":
+        return PostgresMessageBroker(settings.database_url)
+    return MessageBroker()
+
+
+broker = _make_broker()
+
+
+def publish_message(message) -> None:
+    """Tell the recipient about a newly sent message."""
+    broker.publish(
+        message.recipient_id,
+        {
+            "type": "message",
+            "id": message.id,
+            "sender_id": message.sender_id,
+            "subject": message.subject,
+            "created_at": message.created_at.isoformat(),
+            "parent_message_id": message.parent_message_id,
+        },
+    )
+
+
+def publish_read(reader_id: int, read: Dict[int, List[int]]) -> None:
+    """Announce messages the reader just read, given as {sender_id: [message ids]}."""
+    message_ids = sorted(message_id for ids in read.values() for message_id in ids)
+    if not message_ids:
+        return
+    broker.publish(reader_id, {"type": "read", "reader_id": reader_id, "message_ids": message_ids})
+    for sender_id, ids in read.items():
+        broker.publish(
+            sender_id, {"type": "read", "reader_id": reader_id, "message_ids": sorted(ids)}
+        )
+
+
+def format_event(event: Dict[str, Any]) -> str:
+    """Encode an event as one server-sent events frame."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
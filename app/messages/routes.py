@@ -1,15 +1,31 @@
 # Contributors:
 # Cursor AI Assistant - Messaging feature implementation
 
-from typing import List, Optional
-
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, case, literal, or_, update
+from sqlalchemy.orm import aliased
 from sqlmodel import Session, select
-
-from app.db import get_session
-from app.deps import current_user
-from app.models import Message, Place, StudyAbroadProgram, Trip, User
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import async_session, get_async_session, get_session
+from app.deps import current_user, current_user_async, current_user_unpooled
+from app.messages.conversations import (
+    messages_between,
+    read_update,
+    record_deleted,
+    record_sent,
+)
+from app.messages.events import broker, format_event, publish_message, publish_read
+from app.messages.unread import adjust_unread, unread_count
+from app.models import Conversation, Message, Place, StudyAbroadProgram, Trip, User
+from app.pagination import fetch_page, page_body
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
@@ -19,6 +35,11 @@ def get_user_id(user=Depends(current_user)) -> int:
     return user.id
 
 
+async def get_async_user_id(user=Depends(current_user_async)) -> int:
+    """get_user_id for async handlers (resolved on the handler's async session)."""
+    return user.id
+
+
 # ===== PYDANTIC MODELS =====
 
 
@@ -32,6 +53,14 @@ class MessageCreate(BaseModel):
     parent_message_id: Optional[int] = None
 
 
+class MarkRead(BaseModel):
+    """Messages to mark as read: explicit ``ids``, or everything ``up_to`` a message."""
+
+    ids: Optional[List[int]] = Field(default=None, max_length=1000)
+    up_to: Optional[int] = None  # message id; it and every older message are marked
+    sender_id: Optional[int] = None  # with up_to: only messages from this user
+
+
 class MessageResponse(BaseModel):
     id: int
     sender_id: int
@@ -56,8 +85,8 @@ class MessageResponse(BaseModel):
 # ===== HELPER FUNCTIONS =====
 
 
-def get_user_display_name(user: User) -> str:
-    """Get a display name for a user."""
+def get_user_display_name(user) -> str:
+    """Get a display name for a user (anything with first_name, last_name and email)."""
     if user.first_name and user.last_name:
         return f"{user.first_name} {user.last_name}"
     elif user.first_name:
@@ -65,43 +94,186 @@ def get_user_display_name(user: User) -> str:
     return user.email.split("@")[0]
 
 
-def build_message_response(message: Message, db: Session) -> dict:
+async def _names_by_id(db: AsyncSession, id_column, name_column, ids: Set[int]) -> Dict[int, str]:
+    """Return {id: name} for the given ids in one ``IN`` query (none when ids is empty)."""
+    if not ids:
+        return {}
+    rows = (await db.exec(select(id_column, name_column).where(id_column.in_(ids)))).all()
+    return dict(rows)
+
+
+async def build_message_responses(messages: Sequence[Message], db: AsyncSession) -> List[dict]:
+    """Build full message responses for a page of messages.
+
+    Senders, recipients and related programs, places and trips are each loaded
+    with one ``IN`` query for the whole page, so rendering costs at most four
+    queries however many messages there are.
+    """
+    user_ids = {m.sender_id for m in messages} | {m.recipient_id for m in messages}
+    users = {}
+    if user_ids:
+        users = {u.id: u for u in (await db.exec(select(User).where(User.id.in_(user_ids)))).all()}
+
+    program_names = await _names_by_id(
+        db,
+        StudyAbroadProgram.id,
+        StudyAbroadProgram.program_name,
+        {m.related_program_id for m in messages if m.related_program_id},
+    )
+    place_names = await _names_by_id(
+        db, Place.id, Place.name, {m.related_place_id for m in messages if m.related_place_id}
+    )
+    trip_names = await _names_by_id(
+        db, Trip.id, Trip.destination, {m.related_trip_id for m in messages if m.related_trip_id}
+    )
+
+    responses = []
+    for message in messages:
+        sender = users.get(message.sender_id)
+        recipient = users.get(message.recipient_id)
+        response = {
+            "id": message.id,
+            "sender_id": message.sender_id,
+            "sender_name": get_user_display_name(sender) if sender else None,
+            "sender_email": sender.email if sender else "Unknown",
+            "recipient_id": message.recipient_id,
+            "recipient_name": get_user_display_name(recipient) if recipient else None,
+            "recipient_email": recipient.email if recipient else "Unknown",
+            "subject": message.subject,
+            "content": message.content,
+            "read": message.read,
+            "created_at": message.created_at.isoformat(),
+            "parent_message_id": message.parent_message_id,
+        }
+
+        # Add related context if present
+        if message.related_program_id:
+            response["related_program_id"] = message.related_program_id
+            response["related_program_name"] = program_names.get(message.related_program_id)
+
+        if message.related_place_id:
+            response["related_place_id"] = message.related_place_id
+            response["related_place_name"] = place_names.get(message.related_place_id)
+
+        if message.related_trip_id:
+            response["related_trip_id"] = message.related_trip_id
+            response["related_trip_name"] = trip_names.get(message.related_trip_id)
+
+        responses.append(response)
+
+    return responses
+
+
+def newer_than(query, since: Optional[datetime]):
+    """Restrict a message query to messages created after ``since`` (stored as naive UTC)."""
+    if since is None:
+        return query
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return query.where(Message.created_at > since)
+
+
+async def build_message_response(message: Message, db: AsyncSession) -> dict:
     """Build a full message response with user and context info."""
-    sender = db.get(User, message.sender_id)
-    recipient = db.get(User, message.recipient_id)
-
-    response = {
-        "id": message.id,
-        "sender_id": message.sender_id,
-        "sender_name": get_user_display_name(sender) if sender else None,
-        "sender_email": sender.email if sender else "Unknown",
-        "recipient_id": message.recipient_id,
-        "recipient_name": get_user_display_name(recipient) if recipient else None,
-        "recipient_email": recipient.email if recipient else "Unknown",
-        "subject": message.subject,
-        "content": message.content,
-        "read": message.read,
-        "created_at": message.created_at.isoformat(),
-        "parent_message_id": message.parent_message_id,
-    }
-
-    # Add related context if present
-    if message.related_program_id:
-        program = db.get(StudyAbroadProgram, message.related_program_id)
-        response["related_program_id"] = message.related_program_id
-        response["related_program_name"] = program.program_name if program else None
-
-    if message.related_place_id:
-        place = db.get(Place, message.related_place_id)
-        response["related_place_id"] = message.related_place_id
-        response["related_place_name"] = place.name if place else None
-
-    if message.related_trip_id:
-        trip = db.get(Trip, message.related_trip_id)
-        response["related_trip_id"] = message.related_trip_id
-        response["related_trip_name"] = trip.destination if trip else None
-
-    return response
+    return (await build_message_responses([message], db))[0]
+
+
+# Replies followed from a thread's root before the walk stops
+MAX_THREAD_DEPTH = 100
+
+
+async def thread_root_id(db: AsyncSession, message_id: int) -> int:
+    """The id of the message a reply chain starts from, found with one recursive query."""
+    chain = (
+        select(Message.id, Message.parent_message_id, literal(0).label("hops"))
+        .where(Message.id == message_id)
+        .cte("chain", recursive=True)
+    )
+    parent = aliased(Message)
+    chain = chain.union_all(
+        select(parent.id, parent.parent_message_id, chain.c.hops + 1)
+        .join(chain, parent.id == chain.c.parent_message_id)
+        .where(chain.c.hops < MAX_THREAD_DEPTH)
+    )
+    return (await db.exec(select(chain.c.id).order_by(chain.c.hops.desc()).limit(1))).one()
+
+
+async def thread_messages(db: AsyncSession, root_id: int, user_id: int) -> List[dict]:
+    """A reply tree in display order: depth-first, siblings oldest first.
+
+    The tree is fetched with one recursive query over the parent_message_id index, whose
+    depth bounds the recursion. Replies the user isn't part of are left out, and ``depth``
+    is counted in the tree that remains, so a reply under a hidden message starts at 0.
+    """
+    tree = (
+        select(Message.id, literal(0).label("depth"))
+        .where(Message.id == root_id)
+        .cte("tree", recursive=True)
+    )
+    reply = aliased(Message)
+    tree = tree.union_all(
+        select(reply.id, tree.c.depth + 1)
+        .join(tree, reply.parent_message_id == tree.c.id)
+        .where(tree.c.depth < MAX_THREAD_DEPTH)
+    )
+    messages = (
+        await db.exec(
+            select(Message)
+            .join(tree, Message.id == tree.c.id)
+            .where(or_(Message.sender_id == user_id, Message.recipient_id == user_id))
+        )
+    ).all()
+
+    visible = {message.id for message in messages}
+    replies: Dict[Optional[int], List[Message]] = defaultdict(list)
+    for message in messages:
+        # Replies under a hidden message hang from the top level
+        parent_id = message.parent_message_id if message.parent_message_id in visible else None
+        replies[parent_id].append(message)
+    for siblings in replies.values():
+        siblings.sort(key=lambda message: (message.created_at, message.id))
+
+    ordered: List[Message] = []
+    depths: Dict[int, int] = {}
+    stack = [(message, 0) for message in reversed(replies[None])]
+    while stack:
+        message, depth = stack.pop()
+        ordered.append(message)
+        depths[message.id] = depth
+        stack.extend((reply, depth + 1) for reply in reversed(replies[message.id]))
+
+    responses = await build_message_responses(ordered, db)
+    for message, response in zip(ordered, responses):
+        response["depth"] = depths[message.id]
+        response["reply_count"] = len(replies[message.id])
+    return responses
+
+
+async def mark_read(db: AsyncSession, user_id: int, *criteria) -> Dict[int, List[int]]:
+    """Mark the user's unread messages matching criteria as read and commit.
+
+    One set-based ``UPDATE ... RETURNING`` flips the messages, however many there are,
+    plus one conversation update per sender. Returns {sender_id: [message ids]} for the
+    rows this call changed, which also keeps the unread counter and events exact when
+    two requests mark the same messages.
+    """
+    rows = (
+        await db.exec(
+            update(Message)
+            .where(Message.recipient_id == user_id, Message.read.is_(False), *criteria)
+            .values(read=True)
+            .returning(Message.id, Message.sender_id)
+        )
+    ).all()
+    marked: Dict[int, List[int]] = defaultdict(list)
+    for message_id, sender_id in rows:
+        marked[sender_id].append(message_id)
+    for sender_id, message_ids in marked.items():
+        await db.exec(read_update(user_id, sender_id, len(message_ids)))
+    await db.commit()
+    adjust_unread(user_id, -len(rows))
+    publish_read(user_id, marked)
+    return marked
 
 
 # ===== API ROUTES =====
@@ -145,62 +317,230 @@ def send_message(
     )
 
     db.add(message)
+    db.flush()
+    record_sent(db, message)
     db.commit()
     db.refresh(message)
+    adjust_unread(message.recipient_id, 1)
+    publish_message(message)
 
     return {"message": "Message sent successfully", "message_id": message.id}
 
 
-@router.get("/inbox", response_model=List[dict])
-def get_inbox(
-    user_id: int = Depends(get_user_id),
-    db: Session = Depends(get_session),
+@router.get("/inbox")
+async def get_inbox(
+    user_id: int = Depends(get_async_user_id),
+    db: AsyncSession = Depends(get_async_session),
     unread_only: bool = False,
+    since: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
 ):
-    """Get all messages received by the current user."""
+    """Get messages received by the current user, newest first.
+
+    Pass ``cursor`` (empty for the first page) for keyset pagination by (created_at, id),
+    and ``since`` to only get messages newer than a previous sync.
+    """
     query = select(Message).where(Message.recipient_id == user_id)
     if unread_only:
         query = query.where(Message.read.is_(False))
-    query = query.order_by(Message.created_at.desc())
-
-    messages = db.exec(query).all()
-    return [build_message_response(msg, db) for msg in messages]
+    query = newer_than(query, since)
+
+    messages, next_cursor = await fetch_page(
+        db,
+        query,
+        Message.created_at,
+        Message.id,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
+        descending=True,
+    )
+    return page_body(await build_message_responses(messages, db), cursor, next_cursor)
 
 
-@router.get("/sent", response_model=List[dict])
-def get_sent_messages(
-    user_id: int = Depends(get_user_id),
-    db: Session = Depends(get_session),
+@router.get("/sent")
+async def get_sent_messages(
+    user_id: int = Depends(get_async_user_id),
+    db: AsyncSession = Depends(get_async_session),
+    since: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
 ):
-    """Get all messages sent by the current user."""
-    messages = db.exec(
-        select(Message).where(Message.sender_id == user_id).order_by(Message.created_at.desc())
-    ).all()
-    return [build_message_response(msg, db) for msg in messages]
+    """Get messages sent by the current user, newest first (paged like the inbox)."""
+    query = newer_than(select(Message).where(Message.sender_id == user_id), since)
+    messages, next_cursor = await fetch_page(
+        db,
+        query,
+        Message.created_at,
+        Message.id,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
+        descending=True,
+    )
+    return page_body(await build_message_responses(messages, db), cursor, next_cursor)
 
 
 @router.get("/unread-count")
-def get_unread_count(
-    user_id: int = Depends(get_user_id),
-    db: Session = Depends(get_session),
+async def get_unread_count(
+    user_id: int = Depends(get_async_user_id),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Get the count of unread messages (cached per user, see app/messages/unread.py)."""
+    return {"unread_count": await unread_count(db, user_id)}
+
+
+@router.get("/conversations")
+async def list_conversations(
+    user_id: int = Depends(get_async_user_id),
+    db: AsyncSession = Depends(get_async_session),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    """Get the current user's conversations, most recently active first.
+
+    One entry per person with the latest message preview and this user's unread count,
+    read from the conversation table (see app/messages/conversations.py) in one query.
+    Paged like the inbox.
+    """
+    is_low = Conversation.user_low_id == user_id
+    other_user_id = case((is_low, Conversation.user_high_id), else_=Conversation.user_low_id)
+    unread = case((is_low, Conversation.low_unread_count), else_=Conversation.high_unread_count)
+    query = (
+        select(
+            Conversation.id,
+            Conversation.updated_at,
+            other_user_id.label("other_user_id"),
+            unread.label("unread_count"),
+            Conversation.last_message_id,
+            Conversation.last_sender_id,
+            Conversation.subject,
+            Conversation.preview,
+            User.first_name,
+            User.last_name,
+            User.email,
+        )
+        .join(User, User.id == other_user_id)
+        .where(or_(is_low, Conversation.user_high_id == user_id))
+    )
+    rows, next_cursor = await fetch_page(
+        db,
+        query,
+        Conversation.updated_at,
+        Conversation.id,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
+        descending=True,
+    )
+    conversations = [
+        {
+            "id": row.id,
+            "other_user_id": row.other_user_id,
+            "other_user_name": get_user_display_name(row),
+            "other_user_email": row.email,
+            "last_message_id": row.last_message_id,
+            "last_sender_id": row.last_sender_id,
+            "subject": row.subject,
+            "preview": row.preview,
+            "unread_count": row.unread_count,
+            "updated_at": row.updated_at.isoformat(),
+        }
+        for row in rows
+    ]
+    return page_body(conversations, cursor, next_cursor)
+
+
+@router.put("/read")
+async def mark_many_as_read(
+    body: MarkRead,
+    user_id: int = Depends(get_async_user_id),
+    db: AsyncSession = Depends(get_async_session),
 ):
-    """Get the count of unread messages."""
-    count = len(
-        db.exec(
-            select(Message).where(Message.recipient_id == user_id, Message.read.is_(False))
-        ).all()
+    """Mark several messages as read in one write.
+
+    Pass ``ids``, or ``up_to`` (a message id) to mark it and every older message addressed
+    to you, optionally only those from ``sender_id``. Messages that aren't yours to read or
+    are already read are skipped.
+    """
+    if (body.ids is None) == (body.up_to is None):
+        raise HTTPException(status_code=400, detail="Pass either ids or up_to")
+
+    if body.ids is not None:
+        if not body.ids:
+            return {"message": "Messages marked as read", "message_ids": []}
+        criteria = [Message.id.in_(body.ids)]
+    else:
+        anchor = await db.get(Message, body.up_to)
+        if not anchor:
+            raise HTTPException(status_code=404, detail="Message not found")
+        if anchor.sender_id != user_id and anchor.recipient_id != user_id:
+            raise HTTPException(status_code=403, detail="Not authorized to view this message")
+        criteria = [
+            or_(
+                Message.created_at < anchor.created_at,
+                and_(Message.created_at == anchor.created_at, Message.id <= anchor.id),
+            )
+        ]
+    if body.sender_id is not None:
+        criteria.append(Message.sender_id == body.sender_id)
+
+    marked = await mark_read(db, user_id, *criteria)
+    message_ids = sorted(message_id for ids in marked.values() for message_id in ids)
+    return {"message": "Messages marked as read", "message_ids": message_ids}
+
+
+# Seconds between keep-alive comments on an idle event stream
+STREAM_KEEPALIVE_SEC = 15
+
+
+@router.get("/stream")
+async def stream_events(request: Request, user=Depends(current_user_unpooled)):
+    """Server-sent events for the current user's messages (see app/messages/events.py).
+
+    The stream opens with the current unread count, then pushes ``message`` and ``read``
+    events as they happen, so a connected client has no reason to poll. It holds no
+    database connection while open: auth and the opening count each use a short session.
+    """
+    user_id = user.id
+
+    async def events():
+        subscription = broker.subscribe(user_id)
+        try:
+            # Counted after subscribing, so no event can fall between the two
+            async with async_session() as db:
+                count = await unread_count(db, user_id)
+            initial = {"type": "unread_count", "unread_count": count}
+            yield "retry: 5000\n\n" + format_event(initial)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), STREAM_KEEPALIVE_SEC)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_event(event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return {"unread_count": count}
 
 
 @router.get("/{message_id}", response_model=dict)
-def get_message(
+async def get_message(
     message_id: int,
-    user_id: int = Depends(get_user_id),
-    db: Session = Depends(get_session),
+    user_id: int = Depends(get_async_user_id),
+    db: AsyncSession = Depends(get_async_session),
 ):
     """Get a specific message."""
-    message = db.get(Message, message_id)
+    message = await db.get(Message, message_id)
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
 
@@ -212,10 +552,34 @@ def get_message(
     if message.recipient_id == user_id and not message.read:
         message.read = True
         db.add(message)
-        db.commit()
-        db.refresh(message)
+        await db.exec(read_update(user_id, message.sender_id, 1))
+        await db.commit()
+        await db.refresh(message)
+        adjust_unread(user_id, -1)
+        publish_read(user_id, {message.sender_id: [message.id]})
 
-    return build_message_response(message, db)
+    return await build_message_response(message, db)
+
+
+@router.get("/{message_id}/thread")
+async def get_thread(
+    message_id: int,
+    user_id: int = Depends(get_async_user_id),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Get the whole reply thread a message belongs to.
+
+    Messages come depth-first from the root with replies oldest first, each with its
+    ``depth`` below the root and ``reply_count``, so a client can indent them as listed.
+    """
+    message = await db.get(Message, message_id)
+    if not message:
+        raise HTTPException(status_code=404, detail="Message not found")
+    if message.sender_id != user_id and message.recipient_id != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this message")
+
+    root_id = await thread_root_id(db, message_id)
+    return {"root_id": root_id, "messages": await thread_messages(db, root_id, user_id)}
 
 
 @router.put("/{message_id}/read")
@@ -232,9 +596,15 @@ def mark_as_read(
     if message.recipient_id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized to mark this message as read")
 
+    was_unread = not message.read
     message.read = True
     db.add(message)
+    if was_unread:
+        db.exec(read_update(user_id, message.sender_id, 1))
     db.commit()
+    if was_unread:
+        adjust_unread(user_id, -1)
+        publish_read(user_id, {message.sender_id: [message.id]})
 
     return {"message": "Message marked as read"}
 
@@ -253,33 +623,49 @@ def delete_message(
     if message.sender_id != user_id and message.recipient_id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this message")
 
+    was_unread = not message.read
+    recipient_id = message.recipient_id
+    record_deleted(db, message)
     db.delete(message)
     db.commit()
+    if was_unread:
+        adjust_unread(recipient_id, -1)
 
     return {"message": "Message deleted"}
 
 
-@router.get("/conversation/{other_user_id}", response_model=List[dict])
-def get_conversation(
+@router.get("/conversation/{other_user_id}")
+async def get_conversation(
     other_user_id: int,
-    user_id: int = Depends(get_user_id),
-    db: Session = Depends(get_session),
+    user_id: int = Depends(get_async_user_id),
+    db: AsyncSession = Depends(get_async_session),
+    since: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
 ):
-    """Get all messages between current user and another user."""
-    messages = db.exec(
+    """Get messages between current user and another user, oldest first.
+
+    Paged like the inbox; ``since`` returns only the messages added after a previous sync.
+    """
+    query = (
         select(Message)
-        .where(
-            ((Message.sender_id == user_id) & (Message.recipient_id == other_user_id))
-            | ((Message.sender_id == other_user_id) & (Message.recipient_id == user_id))
-        )
-        .order_by(Message.created_at.asc())
-    ).all()
+        .where(messages_between(user_id, other_user_id))
+        .order_by(Message.created_at.asc(), Message.id.asc())
+    )
+    messages, next_cursor = await fetch_page(
+        db,
+        newer_than(query, since),
+        Message.created_at,
+        Message.id,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
+    )
 
-    # Mark received messages as read
-    for msg in messages:
-        if msg.recipient_id == user_id and not msg.read:
-            msg.read = True
-            db.add(msg)
-    db.commit()
+    # Mark the page's received messages as read with one UPDATE
+    unread_ids = [msg.id for msg in messages if msg.recipient_id == user_id and not msg.read]
+    if unread_ids:
+        await mark_read(db, user_id, Message.sender_id == other_user_id, Message.id.in_(unread_ids))
 
-    return [build_message_response(msg, db) for msg in messages]
+    return page_body(await build_message_responses(messages, db), cursor, next_cursor)
@@ -0,0 +1,126 @@
+"""Per-user unread message counters for the navbar badge.
+
+The frontend polls ``/messages/unread-count``. The first poll for a user runs
+one ``COUNT(*)`` on the (recipient_id, read, created_at) index and caches the
+result; after that the message routes adjust the cached value as messages are
+sent, read and deleted, so polling doesn't touch the message table.
+
+Counts live in a pluggable backend. The default keeps them in process memory
+for at most settings.unread_count_ttl_sec seconds, which bounds how long a
+count adjusted by another worker can stay stale. A shared store (e.g. Redis)
+can be installed with configure_unread_backend.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import settings
+from app.models import Message
+
+
+class UnreadCounterBackend(ABC):
+    """Where cached unread counts are kept."""
+
+    @abstractmethod
+    def get(self, user_id: int) -> Optional[int]:
+        """The cached count, or None when it has to be recounted."""
+
+    @abstractmethod
+    def set(self, user_id: int, count: int) -> None:
+        """Cache a freshly counted value."""
+
+    @abstractmethod
+    def adjust(self, user_id: int, delta: int) -> None:
+        """Add delta to a cached count; users without one are left alone."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every cached count."""
+
+
+class MemoryUnreadCounter(UnreadCounterBackend):
+    """Process-local counts that expire after a TTL."""
+
+    def __init__(self, ttl_sec: int, max_entries: int = 10_000) -> None:
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counts: Dict[int, Tuple[float, int]] = {}
+
+    def get(self, user_id: int) -> Optional[int]:
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._counts[user_id]
+                return None
+            return entry[1]
+
+    def set(self, user_id: int, count: int) -> None:
+        if self.ttl_sec <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._counts) >= self.max_entries:
+                for stale in [k for k, (expires_at, _) in self._counts.items() if expires_at < now]:
+                    del self._counts[stale]
+                while len(self._counts) >= self.max_entries:
+                    del self._counts[next(iter(self._counts))]
+            self._counts[user_id] = (now + self.ttl_sec, count)
+
+    def adjust(self, user_id: int, delta: int) -> None:
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry is None:
+                return
+            expires_at, count = entry
+            if count + delta < 0:
+                del self._counts[user_id]  # out of step with the table; recount next time
+            else:
+                self._counts[user_id] = (expires_at, count + delta)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+_backend: UnreadCounterBackend = MemoryUnreadCounter(settings.unread_count_ttl_sec)
+
+
+def configure_unread_backend(backend: UnreadCounterBackend) -> None:
+    """Replace the counter store, e.g. with one shared by every worker."""
+    global _backend
+    _backend = backend
+
+
+def adjust_unread(user_id: int, delta: int) -> None:
+    """Record that a user gained (positive) or lost (negative) unread messages."""
+    if delta:
+        _backend.adjust(user_id, delta)
+
+
+def clear_unread_counts() -> None:
+    _backend.clear()
+
+
+async def unread_count(db: AsyncSession, user_id: int) -> int:
+    """A user's unread message count, from the cache when possible."""
+    count = _backend.get(user_id)
+    if count is not None:
+        return count
+    count = (
+        await db.exec(
+            select(func.count())
+            .select_from(Message)
+            .where(Message.recipient_id == user_id, Message.read.is_(False))
+        )
+    ).one()
+    _backend.set(user_id, count)
+    return count
@@ -9,6 +9,8 @@ import sqlalchemy as sa
 from sqlalchemy.types import JSON
 from sqlmodel import Column, Field, SQLModel
 
+from .geo import place_geohash
+
 # ===== USER =====
 
 
@@ -35,10 +37,25 @@ class User(SQLModel, table=True):
     onboarding_completed: bool = Field(default=False)  # Track if they've done onboarding
 
 
+# ===== RATING SUMMARY (Denormalized, maintained on review write) =====
+
+
+class RatingSummary(SQLModel):
+    """Persisted review count, rating sum and 1-5 star histogram for a reviewable entity."""
+
+    review_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_sum: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_1_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_2_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_3_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_4_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_5_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
+
 # ===== PROGRAM ECOSYSTEM (For Prospective Students) =====
 
 
-class StudyAbroadProgram(SQLModel, table=True):
+class StudyAbroadProgram(RatingSummary, table=True):
     __tablename__ = "study_abroad_program"
 
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -52,10 +69,15 @@ class StudyAbroadProgram(SQLModel, table=True):
     cost: Optional[float] = None
     housing_type: Optional[str] = None
     location: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     duration: Optional[str] = None
     description: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    # Keyset pagination walks (created_at, id)
+    __table_args__ = (sa.Index("ix_study_abroad_program_created_at_id", "created_at", "id"),)
+
 
 class ProgramReview(SQLModel, table=True):
     __tablename__ = "program_review"
@@ -67,6 +89,9 @@ class ProgramReview(SQLModel, table=True):
     review_text: str
     date: datetime = Field(default_factory=datetime.utcnow)
 
+    # Keyset pagination of a single entity's reviews walks (program_id, date, id)
+    __table_args__ = (sa.Index("ix_program_review_program_id_date_id", "program_id", "date", "id"),)
+
 
 class CourseReview(SQLModel, table=True):
     __tablename__ = "course_review"
@@ -80,6 +105,9 @@ class CourseReview(SQLModel, table=True):
     review_text: str
     date: datetime = Field(default_factory=datetime.utcnow)
 
+    # Keyset pagination of a single entity's reviews walks (program_id, date, id)
+    __table_args__ = (sa.Index("ix_course_review_program_id_date_id", "program_id", "date", "id"),)
+
 
 class ProgramHousingReview(SQLModel, table=True):
     __tablename__ = "program_housing_review"
@@ -92,11 +120,16 @@ class ProgramHousingReview(SQLModel, table=True):
     review_text: str
     date: datetime = Field(default_factory=datetime.utcnow)
 
+    # Keyset pagination of a single entity's reviews walks (program_id, date, id)
+    __table_args__ = (
+        sa.Index("ix_program_housing_review_program_id_date_id", "program_id", "date", "id"),
+    )
+
 
 # ===== PLACE ECOSYSTEM (For Current Students) =====
 
 
-class Place(SQLModel, table=True):
+class Place(RatingSummary, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: Optional[int] = Field(
         default=None, foreign_key="user.id", index=True
@@ -109,8 +142,20 @@ class Place(SQLModel, table=True):
     longitude: Optional[float] = None
     address: Optional[str] = None
     description: Optional[str] = None
+    # Geohash of (latitude, longitude) for bounding-box and radius lookups (see app/geo.py)
+    geohash: Optional[str] = Field(default=None, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    # Keyset pagination walks (created_at, id)
+    __table_args__ = (sa.Index("ix_place_created_at_id", "created_at", "id"),)
+
+
+@sa.event.listens_for(Place, "before_insert")
+@sa.event.listens_for(Place, "before_update")
+def _set_place_geohash(mapper, connection, place: Place) -> None:
+    """Keep the geohash in step with the coordinates on every write path."""
+    place.geohash = place_geohash(place.latitude, place.longitude)
+
 
 class PlaceReview(SQLModel, table=True):
     __tablename__ = "place_review"
@@ -122,11 +167,14 @@ class PlaceReview(SQLModel, table=True):
     review_text: str
     date: datetime = Field(default_factory=datetime.utcnow)
 
+    # Keyset pagination of a single entity's reviews walks (place_id, date, id)
+    __table_args__ = (sa.Index("ix_place_review_place_id_date_id", "place_id", "date", "id"),)
+
 
 # ===== TRIP ECOSYSTEM (For Trip Planning) =====
 
 
-class Trip(SQLModel, table=True):
+class Trip(RatingSummary, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: Optional[int] = Field(
         default=None, foreign_key="user.id", index=True
@@ -137,6 +185,9 @@ class Trip(SQLModel, table=True):
     trip_type: Optional[str] = None  # weekend, spring break, summer, etc.
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    # Keyset pagination walks (created_at, id)
+    __table_args__ = (sa.Index("ix_trip_created_at_id", "created_at", "id"),)
+
 
 class TripReview(SQLModel, table=True):
     __tablename__ = "trip_review"
@@ -148,6 +199,9 @@ class TripReview(SQLModel, table=True):
     review_text: str
     date: datetime = Field(default_factory=datetime.utcnow)
 
+    # Keyset pagination of a single entity's reviews walks (trip_id, date, id)
+    __table_args__ = (sa.Index("ix_trip_review_trip_id_date_id", "trip_id", "date", "id"),)
+
 
 # ===== BOOKMARKS (For Favorites/Saved Items) =====
 
@@ -205,5 +259,39 @@ class Message(SQLModel, table=True):
     related_place_id: Optional[int] = Field(default=None, foreign_key="place.id")
     related_trip_id: Optional[int] = Field(default=None, foreign_key="trip.id")
 
-    # For threaded replies
-    parent_message_id: Optional[int] = Field(default=None, foreign_key="message.id")
+    # For threaded replies (indexed so a thread's replies are found without a scan)
+    parent_message_id: Optional[int] = Field(default=None, foreign_key="message.id", index=True)
+
+    # Inbox (optionally unread only) and sent pages walk (created_at, id) per user
+    __table_args__ = (
+        sa.Index("ix_message_recipient_id_read_created_at", "recipient_id", "read", "created_at"),
+        sa.Index("ix_message_recipient_id_created_at_id", "recipient_id", "created_at", "id"),
+        sa.Index("ix_message_sender_id_created_at_id", "sender_id", "created_at", "id"),
+    )
+
+
+class Conversation(SQLModel, table=True):
+    """Thread list entry for a pair of users, kept current by the message routes.
+
+    The pair is stored lowest user id first, so each pair has exactly one row.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_low_id: int = Field(foreign_key="user.id")
+    user_high_id: int = Field(foreign_key="user.id")
+    last_message_id: Optional[int] = Field(default=None, foreign_key="message.id")
+    last_sender_id: Optional[int] = Field(default=None, foreign_key="user.id")
+    subject: str = ""
+    preview: str = ""
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    # Unread messages addressed to each participant
+    low_unread_count: int = 0
+    high_unread_count: int = 0
+
+    # Thread lists walk (updated_at, id) from either side of the pair
+    __table_args__ = (
+        sa.UniqueConstraint("user_low_id", "user_high_id"),
+        sa.Index("ix_conversation_user_low_id_updated_at", "user_low_id", "updated_at", "id"),
+        sa.Index("ix_conversation_user_high_id_updated_at", "user_high_id", "updated_at", "id"),
+    )
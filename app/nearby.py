@@ -0,0 +1,193 @@
+"""In-memory k-nearest-neighbour index over place coordinates.
+
+Places are stored as points on the unit sphere (x, y, z) in a KD-tree, so
+straight-line distance between points orders them exactly like great-circle
+distance and the antimeridian needs no special case. The tree lives in a flat
+array: each slice's median is its node, split on the axis with the widest
+spread.
+
+Writes don't rebuild the tree. New and moved places go to a small pending list
+that lookups scan directly, and removed or moved places are tombstoned so
+lookups skip their old entries. Once the pending changes reach a tenth of the
+tree the whole tree is rebuilt from the current positions.
+
+The index is built from the database at startup and kept current by the place
+create, update and delete routes. It is per process, so it is also rebuilt from
+the database once settings.place_tree_ttl_sec seconds pass, which bounds how
+long writes handled by another worker (or a seed script) stay invisible.
+"""
+
+import heapq
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select
+
+from .config import settings
+from .geo import EARTH_RADIUS_KM
+from .models import Place
+
+Point = Tuple[float, float, float]
+# Pending changes allowed before a rebuild is at least this many
+MIN_REBUILD_CHANGES = 64
+
+
+def to_point(latitude: float, longitude: float) -> Point:
+    """Unit-sphere coordinates of a latitude/longitude."""
+    phi, lam = math.radians(latitude), math.radians(longitude)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(chord: float) -> float:
+    """Great-circle distance for a straight-line distance between unit-sphere points."""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def _squared(a: Point, b: Point) -> float:
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+class PlaceTree:
+    """KD-tree of place positions with an incremental pending list and a rebuild TTL."""
+
+    def __init__(self, ttl_sec: int = 0) -> None:
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._expires_at = 0.0
+        self._positions: Dict[int, Point] = {}
+        self._nodes: List[Tuple[Point, int]] = []
+        self._axes: List[int] = []
+        self._pending: Dict[int, Point] = {}
+        self._stale: Set[int] = set()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._positions)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._positions = {}
+            self._build()
+
+    def rebuild(self, session: Session) -> None:
+        """Replace the index contents with the place coordinates currently in the database."""
+        rows = session.exec(
+            select(Place.id, Place.latitude, Place.longitude).where(
+                Place.latitude.is_not(None), Place.longitude.is_not(None)
+            )
+        ).all()
+        positions = {place_id: to_point(lat, lng) for place_id, lat, lng in rows}
+        with self._lock:
+            self._positions = positions
+            self._build()
+            self._expires_at = time.monotonic() + self.ttl_sec
+
+    def due(self) -> bool:
+        """Whether the TTL has run out. Claims the rebuild, so concurrent callers skip it."""
+        if self.ttl_sec <= 0:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self._expires_at > now:
+                return False
+            self._expires_at = now + self.ttl_sec
+            return True
+
+    def _build(self) -> None:
+        nodes = [(point, place_id) for place_id, point in self._positions.items()]
+        axes = [0] * len(nodes)
+
+        def split(lo: int, hi: int) -> None:
+            if hi - lo <= 0:
+                return
+            spreads = [
+                max(node[0][axis] for node in nodes[lo:hi])
+                - min(node[0][axis] for node in nodes[lo:hi])
+                for axis in range(3)
+            ]
+            axis = spreads.index(max(spreads))
+            nodes[lo:hi] = sorted(nodes[lo:hi], key=lambda node: node[0][axis])
+            mid = (lo + hi) // 2
+            axes[mid] = axis
+            split(lo, mid)
+            split(mid + 1, hi)
+
+        split(0, len(nodes))
+        self._nodes, self._axes = nodes, axes
+        self._pending, self._stale = {}, set()
+
+    def _changed(self) -> None:
+        changes = len(self._pending) + len(self._stale)
+        if changes >= max(MIN_REBUILD_CHANGES, len(self._nodes) // 10):
+            self._build()
+
+    def set(self, place_id: int, latitude: Optional[float], longitude: Optional[float]) -> None:
+        """Add or move a place (or remove it, when it no longer has coordinates)."""
+        if latitude is None or longitude is None:
+            self.remove(place_id)
+            return
+        with self._lock:
+            if place_id in self._positions and place_id not in self._pending:
+                self._stale.add(place_id)
+            self._positions[place_id] = self._pending[place_id] = to_point(latitude, longitude)
+            self._changed()
+
+    def remove(self, place_id: int) -> None:
+        with self._lock:
+            if self._positions.pop(place_id, None) is None:
+                return
+            if self._pending.pop(place_id, None) is None or place_id in self._stale:
+                self._stale.add(place_id)
+            self._changed()
+
+    def nearest(
+        self, latitude: float, longitude: float, k: int, max_km: Optional[float] = None
+    ) -> List[Tuple[float, int]]:
+        """(distance_km, place_id) for the k places nearest a point, nearest first."""
+        target = to_point(latitude, longitude)
+        limit = math.inf
+        if max_km is not None:
+            limit = (2 * math.sin(min(max_km / EARTH_RADIUS_KM, math.pi) / 2)) ** 2
+        # Max-heap of the best k as (-squared distance, -place id)
+        best: List[Tuple[float, int]] = []
+
+        def consider(point: Point, place_id: int) -> None:
+            distance = _squared(target, point)
+            if distance > limit:
+                return
+            entry = (-distance, -place_id)
+            if len(best) < k:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+
+        def bound() -> float:
+            return min(limit, -best[0][0] if len(best) == k else math.inf)
+
+        with self._lock:
+            nodes, axes, stale = self._nodes, self._axes, self._stale
+
+            def search(lo: int, hi: int) -> None:
+                if hi - lo <= 0:
+                    return
+                mid = (lo + hi) // 2
+                point, place_id = nodes[mid]
+                if place_id not in stale:
+                    consider(point, place_id)
+                gap = target[axes[mid]] - point[axes[mid]]
+                near, far = ((lo, mid), (mid + 1, hi)) if gap < 0 else ((mid + 1, hi), (lo, mid))
+                search(*near)
+                if gap * gap <= bound():
+                    search(*far)
+
+            search(0, len(nodes))
+            for place_id, point in self._pending.items():
+                consider(point, place_id)
+
+        hits = sorted((-distance, -negative_id) for distance, negative_id in best)
+        return [(chord_to_km(math.sqrt(distance)), place_id) for distance, place_id in hits]
+
+
+place_tree = PlaceTree(settings.place_tree_ttl_sec)
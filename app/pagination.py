@@ -0,0 +1,107 @@
+"""Keyset (cursor) pagination shared by the list and review endpoints.
+
+A cursor is an opaque, URL-safe token holding the sort key and id of the last
+row on the previous page. The next page is fetched with
+``WHERE (sort_key, id) > (:sort_key, :id) ORDER BY sort_key, id LIMIT n``,
+which walks the (sort_key, id) index instead of scanning and discarding
+``OFFSET`` rows, so page 1,000 costs the same as page 1 and concurrent inserts
+never shift rows between pages.
+
+Endpoints keep ``skip``/``limit`` for existing callers. Passing ``cursor``
+(an empty value requests the first page) switches the response to
+``{"items": [...], "next_cursor": "..."}``; ``next_cursor`` is null on the
+last page. Requesting ``facets`` uses the same envelope with a ``facets`` key.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Build an opaque cursor pointing just past the given row."""
+    if isinstance(sort_value, datetime):
+        sort_value = {"dt": sort_value.isoformat()}
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """Unpack a cursor made by encode_cursor, or raise a 400 for a malformed one."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["dt"])
+        if not isinstance(row_id, int):
+            raise ValueError("cursor id must be an integer")
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return sort_value, row_id
+
+
+async def fetch_page(
+    session: AsyncSession,
+    query,
+    sort_column,
+    id_column,
+    *,
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+    descending: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """Run a list query as either an offset page or a keyset page.
+
+    Returns (rows, next_cursor). Without a cursor this is the legacy
+    ``OFFSET skip LIMIT limit`` query and next_cursor is always None.
+    ``descending`` walks (sort_key, id) newest first instead.
+    """
+    order = (sort_column.desc(), id_column.desc()) if descending else (sort_column, id_column)
+    if cursor is None:
+        query = query.order_by(*order) if descending else query
+        return list((await session.exec(query.offset(skip).limit(limit))).all()), None
+
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        if descending:
+            query = query.where(
+                or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id))
+            )
+        else:
+            query = query.where(
+                or_(sort_column > sort_value, and_(sort_column == sort_value, id_column > row_id))
+            )
+
+    # Fetch one extra row to learn whether another page exists
+    rows = list((await session.exec(query.order_by(*order).limit(limit + 1))).all())
+    if len(rows) <= limit or limit <= 0:
+        return rows[:limit], None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+
+def page_body(
+    items: List[Any],
+    cursor: Optional[str],
+    next_cursor: Optional[str],
+    facets: Optional[Dict[str, Any]] = None,
+):
+    """Response body for a page: the bare list for plain skip/limit callers, else an envelope.
+
+    The envelope is used whenever a cursor or facets were requested.
+    """
+    if cursor is None and facets is None:
+        return items
+    body = {"items": items, "next_cursor": next_cursor}
+    if facets is not None:
+        body["facets"] = facets
+    return body
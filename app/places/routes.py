@@ -4,13 +4,30 @@
 
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..db import get_session
+from ..clusters import check_tile, cluster_cache, tile_clusters
+from ..db import database_dialect, get_async_session, get_session
 from ..deps import current_user
+from ..facets import FACET_COLUMNS, facet_cache, facet_counts, parse_facets, tally_facets
+from ..geo import (
+    MAX_RADIUS_KM,
+    bbox_filter,
+    by_distance,
+    parse_bbox,
+    parse_point,
+    radius_bbox,
+)
 from ..models import Place, PlaceReview, User
+from ..nearby import place_tree
+from ..pagination import fetch_page, page_body
+from ..ratings import average_rating, record_review
+from ..reviewers import serialize_reviews
+from ..search.fts import apply_search
+from ..search.suggest import entity_values, suggest_index
 
 router = APIRouter(prefix="/api/places", tags=["places"])
 
@@ -23,8 +40,8 @@ class PlaceCreate(BaseModel):
     category: str  # restaurant, activity, museum, housing, etc.
     city: str
     country: str
-    latitude: Optional[float] = None
-    longitude: Optional[float] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
     address: Optional[str] = None
     description: Optional[str] = None
 
@@ -34,17 +51,21 @@ class PlaceUpdate(BaseModel):
     category: Optional[str] = None
     city: Optional[str] = None
     country: Optional[str] = None
-    latitude: Optional[float] = None
-    longitude: Optional[float] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
     address: Optional[str] = None
     description: Optional[str] = None
 
 
 class PlaceReviewCreate(BaseModel):
-    rating: int
+    rating: int = Field(ge=1, le=5)
     review_text: str
 
 
+# Review columns returned by the review listings, next to the public reviewer profile
+PLACE_REVIEW_FIELDS = ("id", "user_id", "place_id", "rating", "review_text", "date")
+
+
 # ===== PLACE CRUD =====
 
 
@@ -59,20 +80,43 @@ def create_place(
     session.add(db_place)
     session.commit()
     session.refresh(db_place)
+    suggest_index.add(entity_values("place", db_place))
+    facet_cache.invalidate("place")
+    cluster_cache.invalidate_point(db_place.latitude, db_place.longitude)
+    place_tree.set(db_place.id, db_place.latitude, db_place.longitude)
     return db_place
 
 
 @router.get("/")
-def list_places(
+async def list_places(
     city: Optional[str] = None,
     country: Optional[str] = None,
     category: Optional[str] = None,
     search: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    session: Session = Depends(get_session),
+    cursor: Optional[str] = None,
+    facets: Optional[str] = None,
+    bbox: Optional[str] = None,
+    near: Optional[str] = None,
+    radius_km: float = Query(10.0, gt=0, le=MAX_RADIUS_KM),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    """List all places with optional filters and rating info."""
+    """List all places with optional filters and rating info.
+
+    Pass ``cursor`` (empty for the first page) for keyset pagination by (created_at, id),
+    and ``facets`` (comma-separated) for per-value counts under the current filters.
+    ``bbox=west,south,east,north`` keeps places inside a map viewport, and
+    ``near=lat,lng`` with ``radius_km`` (at most MAX_RADIUS_KM) returns places within
+    that radius, nearest first, and its facets count only places inside the circle.
+    """
+    facet_names = parse_facets("place", facets)
+    center = parse_point(near) if near else None
+    if center is not None and cursor is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="near results are ordered by distance and can't be combined with cursor",
+        )
     query = select(Place)
 
     if city:
@@ -82,19 +126,39 @@ def list_places(
     if category:
         query = query.where(Place.category == category)
     if search:
-        query = query.where(Place.name.ilike(f"%{search}%"))
+        ranked = cursor is None and center is None
+        query = apply_search(query, "place", search, database_dialect, ranked=ranked)
+    if bbox:
+        query = query.where(
+            bbox_filter(Place.geohash, Place.latitude, Place.longitude, parse_bbox(bbox))
+        )
 
-    query = query.offset(skip).limit(limit)
-    places = session.exec(query).all()
+    distances = {}
+    facet_body = None
+    if center is not None:
+        # Index scan over the circle's bounding box for just the columns the exact
+        # distance and facets need, then full rows for the page alone
+        box = radius_bbox(*center, radius_km)
+        query = query.where(bbox_filter(Place.geohash, Place.latitude, Place.longitude, box))
+        box_rows = query.subquery()
+        columns = ["id", "latitude", "longitude"] + [c.key for c in FACET_COLUMNS["place"].values()]
+        candidates = select(*(box_rows.c[name] for name in columns))
+        hits = by_distance((await session.exec(candidates)).all(), *center, radius_km)
+        if facet_names is not None:
+            facet_body = tally_facets("place", [row for _, row in hits], facet_names)
+        hits = hits[skip : skip + limit]
+        distances = {row.id: round(distance, 3) for distance, row in hits}
+        rows = (await session.exec(select(Place).where(Place.id.in_(distances)))).all()
+        by_id = {place.id: place for place in rows}
+        places, next_cursor = [by_id[row.id] for _, row in hits], None
+    else:
+        places, next_cursor = await fetch_page(
+            session, query, Place.created_at, Place.id, cursor=cursor, skip=skip, limit=limit
+        )
 
-    # Enrich places with average rating and review count
+    # Ratings come from the denormalized summary columns, no review reads needed
     enriched_places = []
     for place in places:
-        reviews = session.exec(select(PlaceReview).where(PlaceReview.place_id == place.id)).all()
-
-        review_count = len(reviews)
-        average_rating = sum(r.rating for r in reviews) / review_count if review_count > 0 else None
-
         enriched_places.append(
             {
                 "id": place.id,
@@ -107,18 +171,39 @@ def list_places(
                 "address": place.address,
                 "description": place.description,
                 "created_at": place.created_at,
-                "average_rating": round(average_rating, 1) if average_rating else None,
-                "review_count": review_count,
+                "average_rating": average_rating(place),
+                "review_count": place.review_count,
             }
         )
+        if center is not None:
+            enriched_places[-1]["distance_km"] = distances[place.id]
 
-    return enriched_places
+    if facet_names is not None and center is None:
+        filters = {
+            "city": city,
+            "country": country,
+            "category": category,
+            "search": search,
+            "bbox": bbox,
+        }
+        facet_body = await facet_counts(session, "place", query, facet_names, filters)
+
+    return page_body(enriched_places, cursor, next_cursor, facet_body)
+
+
+@router.get("/clusters/{zoom}/{x}/{y}")
+async def get_place_clusters(
+    zoom: int, x: int, y: int, session: AsyncSession = Depends(get_async_session)
+):
+    """Marker clusters for one Web Mercator map tile."""
+    check_tile(zoom, x, y)
+    return {"zoom": zoom, "x": x, "y": y, "clusters": await tile_clusters(session, zoom, x, y)}
 
 
 @router.get("/{place_id}")
-def get_place(place_id: int, session: Session = Depends(get_session)):
+async def get_place(place_id: int, session: AsyncSession = Depends(get_async_session)):
     """Get a specific place by ID."""
-    place = session.get(Place, place_id)
+    place = await session.get(Place, place_id)
     if not place:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Place not found")
     return place
@@ -136,6 +221,8 @@ def update_place(
     if not place:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Place not found")
 
+    previous_values = entity_values("place", place)
+    previous_position = (place.latitude, place.longitude)
     update_data = place_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(place, key, value)
@@ -143,6 +230,11 @@ def update_place(
     session.add(place)
     session.commit()
     session.refresh(place)
+    suggest_index.replace(previous_values, entity_values("place", place))
+    facet_cache.invalidate("place")
+    cluster_cache.invalidate_point(*previous_position)
+    cluster_cache.invalidate_point(place.latitude, place.longitude)
+    place_tree.set(place.id, place.latitude, place.longitude)
     return place
 
 
@@ -157,8 +249,14 @@ def delete_place(
     if not place:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Place not found")
 
+    values = entity_values("place", place)
+    position = (place.latitude, place.longitude)
     session.delete(place)
     session.commit()
+    suggest_index.remove(values)
+    facet_cache.invalidate("place")
+    cluster_cache.invalidate_point(*position)
+    place_tree.remove(place_id)
     return None
 
 
@@ -180,44 +278,26 @@ def create_place_review(
 
     db_review = PlaceReview(user_id=user.id, place_id=place_id, **review.model_dump())
     session.add(db_review)
+    record_review(session, Place, place_id, db_review.rating)
     session.commit()
     session.refresh(db_review)
     return db_review
 
 
 @router.get("/{place_id}/reviews")
-def list_place_reviews(
-    place_id: int, skip: int = 0, limit: int = 100, session: Session = Depends(get_session)
+async def list_place_reviews(
+    place_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
 ):
     """List all reviews for a specific place with reviewer info."""
-    query = select(PlaceReview).where(PlaceReview.place_id == place_id).offset(skip).limit(limit)
-    reviews = session.exec(query).all()
-
-    # Enrich reviews with user info
-    enriched_reviews = []
-    for review in reviews:
-        user = session.get(User, review.user_id)
-        enriched_reviews.append(
-            {
-                "id": review.id,
-                "user_id": review.user_id,
-                "place_id": review.place_id,
-                "rating": review.rating,
-                "review_text": review.review_text,
-                "date": review.date,
-                "reviewer": {
-                    "id": user.id if user else None,
-                    "first_name": user.first_name if user else None,
-                    "last_name": user.last_name if user else None,
-                    "institution": user.institution if user else None,
-                    "study_abroad_status": user.study_abroad_status if user else None,
-                    "program_name": user.program_name if user else None,
-                    "program_city": user.program_city if user else None,
-                    "program_country": user.program_country if user else None,
-                    "program_term": user.program_term if user else None,
-                }
-                if user
-                else None,
-            }
-        )
-    return enriched_reviews
+    query = select(PlaceReview).where(PlaceReview.place_id == place_id)
+    reviews, next_cursor = await fetch_page(
+        session, query, PlaceReview.date, PlaceReview.id, cursor=cursor, skip=skip, limit=limit
+    )
+
+    # Enrich reviews with the public reviewer profile (one query for the whole page)
+    enriched_reviews = await serialize_reviews(session, reviews, PLACE_REVIEW_FIELDS)
+    return page_body(enriched_reviews, cursor, next_cursor)
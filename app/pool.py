@@ -0,0 +1,225 @@
+"""Connection pool profiles and checkout instrumentation.
+
+The right pool depends on what sits between the API and PostgreSQL:
+
+* ``supabase-session`` - Supabase's session-mode pooler holds one server
+  connection per client connection, and the free tier allows only a couple,
+  so each worker keeps two pinned connections: one for the sync engine and
+  one for the async engine.
+* ``pgbouncer-transaction`` - a transaction-mode pooler (PgBouncer, Supavisor
+  on port 6543) already multiplexes connections, so the app keeps none of its
+  own (``NullPool``) and lets the pooler do the queueing.
+* ``dedicated`` - a database we own the connection budget for; a real pool
+  with overflow so concurrent requests don't queue behind each other.
+
+A profile's ``pool_size`` + ``max_overflow`` is the whole connection budget of
+one worker. split_profile divides it between the sync and async engines,
+after setting aside the LISTEN connection used when message events go through
+PostgreSQL, so a worker never holds more than the profile allows.
+
+Every engine's pool records how long checkouts wait and how many connections
+are in use, which ``/health/pool`` reports so workers can be sized from data.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+
+@dataclass(frozen=True)
+class PoolProfile:
+    pool_size: int = 5
+    max_overflow: int = 10
+    # Seconds a request waits for a free connection before failing
+    pool_timeout: int = 30
+    pool_pre_ping: bool = True
+    # Seconds before a pooled connection is replaced (-1 keeps it forever)
+    pool_recycle: int = -1
+    # An external pooler owns the connections, so the app holds none (NullPool)
+    external_pooler: bool = False
+
+
+POOL_PROFILES: Dict[str, PoolProfile] = {
+    "supabase-session": PoolProfile(pool_size=2, max_overflow=0, pool_recycle=300),
+    "pgbouncer-transaction": PoolProfile(external_pooler=True),
+    "dedicated": PoolProfile(pool_size=10, max_overflow=10, pool_timeout=10, pool_recycle=1800),
+}
+
+
+def resolve_profile(
+    name: str,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+    pool_timeout: Optional[int] = None,
+) -> PoolProfile:
+    """Look up a named profile and apply any explicit size/overflow/timeout overrides."""
+    try:
+        profile = POOL_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown DB_POOL_PROFILE {name!r}; expected one of {', '.join(POOL_PROFILES)}"
+        )
+    overrides = {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+    }
+    return replace(profile, **{key: value for key, value in overrides.items() if value is not None})
+
+
+def split_profile(
+    profile: PoolProfile, *, listener: bool = False
+) -> Tuple[PoolProfile, PoolProfile]:
+    """(sync, async) profiles sharing one worker's connection budget.
+
+    With ``listener`` one pooled connection is set aside for the message events LISTEN
+    connection. Each engine needs at least one connection of its own; the async engine,
+    which serves the hot reads, gets the odd one out. External pooler profiles hold no
+    connections, so they're returned unchanged.
+    """
+    if profile.external_pooler:
+        return profile, profile
+    pool_size = profile.pool_size - (1 if listener else 0)
+    if pool_size < 2:
+        needed = 2 + (1 if listener else 0)
+        raise ValueError(
+            f"DB_POOL_SIZE must be at least {needed} per worker: one connection each for the "
+            "sync and async engines"
+            + (" plus one for MESSAGE_EVENTS_BACKEND=postgres" if listener else "")
+        )
+    sync_size, sync_overflow = pool_size // 2, profile.max_overflow // 2
+    return (
+        replace(profile, pool_size=sync_size, max_overflow=sync_overflow),
+        replace(
+            profile,
+            pool_size=pool_size - sync_size,
+            max_overflow=profile.max_overflow - sync_overflow,
+        ),
+    )
+
+
+class PoolStats:
+    """Thread-safe checkout counters for one engine's pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_checkout(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_timeout(self, wait: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "avg_wait_ms": round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class _TimedPoolMixin:
+    """Times each connection checkout and tracks how many connections are out."""
+
+    stats: PoolStats
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout(time.perf_counter() - start)
+            raise
+        self.stats.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def _do_return_conn(self, record) -> None:
+        self.stats.record_checkin()
+        super()._do_return_conn(record)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(_TimedPoolMixin, NullPool):
+    pass
+
+
+def pool_args(profile: PoolProfile, *, is_async: bool = False) -> Dict[str, Any]:
+    """create_engine / create_async_engine keyword arguments for a profile."""
+    if profile.external_pooler:
+        return {"poolclass": TimedNullPool, "pool_pre_ping": profile.pool_pre_ping}
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        "pool_size": profile.pool_size,
+        "max_overflow": profile.max_overflow,
+        "pool_timeout": profile.pool_timeout,
+        "pool_pre_ping": profile.pool_pre_ping,
+        "pool_recycle": profile.pool_recycle,
+        "pool_reset_on_return": "commit",
+    }
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """Checkout wait times and utilization for an engine's pool."""
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    if isinstance(pool, QueuePool):
+        # max_overflow=-1 means unbounded, so there is no utilization ceiling
+        capacity = pool.size() + pool._max_overflow if pool._max_overflow >= 0 else 0
+        status.update(
+            {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "idle": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "utilization": round(pool.checkedout() / capacity, 3) if capacity else None,
+            }
+        )
+    return status
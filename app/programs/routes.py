@@ -4,19 +4,28 @@
 
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..db import get_session
+from ..db import database_dialect, get_async_session, get_session
 from ..deps import current_user
+from ..facets import facet_cache, facet_counts, parse_facets
 from ..models import (
     CourseReview,
+    Place,
     ProgramHousingReview,
     ProgramReview,
     StudyAbroadProgram,
     User,
 )
+from ..nearby import place_tree
+from ..pagination import fetch_page, page_body
+from ..ratings import average_rating, record_review
+from ..reviewers import serialize_reviews
+from ..search.fts import apply_search
+from ..search.suggest import entity_values, suggest_index
 
 router = APIRouter(prefix="/api/programs", tags=["programs"])
 
@@ -32,6 +41,8 @@ class ProgramCreate(BaseModel):
     cost: Optional[float] = None
     housing_type: Optional[str] = None
     location: Optional[str] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
     duration: Optional[str] = None
     description: Optional[str] = None
 
@@ -44,12 +55,14 @@ class ProgramUpdate(BaseModel):
     cost: Optional[float] = None
     housing_type: Optional[str] = None
     location: Optional[str] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
     duration: Optional[str] = None
     description: Optional[str] = None
 
 
 class ProgramReviewCreate(BaseModel):
-    rating: int
+    rating: int = Field(ge=1, le=5)
     review_text: str
 
 
@@ -66,6 +79,29 @@ class ProgramHousingReviewCreate(BaseModel):
     review_text: str
 
 
+# Review columns returned by the review listings, next to the public reviewer profile
+PROGRAM_REVIEW_FIELDS = ("id", "user_id", "program_id", "rating", "review_text", "date")
+COURSE_REVIEW_FIELDS = (
+    "id",
+    "user_id",
+    "program_id",
+    "course_name",
+    "instructor_name",
+    "rating",
+    "review_text",
+    "date",
+)
+HOUSING_REVIEW_FIELDS = (
+    "id",
+    "user_id",
+    "program_id",
+    "housing_description",
+    "rating",
+    "review_text",
+    "date",
+)
+
+
 # ===== PROGRAM CRUD =====
 
 
@@ -80,19 +116,28 @@ def create_program(
     session.add(db_program)
     session.commit()
     session.refresh(db_program)
+    suggest_index.add(entity_values("program", db_program))
+    facet_cache.invalidate("program")
     return db_program
 
 
 @router.get("/")
-def list_programs(
+async def list_programs(
     city: Optional[str] = None,
     country: Optional[str] = None,
     search: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    session: Session = Depends(get_session),
+    cursor: Optional[str] = None,
+    facets: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
 ):
-    """List all study abroad programs with optional filters and rating info."""
+    """List all study abroad programs with optional filters and rating info.
+
+    Pass ``cursor`` (empty for the first page) for keyset pagination by (created_at, id),
+    and ``facets`` (comma-separated) for per-value counts under the current filters.
+    """
+    facet_names = parse_facets("program", facets)
     query = select(StudyAbroadProgram)
 
     if city:
@@ -100,22 +145,21 @@ def list_programs(
     if country:
         query = query.where(StudyAbroadProgram.country == country)
     if search:
-        query = query.where(StudyAbroadProgram.program_name.ilike(f"%{search}%"))
-
-    query = query.offset(skip).limit(limit)
-    programs = session.exec(query).all()
+        query = apply_search(query, "program", search, database_dialect, ranked=cursor is None)
+
+    programs, next_cursor = await fetch_page(
+        session,
+        query,
+        StudyAbroadProgram.created_at,
+        StudyAbroadProgram.id,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
+    )
 
-    # Enrich programs with average rating and review count
+    # Ratings come from the denormalized summary columns, no review reads needed
     enriched_programs = []
     for program in programs:
-        # Get all reviews for this program
-        reviews = session.exec(
-            select(ProgramReview).where(ProgramReview.program_id == program.id)
-        ).all()
-
-        review_count = len(reviews)
-        average_rating = sum(r.rating for r in reviews) / review_count if review_count > 0 else None
-
         enriched_programs.append(
             {
                 "id": program.id,
@@ -126,26 +170,80 @@ def list_programs(
                 "cost": program.cost,
                 "housing_type": program.housing_type,
                 "location": program.location,
+                "latitude": program.latitude,
+                "longitude": program.longitude,
                 "duration": program.duration,
                 "description": program.description,
                 "created_at": program.created_at,
-                "average_rating": round(average_rating, 1) if average_rating else None,
-                "review_count": review_count,
+                "average_rating": average_rating(program),
+                "review_count": program.review_count,
             }
         )
 
-    return enriched_programs
+    facet_body = None
+    if facet_names is not None:
+        filters = {"city": city, "country": country, "search": search}
+        facet_body = await facet_counts(session, "program", query, facet_names, filters)
+
+    return page_body(enriched_programs, cursor, next_cursor, facet_body)
 
 
 @router.get("/{program_id}")
-def get_program(program_id: int, session: Session = Depends(get_session)):
+async def get_program(program_id: int, session: AsyncSession = Depends(get_async_session)):
     """Get a specific study abroad program by ID."""
-    program = session.get(StudyAbroadProgram, program_id)
+    program = await session.get(StudyAbroadProgram, program_id)
     if not program:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Program not found")
     return program
 
 
+@router.get("/{program_id}/nearby-places")
+async def list_nearby_places(
+    program_id: int,
+    k: int = Query(10, ge=1, le=50),
+    max_km: Optional[float] = Query(None, gt=0),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """The k places nearest a program, nearest first, with their rating info.
+
+    Empty when the program has no coordinates. ``max_km`` caps the distance.
+    """
+    program = await session.get(StudyAbroadProgram, program_id)
+    if not program:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Program not found")
+    if program.latitude is None or program.longitude is None:
+        return []
+
+    if place_tree.due():
+        # Picks up places written by other workers since the last rebuild
+        await session.run_sync(place_tree.rebuild)
+    hits = place_tree.nearest(program.latitude, program.longitude, k, max_km)
+    if not hits:
+        return []
+    # One query for the whole page; the tree only holds ids and positions
+    place_ids = [place_id for _, place_id in hits]
+    rows = (await session.exec(select(Place).where(Place.id.in_(place_ids)))).all()
+    places = {place.id: place for place in rows}
+
+    return [
+        {
+            "id": place.id,
+            "name": place.name,
+            "category": place.category,
+            "city": place.city,
+            "country": place.country,
+            "latitude": place.latitude,
+            "longitude": place.longitude,
+            "address": place.address,
+            "average_rating": average_rating(place),
+            "review_count": place.review_count,
+            "distance_km": round(distance, 3),
+        }
+        for distance, place_id in hits
+        if (place := places.get(place_id)) is not None
+    ]
+
+
 @router.put("/{program_id}")
 def update_program(
     program_id: int,
@@ -158,6 +256,7 @@ def update_program(
     if not program:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Program not found")
 
+    previous_values = entity_values("program", program)
     update_data = program_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(program, key, value)
@@ -165,6 +264,8 @@ def update_program(
     session.add(program)
     session.commit()
     session.refresh(program)
+    suggest_index.replace(previous_values, entity_values("program", program))
+    facet_cache.invalidate("program")
     return program
 
 
@@ -179,8 +280,11 @@ def delete_program(
     if not program:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Program not found")
 
+    values = entity_values("program", program)
     session.delete(program)
     session.commit()
+    suggest_index.remove(values)
+    facet_cache.invalidate("program")
     return None
 
 
@@ -202,53 +306,29 @@ def create_program_review(
 
     db_review = ProgramReview(user_id=user.id, program_id=program_id, **review.model_dump())
     session.add(db_review)
+    record_review(session, StudyAbroadProgram, program_id, db_review.rating)
     session.commit()
     session.refresh(db_review)
     return db_review
 
 
 @router.get("/{program_id}/reviews")
-def list_program_reviews(
-    program_id: int, skip: int = 0, limit: int = 100, session: Session = Depends(get_session)
+async def list_program_reviews(
+    program_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
 ):
     """List all reviews for a specific program with reviewer info."""
-    query = (
-        select(ProgramReview)
-        .where(ProgramReview.program_id == program_id)
-        .offset(skip)
-        .limit(limit)
+    query = select(ProgramReview).where(ProgramReview.program_id == program_id)
+    reviews, next_cursor = await fetch_page(
+        session, query, ProgramReview.date, ProgramReview.id, cursor=cursor, skip=skip, limit=limit
     )
-    reviews = session.exec(query).all()
 
-    # Enrich reviews with user info
-    enriched_reviews = []
-    for review in reviews:
-        user = session.get(User, review.user_id)
-        enriched_reviews.append(
-            {
-                "id": review.id,
-                "user_id": review.user_id,
-                "program_id": review.program_id,
-                "rating": review.rating,
-                "review_text": review.review_text,
-                "date": review.date,
-                # User info for enhanced display
-                "reviewer": {
-                    "id": user.id if user else None,
-                    "first_name": user.first_name if user else None,
-                    "last_name": user.last_name if user else None,
-                    "institution": user.institution if user else None,
-                    "study_abroad_status": user.study_abroad_status if user else None,
-                    "program_name": user.program_name if user else None,
-                    "program_city": user.program_city if user else None,
-                    "program_country": user.program_country if user else None,
-                    "program_term": user.program_term if user else None,
-                }
-                if user
-                else None,
-            }
-        )
-    return enriched_reviews
+    # Enrich reviews with the public reviewer profile (one query for the whole page)
+    enriched_reviews = await serialize_reviews(session, reviews, PROGRAM_REVIEW_FIELDS)
+    return page_body(enriched_reviews, cursor, next_cursor)
 
 
 # ===== COURSE REVIEWS =====
@@ -275,45 +355,22 @@ def create_course_review(
 
 
 @router.get("/{program_id}/courses/reviews")
-def list_course_reviews(
-    program_id: int, skip: int = 0, limit: int = 100, session: Session = Depends(get_session)
+async def list_course_reviews(
+    program_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
 ):
     """List all course reviews for a specific program with reviewer info."""
-    query = (
-        select(CourseReview).where(CourseReview.program_id == program_id).offset(skip).limit(limit)
+    query = select(CourseReview).where(CourseReview.program_id == program_id)
+    reviews, next_cursor = await fetch_page(
+        session, query, CourseReview.date, CourseReview.id, cursor=cursor, skip=skip, limit=limit
     )
-    reviews = session.exec(query).all()
 
-    # Enrich reviews with user info
-    enriched_reviews = []
-    for review in reviews:
-        user = session.get(User, review.user_id)
-        enriched_reviews.append(
-            {
-                "id": review.id,
-                "user_id": review.user_id,
-                "program_id": review.program_id,
-                "course_name": review.course_name,
-                "instructor_name": review.instructor_name,
-                "rating": review.rating,
-                "review_text": review.review_text,
-                "date": review.date,
-                "reviewer": {
-                    "id": user.id if user else None,
-                    "first_name": user.first_name if user else None,
-                    "last_name": user.last_name if user else None,
-                    "institution": user.institution if user else None,
-                    "study_abroad_status": user.study_abroad_status if user else None,
-                    "program_name": user.program_name if user else None,
-                    "program_city": user.program_city if user else None,
-                    "program_country": user.program_country if user else None,
-                    "program_term": user.program_term if user else None,
-                }
-                if user
-                else None,
-            }
-        )
-    return enriched_reviews
+    # Enrich reviews with the public reviewer profile (one query for the whole page)
+    enriched_reviews = await serialize_reviews(session, reviews, COURSE_REVIEW_FIELDS)
+    return page_body(enriched_reviews, cursor, next_cursor)
 
 
 # ===== HOUSING REVIEWS =====
@@ -340,44 +397,25 @@ def create_housing_review(
 
 
 @router.get("/{program_id}/housing/reviews")
-def list_housing_reviews(
-    program_id: int, skip: int = 0, limit: int = 100, session: Session = Depends(get_session)
+async def list_housing_reviews(
+    program_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
 ):
     """List all housing reviews for a specific program with reviewer info."""
-    query = (
-        select(ProgramHousingReview)
-        .where(ProgramHousingReview.program_id == program_id)
-        .offset(skip)
-        .limit(limit)
+    query = select(ProgramHousingReview).where(ProgramHousingReview.program_id == program_id)
+    reviews, next_cursor = await fetch_page(
+        session,
+        query,
+        ProgramHousingReview.date,
+        ProgramHousingReview.id,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
     )
-    reviews = session.exec(query).all()
 
-    # Enrich reviews with user info
-    enriched_reviews = []
-    for review in reviews:
-        user = session.get(User, review.user_id)
-        enriched_reviews.append(
-            {
-                "id": review.id,
-                "user_id": review.user_id,
-                "program_id": review.program_id,
-                "housing_description": review.housing_description,
-                "rating": review.rating,
-                "review_text": review.review_text,
-                "date": review.date,
-                "reviewer": {
-                    "id": user.id if user else None,
-                    "first_name": user.first_name if user else None,
-                    "last_name": user.last_name if user else None,
-                    "institution": user.institution if user else None,
-                    "study_abroad_status": user.study_abroad_status if user else None,
-                    "program_name": user.program_name if user else None,
-                    "program_city": user.program_city if user else None,
-                    "program_country": user.program_country if user else None,
-                    "program_term": user.program_term if user else None,
-                }
-                if user
-                else None,
-            }
-        )
-    return enriched_reviews
+    # Enrich reviews with the public reviewer profile (one query for the whole page)
+    enriched_reviews = await serialize_reviews(session, reviews, HOUSING_REVIEW_FIELDS)
+    return page_body(enriched_reviews, cursor, next_cursor)
@@ -0,0 +1,118 @@
+"""Rating summary helpers shared by the program, place and trip routes.
+
+Programs, places and trips carry a denormalized ``RatingSummary`` (review count,
+rating sum and a 1-5 star histogram). The summary is updated in the same
+transaction as the review write, so list and detail endpoints never have to
+read the review tables to show ratings.
+
+Only ratings of 1-5 are counted. The review routes reject anything else, but
+rows written before that check may hold other values; those are left out of
+the summary rather than stored in a bucket that doesn't exist.
+"""
+
+from collections import defaultdict
+from typing import Dict, Optional, Type
+
+from sqlalchemy import func, update
+from sqlmodel import Session, select
+
+from .models import (
+    Place,
+    PlaceReview,
+    ProgramReview,
+    RatingSummary,
+    StudyAbroadProgram,
+    Trip,
+    TripReview,
+)
+
+RATING_VALUES = (1, 2, 3, 4, 5)
+
+# (entity model, review model, review foreign key name) for every rated entity
+RATED_ENTITIES = (
+    (StudyAbroadProgram, ProgramReview, "program_id"),
+    (Place, PlaceReview, "place_id"),
+    (Trip, TripReview, "trip_id"),
+)
+
+
+def average_rating(entity: RatingSummary) -> Optional[float]:
+    """Average star rating rounded to one decimal, or None when there are no reviews."""
+    if not entity.review_count:
+        return None
+    return round(entity.rating_sum / entity.review_count, 1)
+
+
+def rating_histogram(entity: RatingSummary) -> Dict[int, int]:
+    """Number of reviews per star value."""
+    return {value: getattr(entity, f"rating_{value}_count") for value in RATING_VALUES}
+
+
+def record_review(
+    session: Session,
+    entity_model: Type[RatingSummary],
+    entity_id: int,
+    rating: int,
+    delta: int = 1,
+) -> None:
+    """Add (delta=1) or remove (delta=-1) a review's rating from an entity's summary.
+
+    Issues a single atomic UPDATE in the session's current transaction; the
+    caller commits it together with the review insert or delete. Ratings outside
+    RATING_VALUES were never counted, so they leave the summary unchanged.
+    """
+    if rating not in RATING_VALUES:
+        return
+    bucket = getattr(entity_model, f"rating_{rating}_count")
+    session.exec(
+        update(entity_model)
+        .where(entity_model.id == entity_id)
+        .values(
+            {
+                entity_model.review_count: entity_model.review_count + delta,
+                entity_model.rating_sum: entity_model.rating_sum + delta * rating,
+                bucket: bucket + delta,
+            }
+        )
+    )
+
+
+def recompute_rating_summaries(
+    session: Session,
+    entity_model: Type[RatingSummary],
+    review_model,
+    foreign_key: str,
+) -> int:
+    """Rebuild an entity table's rating summaries from its review table.
+
+    Returns the number of rows whose stored summary had drifted and was fixed.
+    Changes are flushed but not committed.
+    """
+    review_fk = getattr(review_model, foreign_key)
+    histograms: Dict[int, Dict[int, int]] = defaultdict(dict)
+    rows = session.exec(
+        select(review_fk, review_model.rating, func.count())
+        .where(review_model.rating.between(RATING_VALUES[0], RATING_VALUES[-1]))
+        .group_by(review_fk, review_model.rating)
+    ).all()
+    for entity_id, rating, count in rows:
+        histograms[entity_id][rating] = count
+
+    repaired = 0
+    for entity in session.exec(select(entity_model)).all():
+        histogram = histograms.get(entity.id, {})
+        expected = {
+            "review_count": sum(histogram.values()),
+            "rating_sum": sum(rating * count for rating, count in histogram.items()),
+        }
+        for value in RATING_VALUES:
+            expected[f"rating_{value}_count"] = histogram.get(value, 0)
+
+        if any(getattr(entity, key) != value for key, value in expected.items()):
+            for key, value in expected.items():
+                setattr(entity, key, value)
+            session.add(entity)
+            repaired += 1
+
+    session.flush()
+    return repaired
@@ -0,0 +1,52 @@
+"""Reviewer projection shared by the review listing endpoints.
+
+Every review listing shows the same public slice of the author's profile.
+Reviewers for a whole page are loaded with one ``IN`` query that selects only
+those public columns, so a review page costs two queries however many
+reviews it holds.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .models import User
+
+# Public profile columns shown next to a review (never email, age, etc.)
+REVIEWER_COLUMNS = (
+    User.id,
+    User.first_name,
+    User.last_name,
+    User.institution,
+    User.study_abroad_status,
+    User.program_name,
+    User.program_city,
+    User.program_country,
+    User.program_term,
+)
+
+
+async def load_reviewers(
+    session: AsyncSession, user_ids: Iterable[Optional[int]]
+) -> Dict[int, dict]:
+    """Return {user_id: public reviewer dict} for the given users in a single query."""
+    ids = {user_id for user_id in user_ids if user_id is not None}
+    if not ids:
+        return {}
+    rows = (await session.exec(select(*REVIEWER_COLUMNS).where(User.id.in_(ids)))).all()
+    return {row.id: dict(row._mapping) for row in rows}
+
+
+async def serialize_reviews(
+    session: AsyncSession, reviews: Sequence, fields: Sequence[str]
+) -> List[dict]:
+    """Turn a page of reviews into response dicts with a ``reviewer`` entry each."""
+    reviewers = await load_reviewers(session, (review.user_id for review in reviews))
+    return [
+        {
+            **{field: getattr(review, field) for field in fields},
+            "reviewer": reviewers.get(review.user_id),
+        }
+        for review in reviews
+    ]
@@ -0,0 +1 @@
+"""Search module for full-text search across programs, places and trips."""
@@ -0,0 +1,192 @@
+"""Full-text search index for programs, places and trips.
+
+Each searchable table gets a database-native full-text index over its text
+columns:
+
+* PostgreSQL - a generated ``search_vector`` tsvector column with a GIN
+  index, ranked with ``ts_rank_cd``.
+* SQLite - an FTS5 external-content table (``<table>_fts``) kept in sync by
+  insert/update/delete triggers, ranked with ``bm25``.
+
+Either way the database maintains the index in the same transaction as the
+row write, and a lookup walks the inverted index instead of scanning every
+row with ``ILIKE '%x%'``. Every search term is matched as a word prefix, so
+typing "barc" already finds Barcelona.
+
+``ensure_search_indexes`` is idempotent and runs after ``create_all``. The
+Alembic migration that introduced search keeps its own frozen copy of this
+DDL, so changing it here needs a new migration.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import column, false, func, literal, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+from ..models import Place, StudyAbroadProgram, Trip
+
+# kind -> (model, [(column, weight)]); higher weights rank matches in that column first
+SEARCH_DOCUMENTS: Dict[str, Tuple[Type[SQLModel], List[Tuple[str, str]]]] = {
+    "program": (
+        StudyAbroadProgram,
+        [
+            ("program_name", "A"),
+            ("institution", "B"),
+            ("city", "B"),
+            ("country", "B"),
+            ("description", "C"),
+        ],
+    ),
+    "place": (
+        Place,
+        [("name", "A"), ("category", "B"), ("city", "B"), ("country", "B"), ("description", "C")],
+    ),
+    "trip": (
+        Trip,
+        [("destination", "A"), ("country", "B"), ("trip_type", "B"), ("description", "C")],
+    ),
+}
+
+# bm25 column weights matching the tsvector weight classes
+BM25_WEIGHTS = {"A": 10.0, "B": 4.0, "C": 1.0}
+
+
+def search_terms(query: str) -> List[str]:
+    """Split user input into lowercase word terms, dropping FTS operators and punctuation."""
+    return re.findall(r"\w+", query.lower())
+
+
+# ===== Index DDL =====
+
+
+def _sqlite_statements(table_name: str, columns: List[str]) -> List[str]:
+    fts = f"{table_name}_fts"
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{name}" for name in columns)
+    old_values = ", ".join(f"old.{name}" for name in columns)
+    delete_row = (
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+    )
+    insert_row = f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_list}, "
+        f"content='{table_name}', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} "
+        f"BEGIN {insert_row} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} "
+        f"BEGIN {delete_row} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table_name} "
+        f"BEGIN {delete_row} {insert_row} END",
+    ]
+
+
+def _postgres_vector(weighted_columns: List[Tuple[str, str]]) -> str:
+    return " || ".join(
+        f"setweight(to_tsvector('simple', coalesce({name}, '')), '{weight}')"
+        for name, weight in weighted_columns
+    )
+
+
+def ensure_search_indexes(connection: Connection) -> None:
+    """Create any missing full-text indexes (and their sync triggers) for the dialect."""
+    dialect = connection.dialect.name
+    for model, weighted_columns in SEARCH_DOCUMENTS.values():
+        table_name = model.__tablename__
+        if dialect == "sqlite":
+            fts = f"{table_name}_fts"
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": fts},
+            ).first()
+            columns = [name for name, _ in weighted_columns]
+            for statement in _sqlite_statements(table_name, columns):
+                connection.exec_driver_sql(statement)
+            if not exists:
+                # Index the rows that predate the FTS table
+                connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        elif dialect == "postgresql":
+            connection.exec_driver_sql(
+                f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({_postgres_vector(weighted_columns)}) STORED"
+            )
+            connection.exec_driver_sql(
+                f"CREATE INDEX IF NOT EXISTS ix_{table_name}_search_vector "
+                f"ON {table_name} USING GIN (search_vector)"
+            )
+
+
+def drop_search_indexes(connection: Connection) -> None:
+    """Remove the full-text indexes (used by the migration's downgrade)."""
+    dialect = connection.dialect.name
+    for model, _ in SEARCH_DOCUMENTS.values():
+        table_name = model.__tablename__
+        if dialect == "sqlite":
+            fts = f"{table_name}_fts"
+            for suffix in ("ai", "ad", "au"):
+                connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {fts}")
+        elif dialect == "postgresql":
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS ix_{table_name}_search_vector")
+            connection.exec_driver_sql(
+                f"ALTER TABLE {table_name} DROP COLUMN IF EXISTS search_vector"
+            )
+
+
+# ===== Queries =====
+
+
+def search_hits(kind: str, query: str, dialect: str) -> Optional[object]:
+    """Subquery of (id, rank) for rows matching every term; lower rank is a better match.
+
+    Returns None when the input has no searchable terms.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+    model, weighted_columns = SEARCH_DOCUMENTS[kind]
+    table_name = model.__tablename__
+
+    if dialect == "sqlite":
+        fts = f"{table_name}_fts"
+        weights = ", ".join(str(BM25_WEIGHTS[weight]) for _, weight in weighted_columns)
+        match = " ".join(f'"{term}"*' for term in terms)
+        fts_table = table(fts, column("rowid"))
+        stmt = select(
+            fts_table.c.rowid.label("id"),
+            literal_column(f"bm25({fts}, {weights})").label("rank"),
+        ).where(literal_column(fts).op("MATCH")(match))
+    elif dialect == "postgresql":
+        ts_query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        vector = literal_column("search_vector")
+        stmt = (
+            select(model.id.label("id"), (-func.ts_rank_cd(vector, ts_query)).label("rank"))
+            .select_from(model)
+            .where(vector.op("@@")(ts_query))
+        )
+    else:
+        # No native full-text index: every term must appear in some searchable column
+        stmt = select(model.id.label("id"), literal(0).label("rank")).where(
+            *(
+                or_(*(getattr(model, name).ilike(f"%{term}%") for name, _ in weighted_columns))
+                for term in terms
+            )
+        )
+    return stmt.subquery(f"{kind}_hits")
+
+
+def apply_search(select_query, kind: str, query: str, dialect: str, *, ranked: bool):
+    """Restrict an entity select to full-text matches, best matches first when ranked.
+
+    Input without any word terms (e.g. "!!!") matches nothing.
+    """
+    hits = search_hits(kind, query, dialect)
+    if hits is None:
+        return select_query.where(false())
+    model, _ = SEARCH_DOCUMENTS[kind]
+    select_query = select_query.join(hits, hits.c.id == model.id)
+    if ranked:
+        select_query = select_query.order_by(hits.c.rank, model.id)
+    return select_query
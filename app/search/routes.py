@@ -0,0 +1,62 @@
+"""Cross-entity search endpoint behind the global search box."""
+
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..db import database_dialect, get_async_session
+from ..models import Place, StudyAbroadProgram, Trip
+from .fts import apply_search, search_terms
+from .suggest import suggest_index
+
+router = APIRouter(prefix="/api", tags=["search"])
+
+# Minimal fields per hit type: just what a search dropdown row shows
+HIT_COLUMNS = {
+    "program": (
+        StudyAbroadProgram.id,
+        StudyAbroadProgram.program_name,
+        StudyAbroadProgram.city,
+        StudyAbroadProgram.country,
+    ),
+    "place": (Place.id, Place.name, Place.category, Place.city, Place.country),
+    "trip": (Trip.id, Trip.destination, Trip.trip_type, Trip.country),
+}
+
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(3, ge=1, le=20),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Search programs, places and trips at once; each list is best match first."""
+    results = {f"{kind}s": [] for kind in HIT_COLUMNS}
+    if not search_terms(q):
+        return results
+
+    for kind, columns in HIT_COLUMNS.items():
+        query = apply_search(select(*columns), kind, q, database_dialect, ranked=True)
+        rows = (await session.exec(query.limit(limit))).all()
+        results[f"{kind}s"] = [{"type": kind, **row._mapping} for row in rows]
+    return results
+
+
+@router.get("/suggest")
+async def suggest(
+    q: str = Query(..., min_length=1),
+    field: Optional[
+        List[Literal["city", "country", "institution", "program", "place", "destination"]]
+    ] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Autocomplete city, country, institution and entity names from the in-memory index.
+
+    The session is only used when the index is due for its periodic rebuild.
+    """
+    if suggest_index.due():
+        await session.run_sync(suggest_index.rebuild)
+    return suggest_index.suggest(q, field, limit)
@@ -0,0 +1,154 @@
+"""In-memory prefix index for autocomplete suggestions.
+
+Holds the distinct cities, countries, institutions and program/place/trip
+names in one sorted array per field. A lookup is a binary search to the first
+key at or after the prefix followed by a short forward scan, so suggestions
+never touch the database.
+
+Keys are accent- and case-folded ("barc" finds "Barça"). Each value is
+reference counted by the rows that use it, so it disappears when the last
+such row is deleted or renamed.
+
+The index is built from the database at startup and kept current by the
+create, update and delete routes. It is per process, so it is also rebuilt
+from the database once settings.suggest_index_ttl_sec seconds pass, which
+bounds how long writes handled by another worker stay out of suggestions.
+"""
+
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session, select
+
+from ..config import settings
+from ..models import Place, StudyAbroadProgram, Trip
+
+# kind -> ((suggest field, model attribute), ...)
+SUGGEST_FIELDS: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "program": (
+        ("program", "program_name"),
+        ("institution", "institution"),
+        ("city", "city"),
+        ("country", "country"),
+    ),
+    "place": (("place", "name"), ("city", "city"), ("country", "country")),
+    "trip": (("destination", "destination"), ("country", "country")),
+}
+SUGGEST_MODELS = {"program": StudyAbroadProgram, "place": Place, "trip": Trip}
+FIELDS = ("city", "country", "institution", "program", "place", "destination")
+
+
+def fold(value: str) -> str:
+    """Comparison key: accents stripped and case folded."""
+    decomposed = unicodedata.normalize("NFKD", value.strip())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def entity_values(kind: str, entity) -> List[Tuple[str, str]]:
+    """The (field, value) pairs an entity contributes to the index."""
+    values = []
+    for field, attribute in SUGGEST_FIELDS[kind]:
+        value = getattr(entity, attribute)
+        if value and value.strip():
+            values.append((field, value.strip()))
+    return values
+
+
+class PrefixIndex:
+    """Sorted (key, value) arrays per field with reference counts and a rebuild TTL."""
+
+    def __init__(self, ttl_sec: int = 0) -> None:
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._expires_at = 0.0
+        self._entries: Dict[str, List[Tuple[str, str]]] = {field: [] for field in FIELDS}
+        self._counts: Counter = Counter()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {field: [] for field in FIELDS}
+            self._counts = Counter()
+
+    def rebuild(self, session: Session) -> None:
+        """Replace the index contents with the values currently in the database."""
+        counts: Counter = Counter()
+        for kind, fields in SUGGEST_FIELDS.items():
+            model = SUGGEST_MODELS[kind]
+            columns = [getattr(model, attribute) for _, attribute in fields]
+            for row in session.exec(select(*columns)).all():
+                for (field, _), value in zip(fields, row):
+                    if value and value.strip():
+                        counts[(field, value.strip())] += 1
+
+        entries: Dict[str, List[Tuple[str, str]]] = {field: [] for field in FIELDS}
+        for field, value in counts:
+            entries[field].append((fold(value), value))
+        for field_entries in entries.values():
+            field_entries.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._counts = counts
+            self._expires_at = time.monotonic() + self.ttl_sec
+
+    def due(self) -> bool:
+        """Whether the TTL has run out. Claims the rebuild, so concurrent callers skip it."""
+        if self.ttl_sec <= 0:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self._expires_at > now:
+                return False
+            self._expires_at = now + self.ttl_sec
+            return True
+
+    def add(self, values: Iterable[Tuple[str, str]]) -> None:
+        with self._lock:
+            for field, value in values:
+                self._counts[(field, value)] += 1
+                if self._counts[(field, value)] == 1:
+                    insort(self._entries[field], (fold(value), value))
+
+    def remove(self, values: Iterable[Tuple[str, str]]) -> None:
+        with self._lock:
+            for field, value in values:
+                if self._counts[(field, value)] <= 0:
+                    continue
+                self._counts[(field, value)] -= 1
+                if self._counts[(field, value)] == 0:
+                    del self._counts[(field, value)]
+                    entries = self._entries[field]
+                    position = bisect_left(entries, (fold(value), value))
+                    if position < len(entries) and entries[position][1] == value:
+                        del entries[position]
+
+    def replace(self, old: Iterable[Tuple[str, str]], new: Iterable[Tuple[str, str]]) -> None:
+        """Swap an updated entity's previous values for its current ones."""
+        self.remove(old)
+        self.add(new)
+
+    def suggest(
+        self, prefix: str, fields: Optional[Sequence[str]] = None, limit: int = 10
+    ) -> List[Dict[str, str]]:
+        """Values starting with prefix, alphabetical by folded key, across the given fields."""
+        key = fold(prefix)
+        if not key:
+            return []
+        matches = []
+        with self._lock:
+            for field in fields or FIELDS:
+                entries = self._entries[field]
+                position = bisect_left(entries, (key, ""))
+                for folded, value in entries[position : position + limit]:
+                    if not folded.startswith(key):
+                        break
+                    matches.append((folded, field, value))
+        matches.sort()
+        return [{"field": field, "value": value} for _, field, value in matches[:limit]]
+
+
+suggest_index = PrefixIndex(settings.suggest_index_ttl_sec)
@@ -0,0 +1,82 @@
+"""Tuned SQLite mode for local and small single-host deployments.
+
+Every SQLite connection gets these pragmas when it is opened:
+
+* ``journal_mode=WAL`` - readers work from a snapshot and never block on, or
+  block, the writer.
+* ``synchronous=NORMAL`` - in WAL mode this only fsyncs at checkpoints; a
+  power cut can drop the last commits but never corrupts the database.
+* ``mmap_size`` / ``cache_size`` - serve hot pages from memory instead of
+  read() calls.
+* ``busy_timeout`` - wait for a lock instead of failing immediately.
+
+SQLite still allows only one writer at a time, and a transaction that reads
+and then tries to write can fail with ``database is locked`` no matter how
+long the busy timeout is. So writes go through a dedicated engine holding a
+single connection: writers queue for it in the pool, while reads keep using
+the shared reader pool and scale across threads.
+
+The async routes get the same split: an aiosqlite writer engine with one
+connection of its own, used by AsyncSessions whose sync session is a
+RoutingSession. A routed transaction starts on its writer with the write
+itself, so when the sync and async writers meet, one waits out the busy
+timeout for the other's lock instead of failing on a stale read snapshot.
+"""
+
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.dml import UpdateBase
+from sqlmodel import Session
+
+
+def sqlite_pragmas(busy_timeout_ms: int) -> tuple:
+    return (
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        "mmap_size=268435456",  # 256 MiB
+        "cache_size=-65536",  # 64 MiB (negative values are KiB)
+        f"busy_timeout={busy_timeout_ms}",
+    )
+
+
+def install_pragmas(engine: Engine, pragmas: tuple) -> None:
+    """Run the pragmas on every new DBAPI connection the engine opens."""
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+class RoutingSession(Session):
+    """Session that reads from the reader pool and writes on the single writer.
+
+    Flushes and INSERT/UPDATE/DELETE statements go to the writer. Once a
+    transaction has written, the rest of it stays on the writer so it reads
+    its own uncommitted changes; the next transaction starts on the reader
+    again.
+
+    Works as an AsyncSession's ``sync_session_class`` too, with the async
+    engines' ``sync_engine``s as ``bind`` (the reader) and ``writer``.
+    """
+
+    def __init__(self, bind: Engine, writer: Engine, **kwargs: Any) -> None:
+        super().__init__(bind=bind, **kwargs)
+        self.reader = bind
+        self.writer = writer
+        self.writing = False
+        event.listen(self, "after_transaction_end", self._after_transaction_end)
+
+    def get_bind(self, mapper: Optional[Any] = None, *, clause: Optional[Any] = None, **kw: Any):
+        if self.writing or self._flushing or isinstance(clause, UpdateBase):
+            self.writing = True
+            return self.writer
+        return self.reader
+
+    def _after_transaction_end(self, session: Session, transaction) -> None:
+        if transaction.parent is None:
+            self.writing = False
@@ -5,12 +5,19 @@
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..db import get_session
+from ..db import database_dialect, get_async_session, get_session
 from ..deps import current_user
+from ..facets import facet_cache, facet_counts, parse_facets
 from ..models import Trip, TripReview, User
+from ..pagination import fetch_page, page_body
+from ..ratings import average_rating, record_review
+from ..reviewers import serialize_reviews
+from ..search.fts import apply_search
+from ..search.suggest import entity_values, suggest_index
 
 router = APIRouter(prefix="/api/trips", tags=["trips"])
 
@@ -33,10 +40,14 @@ class TripUpdate(BaseModel):
 
 
 class TripReviewCreate(BaseModel):
-    rating: int
+    rating: int = Field(ge=1, le=5)
     review_text: str
 
 
+# Review columns returned by the review listings, next to the public reviewer profile
+TRIP_REVIEW_FIELDS = ("id", "user_id", "trip_id", "rating", "review_text", "date")
+
+
 # ===== TRIP CRUD =====
 
 
@@ -51,20 +62,29 @@ def create_trip(
     session.add(db_trip)
     session.commit()
     session.refresh(db_trip)
+    suggest_index.add(entity_values("trip", db_trip))
+    facet_cache.invalidate("trip")
     return db_trip
 
 
 @router.get("/")
-def list_trips(
+async def list_trips(
     destination: Optional[str] = None,
     country: Optional[str] = None,
     trip_type: Optional[str] = None,
     search: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    session: Session = Depends(get_session),
+    cursor: Optional[str] = None,
+    facets: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
 ):
-    """List all trips with optional filters and rating info."""
+    """List all trips with optional filters and rating info.
+
+    Pass ``cursor`` (empty for the first page) for keyset pagination by (created_at, id),
+    and ``facets`` (comma-separated) for per-value counts under the current filters.
+    """
+    facet_names = parse_facets("trip", facets)
     query = select(Trip)
 
     if destination:
@@ -74,19 +94,15 @@ def list_trips(
     if trip_type:
         query = query.where(Trip.trip_type == trip_type)
     if search:
-        query = query.where(Trip.destination.ilike(f"%{search}%"))
+        query = apply_search(query, "trip", search, database_dialect, ranked=cursor is None)
 
-    query = query.offset(skip).limit(limit)
-    trips = session.exec(query).all()
+    trips, next_cursor = await fetch_page(
+        session, query, Trip.created_at, Trip.id, cursor=cursor, skip=skip, limit=limit
+    )
 
-    # Enrich trips with average rating and review count
+    # Ratings come from the denormalized summary columns, no review reads needed
     enriched_trips = []
     for trip in trips:
-        reviews = session.exec(select(TripReview).where(TripReview.trip_id == trip.id)).all()
-
-        review_count = len(reviews)
-        average_rating = sum(r.rating for r in reviews) / review_count if review_count > 0 else None
-
         enriched_trips.append(
             {
                 "id": trip.id,
@@ -95,18 +111,28 @@ def list_trips(
                 "description": trip.description,
                 "trip_type": trip.trip_type,
                 "created_at": trip.created_at,
-                "average_rating": round(average_rating, 1) if average_rating else None,
-                "review_count": review_count,
+                "average_rating": average_rating(trip),
+                "review_count": trip.review_count,
             }
         )
 
-    return enriched_trips
+    facet_body = None
+    if facet_names is not None:
+        filters = {
+            "destination": destination,
+            "country": country,
+            "trip_type": trip_type,
+            "search": search,
+        }
+        facet_body = await facet_counts(session, "trip", query, facet_names, filters)
+
+    return page_body(enriched_trips, cursor, next_cursor, facet_body)
 
 
 @router.get("/{trip_id}")
-def get_trip(trip_id: int, session: Session = Depends(get_session)):
+async def get_trip(trip_id: int, session: AsyncSession = Depends(get_async_session)):
     """Get a specific trip by ID."""
-    trip = session.get(Trip, trip_id)
+    trip = await session.get(Trip, trip_id)
     if not trip:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
     return trip
@@ -124,6 +150,7 @@ def update_trip(
     if not trip:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
 
+    previous_values = entity_values("trip", trip)
     update_data = trip_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(trip, key, value)
@@ -131,6 +158,8 @@ def update_trip(
     session.add(trip)
     session.commit()
     session.refresh(trip)
+    suggest_index.replace(previous_values, entity_values("trip", trip))
+    facet_cache.invalidate("trip")
     return trip
 
 
@@ -145,8 +174,11 @@ def delete_trip(
     if not trip:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
 
+    values = entity_values("trip", trip)
     session.delete(trip)
     session.commit()
+    suggest_index.remove(values)
+    facet_cache.invalidate("trip")
     return None
 
 
@@ -168,44 +200,26 @@ def create_trip_review(
 
     db_review = TripReview(user_id=user.id, trip_id=trip_id, **review.model_dump())
     session.add(db_review)
+    record_review(session, Trip, trip_id, db_review.rating)
     session.commit()
     session.refresh(db_review)
     return db_review
 
 
 @router.get("/{trip_id}/reviews")
-def list_trip_reviews(
-    trip_id: int, skip: int = 0, limit: int = 100, session: Session = Depends(get_session)
+async def list_trip_reviews(
+    trip_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
 ):
     """List all reviews for a specific trip with reviewer info."""
-    query = select(TripReview).where(TripReview.trip_id == trip_id).offset(skip).limit(limit)
-    reviews = session.exec(query).all()
-
-    # Enrich reviews with user info
-    enriched_reviews = []
-    for review in reviews:
-        user = session.get(User, review.user_id)
-        enriched_reviews.append(
-            {
-                "id": review.id,
-                "user_id": review.user_id,
-                "trip_id": review.trip_id,
-                "rating": review.rating,
-                "review_text": review.review_text,
-                "date": review.date,
-                "reviewer": {
-                    "id": user.id if user else None,
-                    "first_name": user.first_name if user else None,
-                    "last_name": user.last_name if user else None,
-                    "institution": user.institution if user else None,
-                    "study_abroad_status": user.study_abroad_status if user else None,
-                    "program_name": user.program_name if user else None,
-                    "program_city": user.program_city if user else None,
-                    "program_country": user.program_country if user else None,
-                    "program_term": user.program_term if user else None,
-                }
-                if user
-                else None,
-            }
-        )
-    return enriched_reviews
+    query = select(TripReview).where(TripReview.trip_id == trip_id)
+    reviews, next_cursor = await fetch_page(
+        session, query, TripReview.date, TripReview.id, cursor=cursor, skip=skip, limit=limit
+    )
+
+    # Enrich reviews with the public reviewer profile (one query for the whole page)
+    enriched_reviews = await serialize_reviews(session, reviews, TRIP_REVIEW_FIELDS)
+    return page_body(enriched_reviews, cursor, next_cursor)
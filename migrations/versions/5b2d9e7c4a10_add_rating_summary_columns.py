@@ -0,0 +1,71 @@
+"""add rating summary columns
+
+Revision ID: 5b2d9e7c4a10
+Revises: 89c0c4a35e91
+Create Date: 2026-10-17 09:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2d9e7c4a10"
+down_revision: Union[str, Sequence[str], None] = "89c0c4a35e91"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (entity table, review table, review foreign key)
+RATED_TABLES = (
+    ("study_abroad_program", "program_review", "program_id"),
+    ("place", "place_review", "place_id"),
+    ("trip", "trip_review", "trip_id"),
+)
+
+SUMMARY_COLUMNS = (
+    "review_count",
+    "rating_sum",
+    "rating_1_count",
+    "rating_2_count",
+    "rating_3_count",
+    "rating_4_count",
+    "rating_5_count",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Use batch operations for SQLite compatibility
+    for table, _, _ in RATED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in SUMMARY_COLUMNS:
+                batch_op.add_column(
+                    sa.Column(column, sa.Integer(), nullable=False, server_default="0")
+                )
+
+    # Backfill the summaries from the existing reviews
+    for table, review_table, foreign_key in RATED_TABLES:
+        # Legacy ratings outside 1-5 have no bucket, so they're left out of every column
+        match = (
+            f"{review_table}.{foreign_key} = {table}.id AND {review_table}.rating BETWEEN 1 AND 5"
+        )
+        buckets = ", ".join(
+            f"rating_{value}_count = (SELECT COUNT(*) FROM {review_table} "
+            f"WHERE {match} AND {review_table}.rating = {value})"
+            for value in range(1, 6)
+        )
+        op.execute(
+            f"UPDATE {table} SET "
+            f"review_count = (SELECT COUNT(*) FROM {review_table} WHERE {match}), "
+            f"rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM {review_table} WHERE {match}), "
+            f"{buckets}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, _, _ in RATED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in reversed(SUMMARY_COLUMNS):
+                batch_op.drop_column(column)
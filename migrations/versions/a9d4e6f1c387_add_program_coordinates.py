@@ -0,0 +1,64 @@
+"""add program coordinates
+
+Revision ID: a9d4e6f1c387
+Revises: e5c2a7d41b96
+Create Date: 2026-10-17 14:21:48.115302
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a9d4e6f1c387"
+down_revision: Union[str, Sequence[str], None] = "e5c2a7d41b96"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The SQLite full-text search triggers on study_abroad_program as of this revision (see
+# d7a3f19b8c52), frozen here so later changes to app.search.fts don't change this migration
+SEARCH_COLUMNS = ["program_name", "institution", "city", "country", "description"]
+
+
+def _restore_search_triggers() -> None:
+    """Recreate the FTS5 sync triggers a SQLite batch table rebuild drops."""
+    connection = op.get_bind()
+    if connection.dialect.name != "sqlite":
+        return
+    fts = "study_abroad_program_fts"
+    column_list = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{name}" for name in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{name}" for name in SEARCH_COLUMNS)
+    delete_row = (
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+    )
+    insert_row = f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values});"
+    for suffix, event, body in (
+        ("ai", "INSERT", insert_row),
+        ("ad", "DELETE", delete_row),
+        ("au", "UPDATE", f"{delete_row} {insert_row}"),
+    ):
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_{suffix} AFTER {event} ON study_abroad_program "
+            f"BEGIN {body} END"
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Use batch operations for SQLite compatibility
+    with op.batch_alter_table("study_abroad_program", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("latitude", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("longitude", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("study_abroad_program", schema=None) as batch_op:
+        batch_op.drop_column("longitude")
+        batch_op.drop_column("latitude")
+
+    # SQLite batch mode may rebuild the table, which drops its full-text search triggers
+    _restore_search_triggers()
@@ -0,0 +1,35 @@
+"""add message pagination indexes
+
+Revision ID: b7e2c5d8a614
+Revises: a9d4e6f1c387
+Create Date: 2026-10-17 15:02:11.487390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2c5d8a614"
+down_revision: Union[str, Sequence[str], None] = "a9d4e6f1c387"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, columns) on the message table
+MESSAGE_INDEXES = (
+    ("ix_message_recipient_id_read_created_at", ["recipient_id", "read", "created_at"]),
+    ("ix_message_recipient_id_created_at_id", ["recipient_id", "created_at", "id"]),
+    ("ix_message_sender_id_created_at_id", ["sender_id", "created_at", "id"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, columns in MESSAGE_INDEXES:
+        op.create_index(name, "message", columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _ in MESSAGE_INDEXES:
+        op.drop_index(name, table_name="message")
@@ -0,0 +1,163 @@
+"""add conversation table
+
+Revision ID: c3f8a1d6e925
+Revises: b7e2c5d8a614
+Create Date: 2026-10-17 16:40:52.118204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f8a1d6e925"
+down_revision: Union[str, Sequence[str], None] = "b7e2c5d8a614"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Characters of the latest message kept as the preview, as app.messages.conversations
+# had it at this revision
+PREVIEW_LENGTH = 140
+# Conversations whose preview is filled per round trip during the backfill
+PREVIEW_BATCH_SIZE = 1000
+
+
+def _message_preview(content: str) -> str:
+    """The start of a message on one line, cut to PREVIEW_LENGTH characters."""
+    text = " ".join(content.split())
+    if len(text) <= PREVIEW_LENGTH:
+        return text
+    return text[: PREVIEW_LENGTH - 1].rstrip() + "…"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conversation = op.create_table(
+        "conversation",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_low_id", sa.Integer(), nullable=False),
+        sa.Column("user_high_id", sa.Integer(), nullable=False),
+        sa.Column("last_message_id", sa.Integer(), nullable=True),
+        sa.Column("last_sender_id", sa.Integer(), nullable=True),
+        sa.Column("subject", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("preview", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("low_unread_count", sa.Integer(), nullable=False),
+        sa.Column("high_unread_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["last_message_id"], ["message.id"]),
+        sa.ForeignKeyConstraint(["last_sender_id"], ["user.id"]),
+        sa.ForeignKeyConstraint(["user_high_id"], ["user.id"]),
+        sa.ForeignKeyConstraint(["user_low_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_low_id", "user_high_id"),
+    )
+    op.create_index(
+        "ix_conversation_user_low_id_updated_at",
+        "conversation",
+        ["user_low_id", "updated_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_conversation_user_high_id_updated_at",
+        "conversation",
+        ["user_high_id", "updated_at", "id"],
+        unique=False,
+    )
+
+    # Backfill one row per pair in the database: the latest message of each pair and
+    # each side's unread count, without reading the message table into Python
+    message = sa.table(
+        "message",
+        sa.column("id", sa.Integer),
+        sa.column("sender_id", sa.Integer),
+        sa.column("recipient_id", sa.Integer),
+        sa.column("subject", sa.String),
+        sa.column("content", sa.String),
+        sa.column("read", sa.Boolean),
+        sa.column("created_at", sa.DateTime),
+    )
+    sender, recipient = message.c.sender_id, message.c.recipient_id
+    low = sa.case((sender < recipient, sender), else_=recipient)
+    high = sa.case((sender < recipient, recipient), else_=sender)
+    pair = {"partition_by": (low, high)}
+
+    def unread_count(to_low):
+        # A message to oneself counts on the low side only
+        to_side = recipient == low if to_low else recipient != low
+        unread = sa.and_(message.c.read == sa.false(), to_side)
+        return sa.func.sum(sa.case((unread, 1), else_=0)).over(**pair)
+
+    ranked = sa.select(
+        low.label("user_low_id"),
+        high.label("user_high_id"),
+        message.c.id,
+        sender,
+        message.c.subject,
+        message.c.created_at,
+        unread_count(True).label("low_unread_count"),
+        unread_count(False).label("high_unread_count"),
+        sa.func.row_number()
+        .over(**pair, order_by=(message.c.created_at.desc(), message.c.id.desc()))
+        .label("position"),
+    ).subquery()
+    op.execute(
+        conversation.insert().from_select(
+            [
+                "user_low_id",
+                "user_high_id",
+                "last_message_id",
+                "last_sender_id",
+                "subject",
+                "preview",
+                "updated_at",
+                "low_unread_count",
+                "high_unread_count",
+            ],
+            sa.select(
+                ranked.c.user_low_id,
+                ranked.c.user_high_id,
+                ranked.c.id,
+                ranked.c.sender_id,
+                ranked.c.subject,
+                sa.literal(""),
+                ranked.c.created_at,
+                ranked.c.low_unread_count,
+                ranked.c.high_unread_count,
+            ).where(ranked.c.position == 1),
+        )
+    )
+
+    # Previews collapse whitespace, which SQL can't do portably, so fill them in
+    # batches of PREVIEW_BATCH_SIZE conversations
+    connection = op.get_bind()
+    after = 0
+    while True:
+        rows = connection.execute(
+            sa.select(conversation.c.id, message.c.content)
+            .join(message, message.c.id == conversation.c.last_message_id)
+            .where(conversation.c.id > after)
+            .order_by(conversation.c.id)
+            .limit(PREVIEW_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            conversation.update()
+            .where(conversation.c.id == sa.bindparam("conversation_id"))
+            .values(preview=sa.bindparam("new_preview")),
+            [
+                {"conversation_id": row.id, "new_preview": _message_preview(row.content)}
+                for row in rows
+            ],
+        )
+        after = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_conversation_user_high_id_updated_at", table_name="conversation")
+    op.drop_index("ix_conversation_user_low_id_updated_at", table_name="conversation")
+    op.drop_table("conversation")
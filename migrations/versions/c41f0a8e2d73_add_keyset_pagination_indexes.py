@@ -0,0 +1,44 @@
+"""add keyset pagination indexes
+
+Revision ID: c41f0a8e2d73
+Revises: 5b2d9e7c4a10
+Create Date: 2026-10-17 10:03:55.918214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c41f0a8e2d73"
+down_revision: Union[str, Sequence[str], None] = "5b2d9e7c4a10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+KEYSET_INDEXES = (
+    ("ix_study_abroad_program_created_at_id", "study_abroad_program", ["created_at", "id"]),
+    ("ix_place_created_at_id", "place", ["created_at", "id"]),
+    ("ix_trip_created_at_id", "trip", ["created_at", "id"]),
+    ("ix_program_review_program_id_date_id", "program_review", ["program_id", "date", "id"]),
+    ("ix_course_review_program_id_date_id", "course_review", ["program_id", "date", "id"]),
+    (
+        "ix_program_housing_review_program_id_date_id",
+        "program_housing_review",
+        ["program_id", "date", "id"],
+    ),
+    ("ix_place_review_place_id_date_id", "place_review", ["place_id", "date", "id"]),
+    ("ix_trip_review_trip_id_date_id", "trip_review", ["trip_id", "date", "id"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in KEYSET_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(KEYSET_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,107 @@
+"""add full text search indexes
+
+Revision ID: d7a3f19b8c52
+Revises: c41f0a8e2d73
+Create Date: 2026-10-17 11:20:41.402117
+
+"""
+from typing import List, Sequence, Tuple, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a3f19b8c52"
+down_revision: Union[str, Sequence[str], None] = "c41f0a8e2d73"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The search index as of this revision, frozen here rather than imported from
+# app.search.fts so later changes to the app don't change what this migration does.
+# table -> [(column, tsvector weight)]
+SEARCH_COLUMNS = {
+    "study_abroad_program": [
+        ("program_name", "A"),
+        ("institution", "B"),
+        ("city", "B"),
+        ("country", "B"),
+        ("description", "C"),
+    ],
+    "place": [
+        ("name", "A"),
+        ("category", "B"),
+        ("city", "B"),
+        ("country", "B"),
+        ("description", "C"),
+    ],
+    "trip": [("destination", "A"), ("country", "B"), ("trip_type", "B"), ("description", "C")],
+}
+
+
+def _sqlite_statements(table_name: str, columns: List[str]) -> List[str]:
+    fts = f"{table_name}_fts"
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{name}" for name in columns)
+    old_values = ", ".join(f"old.{name}" for name in columns)
+    delete_row = (
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+    )
+    insert_row = f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_list}, "
+        f"content='{table_name}', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} "
+        f"BEGIN {insert_row} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} "
+        f"BEGIN {delete_row} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table_name} "
+        f"BEGIN {delete_row} {insert_row} END",
+    ]
+
+
+def _postgres_vector(weighted_columns: List[Tuple[str, str]]) -> str:
+    return " || ".join(
+        f"setweight(to_tsvector('simple', coalesce({name}, '')), '{weight}')"
+        for name, weight in weighted_columns
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # PostgreSQL: generated tsvector columns + GIN indexes; SQLite: FTS5 tables + triggers
+    connection = op.get_bind()
+    dialect = connection.dialect.name
+    for table_name, weighted_columns in SEARCH_COLUMNS.items():
+        if dialect == "sqlite":
+            fts = f"{table_name}_fts"
+            columns = [name for name, _ in weighted_columns]
+            for statement in _sqlite_statements(table_name, columns):
+                connection.exec_driver_sql(statement)
+            # Index the rows that predate the FTS table
+            connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        elif dialect == "postgresql":
+            connection.exec_driver_sql(
+                f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({_postgres_vector(weighted_columns)}) STORED"
+            )
+            connection.exec_driver_sql(
+                f"CREATE INDEX IF NOT EXISTS ix_{table_name}_search_vector "
+                f"ON {table_name} USING GIN (search_vector)"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    connection = op.get_bind()
+    dialect = connection.dialect.name
+    for table_name in SEARCH_COLUMNS:
+        if dialect == "sqlite":
+            fts = f"{table_name}_fts"
+            for suffix in ("ai", "ad", "au"):
+                connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {fts}")
+        elif dialect == "postgresql":
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS ix_{table_name}_search_vector")
+            connection.exec_driver_sql(
+                f"ALTER TABLE {table_name} DROP COLUMN IF EXISTS search_vector"
+            )
@@ -0,0 +1,29 @@
+"""add message parent index
+
+Revision ID: d8b1e4f7a239
+Revises: c3f8a1d6e925
+Create Date: 2026-10-17 17:21:36.904127
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d8b1e4f7a239"
+down_revision: Union[str, Sequence[str], None] = "c3f8a1d6e925"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_message_parent_message_id"), "message", ["parent_message_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_message_parent_message_id"), table_name="message")
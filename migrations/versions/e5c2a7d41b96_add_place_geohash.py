@@ -0,0 +1,106 @@
+"""add place geohash
+
+Revision ID: e5c2a7d41b96
+Revises: d7a3f19b8c52
+Create Date: 2026-10-17 12:05:17.630942
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5c2a7d41b96"
+down_revision: Union[str, Sequence[str], None] = "d7a3f19b8c52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9
+
+
+def _geohash(latitude: float, longitude: float) -> str:
+    """Precision-9 geohash of a point, as app.geo.encode computed it at this revision."""
+    bits = 5 * GEOHASH_PRECISION
+    lng_bits, lat_bits = (bits + 1) // 2, bits // 2
+    lng_index = min(max(int((longitude + 180.0) / 360.0 * (1 << lng_bits)), 0), (1 << lng_bits) - 1)
+    lat_index = min(max(int((latitude + 90.0) / 180.0 * (1 << lat_bits)), 0), (1 << lat_bits) - 1)
+    value = 0
+    for bit in range(bits):
+        # Bits alternate longitude, latitude, starting with the most significant
+        if bit % 2 == 0:
+            lng_bits -= 1
+            value = (value << 1) | ((lng_index >> lng_bits) & 1)
+        else:
+            lat_bits -= 1
+            value = (value << 1) | ((lat_index >> lat_bits) & 1)
+    return "".join(BASE32[(value >> shift) & 31] for shift in range(bits - 5, -1, -5))
+
+
+# The SQLite full-text search triggers on place as of this revision (see
+# d7a3f19b8c52), frozen here so later changes to app.search.fts don't change this migration
+SEARCH_COLUMNS = ["name", "category", "city", "country", "description"]
+
+
+def _restore_search_triggers() -> None:
+    """Recreate the FTS5 sync triggers a SQLite batch table rebuild drops."""
+    connection = op.get_bind()
+    if connection.dialect.name != "sqlite":
+        return
+    fts = "place_fts"
+    column_list = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{name}" for name in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{name}" for name in SEARCH_COLUMNS)
+    delete_row = (
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+    )
+    insert_row = f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values});"
+    for suffix, event, body in (
+        ("ai", "INSERT", insert_row),
+        ("ad", "DELETE", delete_row),
+        ("au", "UPDATE", f"{delete_row} {insert_row}"),
+    ):
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_{suffix} AFTER {event} ON place BEGIN {body} END"
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Use batch operations for SQLite compatibility
+    with op.batch_alter_table("place", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("geohash", sa.String(), nullable=True))
+        batch_op.create_index(batch_op.f("ix_place_geohash"), ["geohash"], unique=False)
+
+    # Backfill geohashes for places that already have coordinates
+    connection = op.get_bind()
+    place = sa.table(
+        "place",
+        sa.column("id", sa.Integer),
+        sa.column("latitude", sa.Float),
+        sa.column("longitude", sa.Float),
+        sa.column("geohash", sa.String),
+    )
+    rows = connection.execute(
+        sa.select(place.c.id, place.c.latitude, place.c.longitude).where(
+            place.c.latitude.is_not(None), place.c.longitude.is_not(None)
+        )
+    ).all()
+    for place_id, latitude, longitude in rows:
+        connection.execute(
+            place.update()
+            .where(place.c.id == place_id)
+            .values(geohash=_geohash(latitude, longitude))
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("place", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_place_geohash"))
+        batch_op.drop_column("geohash")
+
+    # SQLite batch mode may rebuild the table, which drops its full-text search triggers
+    _restore_search_triggers()
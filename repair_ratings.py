@@ -0,0 +1,32 @@
+"""
+Recompute the denormalized rating summaries from the review tables.
+Run: uv run python repair_ratings.py [--dry-run]
+"""
+
+import sys
+
+from sqlmodel import Session
+
+from app.db import engine
+from app.ratings import RATED_ENTITIES, recompute_rating_summaries
+
+
+def repair_ratings(dry_run: bool = False) -> int:
+    """Fix any program, place or trip whose rating summary drifted from its reviews."""
+    total = 0
+    with Session(engine) as session:
+        for entity_model, review_model, foreign_key in RATED_ENTITIES:
+            repaired = recompute_rating_summaries(session, entity_model, review_model, foreign_key)
+            print(f"✓ {entity_model.__tablename__}: {repaired} summaries out of date")
+            total += repaired
+
+        if dry_run:
+            session.rollback()
+            print("Dry run - no changes written.")
+        else:
+            session.commit()
+    return total
+
+
+if __name__ == "__main__":
+    repair_ratings(dry_run="--dry-run" in sys.argv[1:])
@@ -19,6 +19,7 @@ from app.models import (
     TripReview,
     User,
 )
+from app.ratings import RATED_ENTITIES, recompute_rating_summaries
 
 
 def seed_database():
@@ -420,6 +421,12 @@ def seed_database():
         session.commit()
         print(f"✓ Created {len(trip_reviews)} trip reviews")
 
+        # Reviews were inserted directly, so build the rating summaries from them
+        for entity_model, review_model, foreign_key in RATED_ENTITIES:
+            recompute_rating_summaries(session, entity_model, review_model, foreign_key)
+        session.commit()
+        print("✓ Computed rating summaries")
+
         print("\n✅ Database seeded successfully!")
         print("Created:")
         print(f"  - {len(users)} users")
@@ -1,23 +1,46 @@
 """Pytest configuration and fixtures for tests."""
 
-import importlib
+import asyncio
 import os
-
-import pytest
-from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
-
-from app import config
-from app.db import get_session
-from app.main import app
-
-# Set test environment variables BEFORE importing anything from app
-os.environ["DATABASE_URL"] = "sqlite:///./test.db"
+import shutil
+import tempfile
+import uuid
+
+# Set test environment variables BEFORE importing anything from app: app.db builds its
+# engines at import time, so they'd otherwise bind to the developer's ./app.db. The app's
+# own engines (lifespan, live_client, integration tests) get a throwaway database.
+APP_DATABASE_DIR = tempfile.mkdtemp(prefix="abroadly-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{APP_DATABASE_DIR}/app.db"
 os.environ["RESEND_API_KEY"] = ""  # Disable email sending in tests
 os.environ["EMAIL_FROM"] = ""
 os.environ["ALLOWED_EMAIL_DOMAINS"] = "vanderbilt.edu"  # Only allow Vanderbilt emails in tests
 
-importlib.reload(config)
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete, event, or_, select  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine  # noqa: E402
+
+from app import db as app_db  # noqa: E402
+from app.auth.magic import make_magic_token  # noqa: E402
+from app.db import get_async_session, get_session  # noqa: E402
+from app.deps import clear_user_cache  # noqa: E402
+from app.main import app  # noqa: E402
+from app.messages.unread import clear_unread_counts  # noqa: E402
+from app.models import Conversation, Message, Place, PlaceBookmark, User  # noqa: E402
+from app.search.fts import ensure_search_indexes  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def app_database():
+    """Remove the app engines' throwaway database after the run."""
+    yield
+    app_db.engine.dispose()
+    if app_db.writer_engine is not None:
+        app_db.writer_engine.dispose()
+    asyncio.run(app_db.async_engine.dispose())
+    if app_db.async_writer_engine is not None:
+        asyncio.run(app_db.async_writer_engine.dispose())
+    shutil.rmtree(APP_DATABASE_DIR, ignore_errors=True)
 
 
 # Create test database engine - use a test database file
@@ -29,6 +52,8 @@ def engine():
         "sqlite:///./test.db", echo=False, connect_args={"check_same_thread": False}
     )
     SQLModel.metadata.create_all(test_engine)
+    with test_engine.begin() as connection:
+        ensure_search_indexes(connection)
     yield test_engine
     # Clean up - drop all tables and close connections
     SQLModel.metadata.drop_all(test_engine)
@@ -55,6 +80,50 @@ def session(engine):
     connection.close()
 
 
+class AsyncSessionAdapter:
+    """Serve the async routes from the rolled-back test session.
+
+    Exposes the AsyncSession calls the routes make, so sync and async handlers
+    see the same uncommitted test data.
+    """
+
+    def __init__(self, session):
+        self._session = session
+
+    async def exec(self, statement, **kwargs):
+        return self._session.exec(statement, **kwargs)
+
+    async def execute(self, statement, *args, **kwargs):
+        return self._session.execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return self._session.scalar(statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return self._session.get(entity, ident, **kwargs)
+
+    def add(self, instance):
+        self._session.add(instance)
+
+    async def delete(self, instance):
+        self._session.delete(instance)
+
+    async def flush(self):
+        self._session.flush()
+
+    async def commit(self):
+        self._session.commit()
+
+    async def rollback(self):
+        self._session.rollback()
+
+    async def refresh(self, instance):
+        self._session.refresh(instance)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self._session, *args, **kwargs)
+
+
 @pytest.fixture
 def client(session):
     """Create a test client with overridden dependencies."""
@@ -62,12 +131,73 @@ def client(session):
     def get_test_session():
         yield session
 
+    async def get_test_async_session():
+        yield AsyncSessionAdapter(session)
+
     app.dependency_overrides[get_session] = get_test_session
+    app.dependency_overrides[get_async_session] = get_test_async_session
+    # Cached identities and counts may point at users rolled back by an earlier test
+    clear_user_cache()
+    clear_unread_counts()
 
     with TestClient(app) as test_client:
         yield test_client
 
     app.dependency_overrides.clear()
+    clear_user_cache()
+    clear_unread_counts()
+
+
+def login(client, email):
+    """Sign in through the magic link callback; return (cookies, user id)."""
+    cookies = client.get(f"/auth/callback?token={make_magic_token(email)}").cookies
+    return cookies, client.get("/auth/me", cookies=cookies).json()["id"]
+
+
+def live_login(client, name):
+    """Sign in a new uniquely named user on a live_client."""
+    email = f"{name}-{uuid.uuid4().hex[:8]}@vanderbilt.edu"
+    client.emails.append(email)
+    return login(client, email)
+
+
+@pytest.fixture
+def live_client():
+    """A client on the app's real engines: async routes run on aiosqlite, nothing overridden."""
+    clear_user_cache()
+    clear_unread_counts()
+    with TestClient(app) as test_client:
+        test_client.emails = []
+        yield test_client
+
+    # The data was really committed, so remove it again
+    with Session(app_db.engine) as session:
+        user_ids = list(
+            session.exec(select(User.id).where(User.email.in_(test_client.emails))).scalars()
+        )
+        people = or_(Message.sender_id.in_(user_ids), Message.recipient_id.in_(user_ids))
+        session.exec(delete(Conversation).where(Conversation.user_low_id.in_(user_ids)))
+        session.exec(delete(Conversation).where(Conversation.user_high_id.in_(user_ids)))
+        session.exec(delete(Message).where(people))
+        session.exec(delete(PlaceBookmark).where(PlaceBookmark.user_id.in_(user_ids)))
+        session.exec(delete(Place).where(Place.user_id.in_(user_ids)))
+        session.exec(delete(User).where(User.id.in_(user_ids)))
+        session.commit()
+    clear_user_cache()
+    clear_unread_counts()
+
+
+@pytest.fixture
+def query_counter(engine):
+    """Record every SQL statement executed against the test engine."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
 
 
 @pytest.fixture
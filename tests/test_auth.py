@@ -145,7 +145,7 @@ class TestAuthEndpoints:
         """Test requesting magic link with non-Vanderbilt email fails."""
         response = client.post("/auth/request-link", json={"email": "test@gmail.com"})
 
-        assert response.status_code == 200
+        assert response.status_code == 400
 
     def test_request_link_case_insensitive_email(self, client):
         """Test that email is case-insensitive."""
@@ -365,3 +365,30 @@ class TestReviewEndpoints:
         response = client.delete("/auth/my-reviews/program/99999", cookies=cookies)
 
         assert response.status_code == 404
+
+
+class TestCurrentUserCache:
+    """Test the per-process identity cache used by current_user."""
+
+    def test_repeat_request_skips_database(self, client, query_counter):
+        """Test that a second call with the same token is served from the cache."""
+        token = make_magic_token("cached@vanderbilt.edu")
+        cookies = client.get(f"/auth/callback?token={token}").cookies
+
+        assert client.get("/auth/me", cookies=cookies).status_code == 200
+        query_counter.clear()
+        response = client.get("/auth/me", cookies=cookies)
+
+        assert response.status_code == 200
+        assert response.json()["email"] == "cached@vanderbilt.edu"
+        assert query_counter == []
+
+    def test_profile_update_invalidates_cache(self, client):
+        """Test that /me reflects a profile update made after the user was cached."""
+        token = make_magic_token("invalidate@vanderbilt.edu")
+        cookies = client.get(f"/auth/callback?token={token}").cookies
+
+        assert client.get("/auth/me", cookies=cookies).json()["first_name"] is None
+        client.put("/auth/profile", json={"first_name": "Fresh"}, cookies=cookies)
+
+        assert client.get("/auth/me", cookies=cookies).json()["first_name"] == "Fresh"
@@ -0,0 +1,86 @@
+"""Tests for the bookmarks API."""
+
+import pytest
+
+from app.models import Place, StudyAbroadProgram, Trip
+from tests.conftest import login
+
+
+@pytest.fixture
+def alice(client):
+    return login(client, "alice@vanderbilt.edu")
+
+
+def add_entities(session, count):
+    """Insert count programs, places and trips; return their ids by kind."""
+    programs = [
+        StudyAbroadProgram(program_name=f"Program {n}", institution="I", city="C", country="UK")
+        for n in range(count)
+    ]
+    places = [
+        Place(name=f"Place {n}", category="museum", city="C", country="UK") for n in range(count)
+    ]
+    trips = [Trip(destination=f"Trip {n}", country="UK") for n in range(count)]
+    session.add_all(programs + places + trips)
+    session.commit()
+    return {
+        "programs": [program.id for program in programs],
+        "places": [place.id for place in places],
+        "trips": [trip.id for trip in trips],
+    }
+
+
+def bookmark_all(client, user, ids):
+    for kind, entity_ids in ids.items():
+        for entity_id in entity_ids:
+            response = client.post(f"/bookmarks/{kind}/{entity_id}", cookies=user[0])
+            assert response.status_code == 200
+
+
+class TestBookmarkLists:
+    """Test bookmark lists hydrated by joins."""
+
+    def test_lists_include_entities_and_ratings(self, client, session, alice):
+        """Test the per-kind lists and the combined list."""
+        ids = add_entities(session, 2)
+        place = session.get(Place, ids["places"][1])
+        place.review_count, place.rating_sum = 2, 9
+        session.commit()
+        bookmark_all(client, alice, ids)
+
+        places = client.get("/bookmarks/places", cookies=alice[0]).json()
+        assert [p["id"] for p in places] == ids["places"]
+        assert places[0]["average_rating"] is None
+        assert places[1]["average_rating"] == 4.5
+        assert places[1]["review_count"] == 2
+        assert "bookmarked_at" in places[0]
+        programs = client.get("/bookmarks/programs", cookies=alice[0]).json()
+        assert [p["program_name"] for p in programs] == ["Program 0", "Program 1"]
+        trips = client.get("/bookmarks/trips", cookies=alice[0]).json()
+        assert [t["destination"] for t in trips] == ["Trip 0", "Trip 1"]
+
+        everything = client.get("/bookmarks", cookies=alice[0]).json()
+        assert {kind: [item["id"] for item in items] for kind, items in everything.items()} == ids
+        assert everything["places"][1]["average_rating"] == 4.5
+
+    def test_only_own_bookmarks(self, client, session, alice):
+        """Test that another user's bookmarks aren't listed."""
+        bob = login(client, "bob@vanderbilt.edu")
+        ids = add_entities(session, 1)
+        bookmark_all(client, bob, ids)
+        assert client.get("/bookmarks", cookies=alice[0]).json() == {
+            "programs": [],
+            "places": [],
+            "trips": [],
+        }
+
+    def test_query_count_does_not_grow_with_bookmarks(self, client, session, alice, query_counter):
+        """Test that listing every bookmark costs the same for 1 or 15 of each kind."""
+        counts = []
+        for count in (1, 14):
+            bookmark_all(client, alice, add_entities(session, count))
+            query_counter.clear()
+            everything = client.get("/bookmarks", cookies=alice[0]).json()
+            assert len(everything["places"]) == len(counts) * 14 + 1
+            counts.append(len(query_counter))
+        assert counts[0] == counts[1]
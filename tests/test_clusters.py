@@ -0,0 +1,159 @@
+"""Tests for server-side map clustering tiles."""
+
+import time
+
+import pytest
+
+from app.auth.magic import make_magic_token
+from app.clusters import cluster_cache, tile_bounds, tile_precision
+from app.models import Place
+
+
+@pytest.fixture(autouse=True)
+def empty_cluster_cache():
+    """Start and end every test with an empty tile cache."""
+    cluster_cache.clear()
+    yield
+    cluster_cache.clear()
+
+
+def add_places(session):
+    """Add a cluster of places in Barcelona, a pair in Paris and one in Tokyo."""
+    rows = [
+        ("restaurant", 41.3851, 2.1734),
+        ("restaurant", 41.3870, 2.1700),
+        ("museum", 41.3900, 2.1650),
+        ("cafe", 48.8566, 2.3522),
+        ("museum", 48.8606, 2.3376),
+        ("museum", 35.6762, 139.6503),
+    ]
+    session.add_all(
+        Place(
+            name=f"Cluster Place {n}",
+            category=category,
+            city="Cluster City",
+            country="Cluster Country",
+            latitude=latitude,
+            longitude=longitude,
+        )
+        for n, (category, latitude, longitude) in enumerate(rows)
+    )
+    session.add(Place(name="No Coordinates", category="cafe", city="c", country="c"))
+    session.commit()
+
+
+class TestTileMath:
+    """Test tile bounds and grid precision."""
+
+    def test_world_tile(self):
+        """Test that zoom 0 is one tile covering the Web Mercator world."""
+        west, south, east, north = tile_bounds(0, 0, 0)
+        assert (west, east) == (-180, 180)
+        assert north == pytest.approx(85.0511, abs=1e-4)
+        assert south == pytest.approx(-85.0511, abs=1e-4)
+
+    def test_precision_grows_with_zoom(self):
+        """Test that deeper zooms group by longer geohash prefixes."""
+        precisions = [tile_precision(zoom) for zoom in range(0, 21)]
+        assert precisions == sorted(precisions)
+        assert precisions[0] == 1
+        assert precisions[-1] == 9
+
+
+class TestClusterTiles:
+    """Test the clusters endpoint."""
+
+    def test_world_tile_clusters(self, client, session):
+        """Test that the world tile groups places into a few clusters."""
+        add_places(session)
+
+        response = client.get("/api/places/clusters/0/0/0")
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["zoom"], data["x"], data["y"]) == (0, 0, 0)
+        clusters = data["clusters"]
+        assert sum(cluster["count"] for cluster in clusters) == 6
+        assert len(clusters) < 6
+
+        barcelona = next(c for c in clusters if c["count"] >= 3)
+        assert barcelona["top_category"] in {"restaurant", "museum"}
+        assert 41 < barcelona["latitude"] < 49
+
+    def test_zoomed_tile_splits_clusters(self, client, session):
+        """Test a city-level tile with its lone marker linked to the place."""
+        add_places(session)
+
+        # Zoom 10 and zoom 14 tiles containing central Barcelona
+        city = client.get("/api/places/clusters/10/518/382").json()["clusters"]
+        assert city == [
+            {"count": 3, "latitude": 41.38737, "longitude": 2.16947, "top_category": "restaurant"}
+        ]
+
+        clusters = client.get("/api/places/clusters/14/8290/6119").json()["clusters"]
+        assert sum(cluster["count"] for cluster in clusters) == 3
+        assert len(clusters) >= 2
+        assert all(c["top_category"] in {"restaurant", "museum"} for c in clusters)
+        lone = [c for c in clusters if c["count"] == 1]
+        assert lone and all("place_id" in c for c in lone)
+
+    def test_empty_tile(self, client, session):
+        """Test a tile with no places in it."""
+        add_places(session)
+
+        response = client.get("/api/places/clusters/3/0/7")
+        assert response.json()["clusters"] == []
+
+    def test_tile_is_cached(self, client, session, query_counter):
+        """Test that a repeated tile is served without queries."""
+        add_places(session)
+        client.get("/api/places/clusters/2/2/1")
+
+        query_counter.clear()
+        client.get("/api/places/clusters/2/2/1")
+        assert len(query_counter) == 0
+
+    def test_write_invalidates_only_affected_tiles(self, client, session):
+        """Test that a new place evicts the tiles it falls in and nothing else."""
+        add_places(session)
+        for tile in ("0/0/0", "2/3/1", "2/2/1"):
+            client.get(f"/api/places/clusters/{tile}")
+        assert (2, 3, 1) in cluster_cache
+
+        token = make_magic_token("clusters@vanderbilt.edu")
+        cookies = client.get(f"/auth/callback?token={token}").cookies
+        response = client.post(
+            "/api/places/",
+            json={
+                "name": "New Barcelona Place",
+                "category": "cafe",
+                "city": "Barcelona",
+                "country": "Spain",
+                "latitude": 41.38,
+                "longitude": 2.17,
+            },
+            cookies=cookies,
+        )
+        assert response.status_code == 201
+
+        assert (0, 0, 0) not in cluster_cache
+        assert (2, 2, 1) not in cluster_cache
+        assert (2, 3, 1) in cluster_cache  # Tokyo's tile is untouched
+        clusters = client.get("/api/places/clusters/0/0/0").json()["clusters"]
+        assert sum(cluster["count"] for cluster in clusters) == 7
+
+    def test_tile_expires(self, client, session, monkeypatch):
+        """Test that a cached tile is reclustered after the TTL, even without a local write."""
+        add_places(session)
+        client.get("/api/places/clusters/0/0/0")
+        assert (0, 0, 0) in cluster_cache
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + cluster_cache.ttl_sec + 1)
+        assert (0, 0, 0) not in cluster_cache
+        assert cluster_cache.get((0, 0, 0)) is None
+
+    def test_invalid_tiles(self, client):
+        """Test that tiles outside the grid are rejected."""
+        assert client.get("/api/places/clusters/21/0/0").status_code == 400
+        assert client.get("/api/places/clusters/2/4/0").status_code == 400
+        assert client.get("/api/places/clusters/2/0/-1").status_code == 400
@@ -0,0 +1,158 @@
+"""Tests for faceted filter counts on list endpoints."""
+
+import time
+
+import pytest
+
+from app.facets import FacetCache, facet_cache
+from app.models import Place, StudyAbroadProgram
+
+
+@pytest.fixture(autouse=True)
+def empty_facet_cache():
+    """Start and end every test with an empty facet cache."""
+    facet_cache.clear()
+    yield
+    facet_cache.clear()
+
+
+def add_programs(session):
+    """Add programs across a few countries, cities and housing types."""
+    rows = [
+        ("Spain", "Madrid", "dorm"),
+        ("Spain", "Madrid", "homestay"),
+        ("Spain", "Seville", "dorm"),
+        ("Italy", "Rome", "dorm"),
+        ("Italy", "Rome", None),
+    ]
+    session.add_all(
+        StudyAbroadProgram(
+            program_name=f"Facet Program {n}",
+            institution="Facet University",
+            city=city,
+            country=country,
+            housing_type=housing,
+        )
+        for n, (country, city, housing) in enumerate(rows)
+    )
+    session.commit()
+
+
+class TestProgramFacets:
+    """Test facet counts on the programs list."""
+
+    def test_counts_per_value(self, client, session):
+        """Test grouped counts, largest first, with nulls left out."""
+        add_programs(session)
+
+        response = client.get("/api/programs/?facets=country,housing_type&limit=2")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["items"]) == 2
+        assert data["next_cursor"] is None
+        assert data["facets"] == {
+            "country": [{"value": "Spain", "count": 3}, {"value": "Italy", "count": 2}],
+            "housing_type": [{"value": "dorm", "count": 3}, {"value": "homestay", "count": 1}],
+        }
+
+    def test_counts_respect_current_filters(self, client, session):
+        """Test that facets count only rows matching the other filters."""
+        add_programs(session)
+
+        data = client.get("/api/programs/?country=Spain&facets=city").json()
+        assert data["facets"] == {
+            "city": [{"value": "Madrid", "count": 2}, {"value": "Seville", "count": 1}]
+        }
+
+    def test_without_facets_returns_plain_list(self, client, session):
+        """Test that existing callers still get a bare list."""
+        add_programs(session)
+        assert isinstance(client.get("/api/programs/").json(), list)
+
+    def test_unknown_facet_rejected(self, client):
+        """Test that an unsupported facet name is a 400."""
+        response = client.get("/api/programs/?facets=category")
+        assert response.status_code == 400
+        assert "Unknown facet" in response.json()["detail"]
+
+    def test_cached_until_write(self, client, session, query_counter):
+        """Test that repeated requests reuse counts until a program is written."""
+        add_programs(session)
+        client.get("/api/programs/?facets=country")
+
+        query_counter.clear()
+        client.get("/api/programs/?facets=country")
+        assert len(query_counter) == 1  # the page itself; facets came from the cache
+
+        facet_cache.invalidate("program")
+        query_counter.clear()
+        client.get("/api/programs/?facets=country")
+        assert len(query_counter) == 2
+
+
+class TestPlaceAndTripFacets:
+    """Test facet counts on the places and trips lists."""
+
+    def test_place_categories(self, client, session):
+        """Test counting places per category combined with search."""
+        session.add_all(
+            [
+                Place(name="Tapas Bar", category="restaurant", city="Madrid", country="Spain"),
+                Place(name="Paella Bar", category="restaurant", city="Madrid", country="Spain"),
+                Place(name="Prado", category="museum", city="Madrid", country="Spain"),
+            ]
+        )
+        session.commit()
+
+        data = client.get("/api/places/?search=bar&facets=category").json()
+        assert data["facets"] == {"category": [{"value": "restaurant", "count": 2}]}
+
+    def test_trips_with_cursor(self, client):
+        """Test that facets combine with cursor pagination."""
+        data = client.get("/api/trips/?cursor=&facets=trip_type").json()
+        assert set(data) == {"items", "next_cursor", "facets"}
+
+
+class TestFacetCache:
+    """Test the facet cache itself."""
+
+    def test_invalidate_only_affects_kind(self):
+        """Test that a write to one entity kind keeps other kinds cached."""
+        cache = FacetCache(ttl_sec=60)
+        program_key = cache.key("program", {"city": None}, ("country",))
+        place_key = cache.key("place", {"city": None}, ("category",))
+        cache.put(program_key, {"country": []})
+        cache.put(place_key, {"category": []})
+
+        cache.invalidate("program")
+
+        assert cache.get(cache.key("program", {"city": None}, ("country",))) is None
+        assert cache.get(place_key) == {"category": []}
+
+    def test_counts_from_before_a_write_not_stored(self):
+        """Test that counts computed across an invalidation are discarded."""
+        cache = FacetCache(ttl_sec=60)
+        key = cache.key("trip", {}, ("country",))
+        cache.invalidate("trip")
+        cache.put(key, {"country": []})
+        assert cache.get(key) is None
+
+    def test_least_recently_used_evicted(self):
+        """Test that the cache stays within its size."""
+        cache = FacetCache(ttl_sec=60, maxsize=2)
+        keys = [cache.key("trip", {"country": str(n)}, ("trip_type",)) for n in range(3)]
+        for key in keys:
+            cache.put(key, {})
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[2]) == {}
+
+    def test_entries_expire(self, monkeypatch):
+        """Test that counts are recounted after the TTL, bounding cross-worker staleness."""
+        cache = FacetCache(ttl_sec=30)
+        key = cache.key("place", {}, ("city",))
+        cache.put(key, {"city": []})
+        assert cache.get(key) == {"city": []}
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+        assert cache.get(key) is None
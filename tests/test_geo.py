@@ -0,0 +1,200 @@
+"""Tests for geohash-indexed bounding box and radius queries on places."""
+
+import pytest
+
+from app.geo import cover, distance_km, encode, radius_bbox
+from app.models import Place
+from tests.conftest import login
+
+# (name, latitude, longitude)
+PLACES = [
+    ("Sagrada Familia", 41.4036, 2.1744),
+    ("Park Guell", 41.4145, 2.1527),
+    ("Montjuic", 41.3634, 2.1650),
+    ("Sitges Beach", 41.2347, 1.8110),
+    ("Louvre", 48.8606, 2.3376),
+]
+
+
+def add_places(session):
+    """Add a few places around Barcelona, one near it and one in Paris."""
+    session.add_all(
+        Place(
+            name=name,
+            category="activity",
+            city="Geo City",
+            country="Geo Country",
+            latitude=latitude,
+            longitude=longitude,
+        )
+        for name, latitude, longitude in PLACES
+    )
+    session.add(Place(name="Nowhere", category="activity", city="Geo City", country="Geo Country"))
+    session.commit()
+
+
+class TestGeohash:
+    """Test the geohash helpers."""
+
+    def test_encode_matches_reference(self):
+        """Test encoding against the published example geohash."""
+        assert encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    def test_cover_contains_points_inside_box(self):
+        """Test that every point in the box falls under one of the cover prefixes."""
+        bbox = (2.10, 41.35, 2.20, 41.42)
+        prefixes = cover(bbox)
+        assert 0 < len(prefixes) <= 32
+        for _, latitude, longitude in PLACES[:3]:
+            assert any(encode(latitude, longitude).startswith(p) for p in prefixes)
+
+    def test_radius_bbox_contains_circle(self):
+        """Test that the box around a radius reaches the radius in every direction."""
+        west, south, east, north = radius_bbox(41.39, 2.17, 5)
+        assert distance_km(41.39, 2.17, north, 2.17) == pytest.approx(5, rel=1e-6)
+        assert distance_km(41.39, 2.17, 41.39, east) >= 5
+        assert west < 2.17 < east and south < 41.39 < north
+
+    def test_geohash_set_on_insert_and_update(self, session):
+        """Test that the geohash column follows the coordinates."""
+        place = Place(name="Moving", category="x", city="c", country="c", latitude=1, longitude=2)
+        session.add(place)
+        session.commit()
+        assert place.geohash == encode(1, 2)
+
+        place.latitude, place.longitude = 48.8606, 2.3376
+        session.add(place)
+        session.commit()
+        assert place.geohash == encode(48.8606, 2.3376)
+
+        place.latitude = None
+        session.add(place)
+        session.commit()
+        assert place.geohash is None
+
+
+class TestPlacesBBox:
+    """Test bounding box filtering on the places list."""
+
+    def test_bbox_keeps_places_in_viewport(self, client, session):
+        """Test that only places inside the box are returned."""
+        add_places(session)
+
+        response = client.get("/api/places/?bbox=2.10,41.35,2.20,41.42")
+        assert response.status_code == 200
+        names = {place["name"] for place in response.json()}
+        assert names == {"Sagrada Familia", "Park Guell", "Montjuic"}
+
+    def test_bbox_across_antimeridian(self, client, session):
+        """Test a box whose west edge is east of its east edge."""
+        session.add(
+            Place(name="Fiji", category="x", city="c", country="c", latitude=-17.7, longitude=178.0)
+        )
+        session.add(
+            Place(
+                name="Samoa", category="x", city="c", country="c", latitude=-13.8, longitude=-172.1
+            )
+        )
+        session.commit()
+
+        names = {p["name"] for p in client.get("/api/places/?bbox=170,-20,-170,-10").json()}
+        assert names == {"Fiji", "Samoa"}
+
+    def test_bbox_combines_with_filters(self, client, session):
+        """Test that bbox is applied alongside the other filters."""
+        add_places(session)
+
+        response = client.get("/api/places/?bbox=0,40,3,50&search=louvre")
+        assert [place["name"] for place in response.json()] == ["Louvre"]
+
+    def test_invalid_bbox(self, client):
+        """Test that malformed or out-of-range boxes are rejected."""
+        assert client.get("/api/places/?bbox=1,2,3").status_code == 400
+        assert client.get("/api/places/?bbox=a,b,c,d").status_code == 400
+        assert client.get("/api/places/?bbox=0,50,10,40").status_code == 400
+
+
+class TestPlacesNear:
+    """Test radius queries on the places list."""
+
+    def test_near_orders_by_distance(self, client, session):
+        """Test that places within the radius come back nearest first."""
+        add_places(session)
+
+        response = client.get("/api/places/?near=41.4036,2.1744&radius_km=10")
+        assert response.status_code == 200
+        places = response.json()
+        assert [place["name"] for place in places] == [
+            "Sagrada Familia",
+            "Park Guell",
+            "Montjuic",
+        ]
+        assert places[0]["distance_km"] == 0
+        assert places[1]["distance_km"] < places[2]["distance_km"] < 10
+
+    def test_near_radius_widens_results(self, client, session):
+        """Test that a bigger radius reaches further places."""
+        add_places(session)
+
+        names = [
+            p["name"] for p in client.get("/api/places/?near=41.4036,2.1744&radius_km=50").json()
+        ]
+        assert names[-1] == "Sitges Beach"
+        assert "Louvre" not in names
+
+    def test_near_paginates_with_skip(self, client, session):
+        """Test that skip and limit slice the distance-ordered results."""
+        add_places(session)
+
+        response = client.get("/api/places/?near=41.4036,2.1744&radius_km=10&skip=1&limit=1")
+        assert [place["name"] for place in response.json()] == ["Park Guell"]
+
+    def test_near_rejects_cursor(self, client):
+        """Test that distance ordering can't be combined with keyset pagination."""
+        response = client.get("/api/places/?near=41.4,2.17&cursor=")
+        assert response.status_code == 400
+
+    def test_invalid_near(self, client):
+        """Test that malformed points and radii are rejected."""
+        assert client.get("/api/places/?near=91,0").status_code == 400
+        assert client.get("/api/places/?near=41.4").status_code == 400
+        assert client.get("/api/places/?near=41.4,2.17&radius_km=0").status_code == 422
+        assert client.get("/api/places/?near=41.4,2.17&radius_km=501").status_code == 422
+
+    def test_near_facets_count_the_circle(self, client, session):
+        """Test that facets under near count places in the radius, not the whole box."""
+        add_places(session)
+        session.add(
+            Place(
+                name="Corner",
+                category="museum",
+                city="c",
+                country="c",
+                latitude=41.49,
+                longitude=2.29,
+            )
+        )
+        session.commit()
+
+        response = client.get("/api/places/?near=41.4036,2.1744&radius_km=10&facets=category")
+        data = response.json()
+        assert [place["name"] for place in data["items"]] == [
+            "Sagrada Familia",
+            "Park Guell",
+            "Montjuic",
+        ]
+        assert data["facets"] == {"category": [{"value": "activity", "count": 3}]}
+
+    def test_near_with_search(self, client, session):
+        """Test that near keeps the full-text filter when it narrows the columns it reads."""
+        add_places(session)
+
+        response = client.get("/api/places/?near=41.4036,2.1744&radius_km=10&search=guell")
+        assert [place["name"] for place in response.json()] == ["Park Guell"]
+
+    def test_create_rejects_out_of_range_coordinates(self, client):
+        """Test that places can't be created off the globe."""
+        login(client, "geo@vanderbilt.edu")
+        place = {"name": "Off", "category": "x", "city": "c", "country": "c"}
+        assert client.post("/api/places/", json={**place, "latitude": 91}).status_code == 422
+        assert client.post("/api/places/", json={**place, "longitude": -181}).status_code == 422
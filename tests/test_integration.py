@@ -2,14 +2,22 @@
 
 import random
 
+import pytest
 from fastapi.testclient import TestClient
 
 from app.auth.magic import make_magic_token
+from app.db import init_db
 from app.main import app
 
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def app_database():
+    """Create the app tables; the module-level client never runs the lifespan hook."""
+    init_db()
+
+
 def get_authenticated_client():
     """Helper function to get an authenticated test client."""
     email = f"testuser{random.randint(10000, 99999)}@vanderbilt.edu"
@@ -440,3 +448,70 @@ class TestReviewDeletion:
 
         # Cleanup
         test_client1.delete(f"/api/programs/{program_id}", cookies=cookies1)
+
+
+class TestRatingSummary:
+    """Integration tests for the denormalized rating summary columns."""
+
+    def test_summary_follows_review_create_and_delete(self):
+        """Test that review writes keep the program's rating summary in step."""
+        test_client, cookies, email = get_authenticated_client()
+
+        program_response = test_client.post(
+            "/api/programs/",
+            json={
+                "program_name": "Summary",
+                "institution": "Test",
+                "city": "Test",
+                "country": "Test",
+            },
+            cookies=cookies,
+        )
+        program_id = program_response.json()["id"]
+
+        review_ids = []
+        for rating in (5, 3):
+            review_response = test_client.post(
+                f"/api/programs/{program_id}/reviews",
+                json={"rating": rating, "review_text": "Summary test"},
+                cookies=cookies,
+            )
+            review_ids.append(review_response.json()["id"])
+
+        program = test_client.get(f"/api/programs/{program_id}").json()
+        assert program["review_count"] == 2
+        assert program["rating_sum"] == 8
+        assert program["rating_5_count"] == 1
+        assert program["rating_3_count"] == 1
+
+        listed = test_client.get("/api/programs/?city=Test").json()
+        assert next(p for p in listed if p["id"] == program_id)["average_rating"] == 4.0
+
+        test_client.delete(f"/auth/my-reviews/program/{review_ids[0]}", cookies=cookies)
+
+        program = test_client.get(f"/api/programs/{program_id}").json()
+        assert program["review_count"] == 1
+        assert program["rating_sum"] == 3
+        assert program["rating_5_count"] == 0
+
+        # Cleanup
+        test_client.delete(f"/api/programs/{program_id}", cookies=cookies)
+
+    def test_out_of_range_rating_rejected(self):
+        """Test that ratings outside 1-5 never reach the summary histogram."""
+        test_client, cookies, email = get_authenticated_client()
+
+        trip_response = test_client.post(
+            "/api/trips/", json={"destination": "Nowhere", "country": "Test"}, cookies=cookies
+        )
+        trip_id = trip_response.json()["id"]
+
+        review_response = test_client.post(
+            f"/api/trips/{trip_id}/reviews",
+            json={"rating": 7, "review_text": "Too good"},
+            cookies=cookies,
+        )
+        assert review_response.status_code == 422
+
+        # Cleanup
+        test_client.delete(f"/api/trips/{trip_id}", cookies=cookies)
@@ -0,0 +1,647 @@
+"""Tests for the messages API."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import asyncpg
+import pytest
+
+from app.messages import events
+from app.messages import routes as message_routes
+from app.messages.events import broker
+from app.messages.routes import stream_events
+from app.messages.unread import UnreadCounterBackend, clear_unread_counts
+from app.models import Message, Place, StudyAbroadProgram, Trip, User
+from tests.conftest import AsyncSessionAdapter, login
+
+
+@pytest.fixture
+def alice(client):
+    return login(client, "alice@vanderbilt.edu")
+
+
+@pytest.fixture
+def bob(client):
+    return login(client, "bob@vanderbilt.edu")
+
+
+def add_messages(session, sender_id, recipient_id, count, **fields):
+    """Insert count messages from sender to recipient."""
+    messages = [
+        Message(
+            sender_id=sender_id,
+            recipient_id=recipient_id,
+            subject=f"Subject {n}",
+            content=f"Content {n}",
+            **fields,
+        )
+        for n in range(count)
+    ]
+    session.add_all(messages)
+    session.commit()
+    return messages
+
+
+def send(client, sender, recipient, content="Hello"):
+    """Send a message through the API; return its id."""
+    response = client.post(
+        "/messages",
+        json={"recipient_id": recipient[1], "subject": "Hi", "content": content},
+        cookies=sender[0],
+    )
+    return response.json()["message_id"]
+
+
+class TestMessageRendering:
+    """Test that message lists are rendered from batched lookups."""
+
+    def test_inbox_includes_people_and_context(self, client, session, alice, bob):
+        """Test sender, recipient and related entity names in the inbox."""
+        program = StudyAbroadProgram(
+            program_name="Oxford", institution="O", city="Oxford", country="UK"
+        )
+        place = Place(name="Eagle and Child", category="restaurant", city="Oxford", country="UK")
+        trip = Trip(destination="Edinburgh", country="UK")
+        session.add_all([program, place, trip])
+        session.commit()
+        add_messages(
+            session,
+            bob[1],
+            alice[1],
+            1,
+            related_program_id=program.id,
+            related_place_id=place.id,
+            related_trip_id=trip.id,
+        )
+
+        messages = client.get("/messages/inbox", cookies=alice[0]).json()
+        assert len(messages) == 1
+        message = messages[0]
+        assert message["sender_email"] == "bob@vanderbilt.edu"
+        assert message["sender_name"] == "bob"
+        assert message["recipient_email"] == "alice@vanderbilt.edu"
+        assert message["related_program_name"] == "Oxford"
+        assert message["related_place_name"] == "Eagle and Child"
+        assert message["related_trip_name"] == "Edinburgh"
+
+    def test_query_count_does_not_grow_with_messages(
+        self, client, session, alice, bob, query_counter
+    ):
+        """Test that a large inbox renders in a fixed number of queries."""
+        place = Place(name="Cafe", category="cafe", city="Oxford", country="UK")
+        session.add(place)
+        session.commit()
+
+        counts = []
+        for added, total in ((2, 2), (38, 40)):
+            add_messages(session, bob[1], alice[1], added, related_place_id=place.id)
+            client.get("/messages/inbox", cookies=alice[0])
+            query_counter.clear()
+            assert len(client.get("/messages/inbox", cookies=alice[0]).json()) == total
+            counts.append(len(query_counter))
+        assert counts[0] == counts[1]
+
+    def test_sent_and_conversation(self, client, session, alice, bob):
+        """Test the sent list and a two-way conversation."""
+        add_messages(session, alice[1], bob[1], 2)
+        add_messages(session, bob[1], alice[1], 1)
+
+        sent = client.get("/messages/sent", cookies=alice[0]).json()
+        assert {m["recipient_email"] for m in sent} == {"bob@vanderbilt.edu"}
+        assert len(sent) == 2
+
+        conversation = client.get(f"/messages/conversation/{bob[1]}", cookies=alice[0]).json()
+        assert len(conversation) == 3
+        assert {m["sender_email"] for m in conversation} == {
+            "alice@vanderbilt.edu",
+            "bob@vanderbilt.edu",
+        }
+
+    def test_missing_related_entity(self, client, session, alice, bob):
+        """Test that a deleted related place renders with no name."""
+        place = Place(name="Gone", category="cafe", city="Oxford", country="UK")
+        session.add(place)
+        session.commit()
+        message = add_messages(session, bob[1], alice[1], 1, related_place_id=place.id)[0]
+        session.delete(place)
+        session.commit()
+
+        response = client.get(f"/messages/{message.id}", cookies=alice[0]).json()
+        assert response["related_place_id"] == message.related_place_id
+        assert response["related_place_name"] is None
+        assert response["read"] is True
+
+
+class TestMessagePagination:
+    """Test cursor pagination and incremental sync of message lists."""
+
+    def walk(self, client, url, cookies):
+        """Follow next_cursor to the end; return the subjects of every page."""
+        pages, cursor = [], ""
+        while cursor is not None:
+            separator = "&" if "?" in url else "?"
+            body = client.get(f"{url}{separator}cursor={cursor}", cookies=cookies).json()
+            pages.append([message["subject"] for message in body["items"]])
+            cursor = body["next_cursor"]
+        return pages
+
+    def test_inbox_pages_newest_first(self, client, session, alice, bob):
+        """Test that inbox pages walk (created_at, id) backwards without gaps."""
+        add_messages(session, bob[1], alice[1], 5)
+
+        pages = self.walk(client, "/messages/inbox?limit=2", alice[0])
+        assert pages == [
+            ["Subject 4", "Subject 3"],
+            ["Subject 2", "Subject 1"],
+            ["Subject 0"],
+        ]
+
+    def test_unread_inbox_and_sent_pages(self, client, session, alice, bob):
+        """Test the unread filter and the sent list under pagination."""
+        messages = add_messages(session, bob[1], alice[1], 4)
+        messages[1].read = True
+        session.add(messages[1])
+        session.commit()
+
+        pages = self.walk(client, "/messages/inbox?unread_only=true&limit=2", alice[0])
+        assert pages == [["Subject 3", "Subject 2"], ["Subject 0"]]
+        assert self.walk(client, "/messages/sent?limit=3", bob[0]) == [
+            ["Subject 3", "Subject 2", "Subject 1"],
+            ["Subject 0"],
+        ]
+
+    def test_conversation_pages_oldest_first(self, client, session, alice, bob):
+        """Test that a conversation pages forward in time."""
+        add_messages(session, bob[1], alice[1], 3)
+
+        pages = self.walk(client, f"/messages/conversation/{bob[1]}?limit=2", alice[0])
+        assert pages == [["Subject 0", "Subject 1"], ["Subject 2"]]
+
+    def test_since_returns_only_newer_messages(self, client, session, alice, bob):
+        """Test incremental sync with since."""
+        start = datetime(2026, 1, 1, 12, 0, 0)
+        for n in range(4):
+            add_messages(session, bob[1], alice[1], 1, created_at=start + timedelta(minutes=n))
+
+        since = (start + timedelta(minutes=1)).isoformat()
+        inbox = client.get(f"/messages/inbox?since={since}", cookies=alice[0]).json()
+        assert len(inbox) == 2
+        assert inbox[0]["created_at"] > inbox[1]["created_at"] > since
+
+        # Timezone-aware values are compared in UTC
+        aware = (start + timedelta(minutes=2)).isoformat() + "%2B00:00"
+        conversation = client.get(
+            f"/messages/conversation/{bob[1]}?since={aware}", cookies=alice[0]
+        ).json()
+        assert len(conversation) == 1
+
+    def test_legacy_list_and_bad_cursor(self, client, session, alice, bob):
+        """Test that plain calls still get a bare list and bad cursors a 400."""
+        add_messages(session, bob[1], alice[1], 3)
+
+        inbox = client.get("/messages/inbox?limit=2", cookies=alice[0]).json()
+        assert [message["subject"] for message in inbox] == ["Subject 2", "Subject 1"]
+        assert client.get("/messages/inbox?cursor=nope", cookies=alice[0]).status_code == 400
+
+
+class TestUnreadCount:
+    """Test the cached unread counter."""
+
+    def unread(self, client, cookies):
+        return client.get("/messages/unread-count", cookies=cookies).json()["unread_count"]
+
+    def test_polling_skips_message_table(self, client, session, alice, bob, query_counter):
+        """Test that only the first poll counts rows."""
+        add_messages(session, bob[1], alice[1], 3)
+        assert self.unread(client, alice[0]) == 3
+        assert any("count(" in statement.lower() for statement in query_counter)
+
+        query_counter.clear()
+        assert self.unread(client, alice[0]) == 3
+        assert not any("message" in statement.lower() for statement in query_counter)
+
+    def test_counter_follows_message_routes(self, client, session, alice, bob):
+        """Test send, view, mark read, conversation and delete against a fresh COUNT."""
+        assert self.unread(client, alice[0]) == 0
+        first, second, third, _ = (send(client, bob, alice) for _ in range(4))
+        assert self.unread(client, alice[0]) == 4
+
+        client.get(f"/messages/{first}", cookies=alice[0])
+        assert self.unread(client, alice[0]) == 3
+        client.put(f"/messages/{second}/read", cookies=alice[0])
+        client.put(f"/messages/{second}/read", cookies=alice[0])  # already read
+        assert self.unread(client, alice[0]) == 2
+        client.delete(f"/messages/{third}", cookies=bob[0])
+        assert self.unread(client, alice[0]) == 1
+        client.get(f"/messages/conversation/{bob[1]}", cookies=alice[0])
+        assert self.unread(client, alice[0]) == 0
+
+        send(client, bob, alice)
+        cached = self.unread(client, alice[0])
+        clear_unread_counts()
+        assert cached == self.unread(client, alice[0]) == 1
+
+    def test_incomplete_backend_rejected(self):
+        """Test that a counter backend missing a method fails before it's installed."""
+
+        class NoAdjust(UnreadCounterBackend):
+            def get(self, user_id):
+                return None
+
+            def set(self, user_id, count):
+                pass
+
+            def clear(self):
+                pass
+
+        with pytest.raises(TypeError, match="adjust"):
+            NoAdjust()
+
+
+class TestConversations:
+    """Test the materialized conversation list."""
+
+    def conversations(self, client, user):
+        return client.get("/messages/conversations", cookies=user[0]).json()
+
+    def test_latest_message_and_unread_counts(self, client, alice, bob):
+        """Test that both sides see the latest message and their own unread count."""
+        send(client, bob, alice, "First")
+        latest = send(client, bob, alice, "Second  message\nwith   spacing")
+
+        (for_alice,) = self.conversations(client, alice)
+        assert for_alice["other_user_id"] == bob[1]
+        assert for_alice["other_user_name"] == "bob"
+        assert for_alice["last_message_id"] == latest
+        assert for_alice["last_sender_id"] == bob[1]
+        assert for_alice["preview"] == "Second message with spacing"
+        assert for_alice["unread_count"] == 2
+        (for_bob,) = self.conversations(client, bob)
+        assert for_bob["other_user_id"] == alice[1]
+        assert for_bob["id"] == for_alice["id"]
+        assert for_bob["unread_count"] == 0
+
+        reply = send(client, alice, bob, "x" * 200)
+        (for_bob,) = self.conversations(client, bob)
+        assert for_bob["last_message_id"] == reply
+        assert for_bob["unread_count"] == 1
+        assert len(for_bob["preview"]) == 140
+        assert for_bob["preview"].endswith("…")
+
+    def test_read_paths_lower_unread_count(self, client, alice, bob):
+        """Test viewing, marking read and opening the conversation."""
+        first, second, _, _ = (send(client, bob, alice) for _ in range(4))
+        client.get(f"/messages/{first}", cookies=alice[0])
+        assert self.conversations(client, alice)[0]["unread_count"] == 3
+        client.put(f"/messages/{second}/read", cookies=alice[0])
+        client.put(f"/messages/{second}/read", cookies=alice[0])  # already read
+        assert self.conversations(client, alice)[0]["unread_count"] == 2
+        client.get(f"/messages/conversation/{bob[1]}", cookies=alice[0])
+        assert self.conversations(client, alice)[0]["unread_count"] == 0
+
+    def test_delete_rolls_back_to_previous_message(self, client, alice, bob):
+        """Test that deleting the latest message shows the one before, or drops the entry."""
+        first = send(client, bob, alice, "First")
+        second = send(client, bob, alice, "Second")
+
+        client.delete(f"/messages/{second}", cookies=bob[0])
+        (conversation,) = self.conversations(client, alice)
+        assert conversation["last_message_id"] == first
+        assert conversation["preview"] == "First"
+        assert conversation["unread_count"] == 1
+
+        client.delete(f"/messages/{first}", cookies=alice[0])
+        assert self.conversations(client, alice) == []
+
+    def test_most_recent_first_with_cursor(self, client, alice, bob):
+        """Test ordering by activity and keyset pages."""
+        carol = login(client, "carol@vanderbilt.edu")
+        send(client, alice, bob)
+        send(client, alice, carol)
+        send(client, bob, alice)
+
+        page = client.get(
+            "/messages/conversations", params={"cursor": "", "limit": 1}, cookies=alice[0]
+        ).json()
+        assert [c["other_user_id"] for c in page["items"]] == [bob[1]]
+        page = client.get(
+            "/messages/conversations",
+            params={"cursor": page["next_cursor"], "limit": 1},
+            cookies=alice[0],
+        ).json()
+        assert [c["other_user_id"] for c in page["items"]] == [carol[1]]
+        assert page["next_cursor"] is None
+        assert [c["other_user_id"] for c in self.conversations(client, carol)] == [alice[1]]
+
+    def test_list_is_one_query(self, client, alice, query_counter):
+        """Test that the thread list costs the same however many conversations there are."""
+        counts = []
+        for n in range(2):
+            for i in range(5 * n + 1):
+                send(client, login(client, f"pen{n}{i}@vanderbilt.edu"), alice)
+            query_counter.clear()
+            self.conversations(client, alice)
+            counts.append(len(query_counter))
+        assert counts[0] == counts[1]
+        assert sum("conversation" in statement.lower() for statement in query_counter) == 1
+
+
+class TestMarkRead:
+    """Test set-based read marking."""
+
+    def unread(self, client, user):
+        return client.get("/messages/unread-count", cookies=user[0]).json()["unread_count"]
+
+    def mark(self, client, user, **body):
+        return client.put("/messages/read", json=body, cookies=user[0])
+
+    def test_conversation_marks_in_one_update(self, client, session, alice, bob, query_counter):
+        """Test that opening a long thread issues a single message UPDATE."""
+        add_messages(session, bob[1], alice[1], 30)
+        add_messages(session, alice[1], bob[1], 2)
+        query_counter.clear()
+        messages = client.get(f"/messages/conversation/{bob[1]}", cookies=alice[0]).json()
+        updates = [s for s in query_counter if s.lower().startswith("update message")]
+        assert len(updates) == 1
+        assert all(m["read"] for m in messages if m["recipient_id"] == alice[1])
+        assert self.unread(client, alice) == 0
+
+    def test_mark_ids(self, client, session, alice, bob):
+        """Test marking chosen ids, skipping other people's messages."""
+        mine = [send(client, bob, alice) for _ in range(3)]
+        theirs = send(client, alice, bob)
+        response = self.mark(client, alice, ids=[mine[0], mine[2], theirs])
+        assert response.status_code == 200
+        assert response.json()["message_ids"] == [mine[0], mine[2]]
+        assert self.unread(client, alice) == 1
+        assert self.unread(client, bob) == 1
+        conversations = client.get("/messages/conversations", cookies=alice[0]).json()
+        assert conversations[0]["unread_count"] == 1
+
+        # Marking again changes nothing
+        assert self.mark(client, alice, ids=[mine[0]]).json()["message_ids"] == []
+        assert self.mark(client, alice, ids=[]).json()["message_ids"] == []
+        assert self.unread(client, alice) == 1
+
+    def test_mark_up_to(self, client, session, alice, bob):
+        """Test marking a message and everything older, optionally from one sender."""
+        carol = login(client, "carol@vanderbilt.edu")
+        start = datetime(2026, 1, 1)
+        from_bob = add_messages(session, bob[1], alice[1], 3)
+        from_carol = add_messages(session, carol[1], alice[1], 2)
+        for n, message in enumerate(from_bob + from_carol):
+            message.created_at = start + timedelta(minutes=[0, 2, 4, 1, 3][n])
+        session.commit()
+
+        response = self.mark(client, alice, up_to=from_bob[1].id, sender_id=bob[1])
+        assert response.json()["message_ids"] == [from_bob[0].id, from_bob[1].id]
+        response = self.mark(client, alice, up_to=from_carol[1].id)
+        assert response.json()["message_ids"] == [from_carol[0].id, from_carol[1].id]
+        assert self.unread(client, alice) == 1
+
+    def test_bad_requests(self, client, session, alice, bob):
+        """Test the body validation and access checks."""
+        carol = login(client, "carol@vanderbilt.edu")
+        (message,) = add_messages(session, bob[1], carol[1], 1)
+        assert self.mark(client, alice).status_code == 400
+        assert self.mark(client, alice, ids=[1], up_to=1).status_code == 400
+        assert self.mark(client, alice, up_to=999999).status_code == 404
+        assert self.mark(client, alice, up_to=message.id).status_code == 403
+
+
+class TestThreads:
+    """Test reply thread retrieval."""
+
+    def reply(self, session, parent, sender_id, recipient_id, minutes):
+        message = Message(
+            sender_id=sender_id,
+            recipient_id=recipient_id,
+            subject="Re",
+            content="Reply",
+            parent_message_id=parent.id,
+            created_at=datetime(2026, 1, 1) + timedelta(minutes=minutes),
+        )
+        session.add(message)
+        session.commit()
+        return message
+
+    def test_tree_order_and_depth(self, client, session, alice, bob):
+        """Test that any message returns the whole tree depth-first, siblings oldest first."""
+        (root,) = add_messages(session, bob[1], alice[1], 1, created_at=datetime(2026, 1, 1))
+        late = self.reply(session, root, alice[1], bob[1], minutes=9)
+        early = self.reply(session, root, alice[1], bob[1], minutes=1)
+        nested = self.reply(session, early, bob[1], alice[1], minutes=2)
+        deepest = self.reply(session, nested, alice[1], bob[1], minutes=3)
+
+        body = client.get(f"/messages/{deepest.id}/thread", cookies=bob[0]).json()
+        assert body["root_id"] == root.id
+        listed = [(m["id"], m["depth"], m["reply_count"]) for m in body["messages"]]
+        assert listed == [
+            (root.id, 0, 2),
+            (early.id, 1, 1),
+            (nested.id, 2, 1),
+            (deepest.id, 3, 0),
+            (late.id, 1, 0),
+        ]
+        assert body["messages"][1]["sender_email"] == "alice@vanderbilt.edu"
+
+    def test_hides_other_peoples_replies(self, client, session, alice, bob):
+        """Test that replies between other users are left out."""
+        carol = login(client, "carol@vanderbilt.edu")
+        (root,) = add_messages(session, bob[1], alice[1], 1)
+        aside = self.reply(session, root, alice[1], carol[1], minutes=1)
+        answer = self.reply(session, aside, carol[1], alice[1], minutes=2)
+
+        bob_view = client.get(f"/messages/{root.id}/thread", cookies=bob[0]).json()
+        assert [m["id"] for m in bob_view["messages"]] == [root.id]
+        # With the root hidden, carol's part of the thread is indented from the top level
+        carol_view = client.get(f"/messages/{answer.id}/thread", cookies=carol[0]).json()
+        assert [(m["id"], m["depth"]) for m in carol_view["messages"]] == [
+            (aside.id, 0),
+            (answer.id, 1),
+        ]
+        assert client.get(f"/messages/{root.id}/thread", cookies=carol[0]).status_code == 403
+        assert client.get("/messages/999999/thread", cookies=carol[0]).status_code == 404
+
+    def test_query_count_does_not_grow_with_thread(
+        self, client, session, alice, bob, query_counter
+    ):
+        """Test that deep and wide threads cost the same number of queries."""
+        counts = []
+        for size in (2, 20):
+            (root,) = add_messages(session, bob[1], alice[1], 1)
+            parent = root
+            for n in range(size):
+                parent = self.reply(session, parent if n % 2 else root, alice[1], bob[1], n)
+            query_counter.clear()
+            body = client.get(f"/messages/{parent.id}/thread", cookies=alice[0]).json()
+            assert len(body["messages"]) == size + 1
+            counts.append(len(query_counter))
+        assert counts[0] == counts[1]
+
+
+class FakeListenConnection:
+    """The asyncpg connection calls the Postgres broker makes, with a way to drop it."""
+
+    def __init__(self):
+        self.closed = False
+        self.executed = []
+        self.termination_listeners = []
+
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+
+    async def add_listener(self, channel, callback):
+        self.notify = lambda payload: callback(self, 1, channel, payload)
+
+    async def execute(self, *args):
+        self.executed.append(args)
+
+    def is_closed(self):
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+
+    def drop(self):
+        self.terminate()
+        for callback in self.termination_listeners:
+            callback(self)
+
+
+class FakeRequest:
+    """Stands in for the streaming request: connected for a fixed number of checks."""
+
+    def __init__(self, checks):
+        self.checks = checks
+
+    async def is_disconnected(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+class TestMessageStream:
+    """Test the server-sent events channel."""
+
+    def test_broker_fans_out_per_user(self):
+        """Test that events reach only the target user's streams, from any thread."""
+
+        async def scenario():
+            first, second = broker.subscribe(101), broker.subscribe(101)
+            other = broker.subscribe(102)
+            await asyncio.to_thread(broker.publish, 101, {"type": "message", "id": 1})
+            events = [await asyncio.wait_for(s.queue.get(), 1) for s in (first, second)]
+            for subscription in (first, second, other):
+                broker.unsubscribe(subscription)
+            return events, other.queue.empty(), broker.connected(101)
+
+        events, other_empty, connected = asyncio.run(scenario())
+        assert events == [{"type": "message", "id": 1}] * 2
+        assert other_empty
+        assert connected == 0
+
+    def test_send_and_read_publish_events(self, client, session, alice, bob):
+        """Test message events for the recipient and read receipts for the sender."""
+
+        async def scenario():
+            alice_stream, bob_stream = broker.subscribe(alice[1]), broker.subscribe(bob[1])
+            response = await asyncio.to_thread(
+                client.post,
+                "/messages",
+                json={"recipient_id": alice[1], "subject": "Hi", "content": "Hello"},
+                cookies=bob[0],
+            )
+            message_id = response.json()["message_id"]
+            await asyncio.to_thread(client.put, f"/messages/{message_id}/read", cookies=alice[0])
+            received = [await asyncio.wait_for(alice_stream.queue.get(), 1) for _ in range(2)]
+            receipt = await asyncio.wait_for(bob_stream.queue.get(), 1)
+            broker.unsubscribe(alice_stream)
+            broker.unsubscribe(bob_stream)
+            return message_id, received, receipt
+
+        message_id, received, receipt = asyncio.run(scenario())
+        assert received[0]["type"] == "message"
+        assert received[0]["id"] == message_id
+        assert received[0]["sender_id"] == bob[1]
+        read = {"type": "read", "reader_id": alice[1], "message_ids": [message_id]}
+        assert received[1] == read
+        assert receipt == read
+
+    def test_postgres_broker_reconnects(self, monkeypatch):
+        """Test LISTEN retries with backoff, keeps publishing, and resyncs after a drop."""
+        connections = [FakeListenConnection(), FakeListenConnection()]
+        attempts = []
+
+        async def connect(dsn):
+            attempts.append(dsn)
+            if len(attempts) == 1:
+                raise OSError("connection refused")
+            return connections[len(attempts) - 2]
+
+        monkeypatch.setattr(asyncpg, "connect", connect)
+        monkeypatch.setattr(events, "RECONNECT_MIN_SEC", 0.01)
+
+        async def until(condition):
+            for _ in range(200):
+                if condition():
+                    return
+                await asyncio.sleep(0.01)
+            raise AssertionError("timed out")
+
+        async def scenario():
+            postgres = events.PostgresMessageBroker("postgresql+psycopg2://u:p@db/abroadly")
+            stream = postgres.subscribe(5)
+            await postgres.start()
+            first, second = connections
+            await until(lambda: postgres._connection is first)
+
+            postgres.publish(5, {"type": "message", "id": 1})
+            await until(lambda: first.executed)
+            first.notify(first.executed[0][2])
+            delivered = await asyncio.wait_for(stream.queue.get(), 1)
+
+            first.drop()
+            await until(lambda: postgres._connection is second)
+            resync = await asyncio.wait_for(stream.queue.get(), 1)
+            await postgres.stop()
+            return attempts, delivered, resync, second.closed
+
+        attempts, delivered, resync, closed = asyncio.run(scenario())
+        assert attempts == ["postgresql://u:p@db/abroadly"] * 3
+        assert delivered == {"type": "message", "id": 1}
+        assert resync == {"type": "resync"}
+        assert closed
+
+    def test_stream_frames(self, session, alice, bob, monkeypatch):
+        """Test the stream's opening unread count and a pushed event."""
+        add_messages(session, bob[1], alice[1], 2)
+        sessions = []
+
+        @asynccontextmanager
+        async def short_session():
+            sessions.append("open")
+            yield AsyncSessionAdapter(session)
+            sessions.append("closed")
+
+        monkeypatch.setattr(message_routes, "async_session", short_session)
+
+        async def scenario():
+            user = User(id=alice[1], email="alice@vanderbilt.edu")
+            response = await stream_events(FakeRequest(checks=1), user=user)
+            frames = response.body_iterator
+            opening = await frames.__anext__()
+            # The count's session is already released while the stream waits for events
+            assert sessions == ["open", "closed"]
+            broker.publish(alice[1], {"type": "message", "id": 7})
+            pushed = await frames.__anext__()
+            remaining = [frame async for frame in frames]
+            return response, opening, pushed, remaining
+
+        response, opening, pushed, remaining = asyncio.run(scenario())
+        assert response.media_type == "text/event-stream"
+        assert opening.startswith("retry: 5000\n\n")
+        assert 'event: unread_count\ndata: {"type": "unread_count", "unread_count": 2}' in opening
+        assert pushed == 'event: message\ndata: {"type": "message", "id": 7}\n\n'
+        assert remaining == []
+        assert broker.connected(alice[1]) == 0
@@ -0,0 +1,226 @@
+"""Tests for the nearest-places index and the program nearby-places endpoint."""
+
+import random
+import time
+
+import pytest
+
+from app.auth.magic import make_magic_token
+from app.geo import distance_km
+from app.models import Place, StudyAbroadProgram
+from app.nearby import PlaceTree, place_tree
+
+
+@pytest.fixture(autouse=True)
+def empty_place_tree():
+    """Start and end every test with an empty place index."""
+    place_tree.clear()
+    yield
+    place_tree.clear()
+
+
+def brute_force(points, latitude, longitude, k):
+    """Reference answer: sort every point by haversine distance."""
+    ranked = sorted(
+        (distance_km(latitude, longitude, lat, lng), place_id)
+        for place_id, (lat, lng) in points.items()
+    )
+    return [place_id for _, place_id in ranked[:k]]
+
+
+class TestPlaceTree:
+    """Test the KD-tree index on its own."""
+
+    def test_matches_brute_force(self, session):
+        """Test k-nearest results against a full sort, including pending changes."""
+        rng = random.Random(17)
+        points = {n: (rng.uniform(-80, 80), rng.uniform(-180, 180)) for n in range(1, 301)}
+        tree = PlaceTree()
+        for place_id, (lat, lng) in points.items():
+            tree.set(place_id, lat, lng)
+
+        # Moves and removals land in the pending list and tombstones until the next rebuild
+        for place_id in range(1, 21):
+            points[place_id] = (rng.uniform(-80, 80), rng.uniform(-180, 180))
+            tree.set(place_id, *points[place_id])
+        for place_id in range(21, 31):
+            del points[place_id]
+            tree.remove(place_id)
+        assert len(tree) == 290
+
+        for _ in range(25):
+            lat, lng = rng.uniform(-80, 80), rng.uniform(-180, 180)
+            hits = tree.nearest(lat, lng, 7)
+            assert [place_id for _, place_id in hits] == brute_force(points, lat, lng, 7)
+            for distance, place_id in hits:
+                assert distance == pytest.approx(distance_km(lat, lng, *points[place_id]), abs=1e-6)
+
+    def test_across_antimeridian(self):
+        """Test that neighbours on the other side of the 180th meridian are found."""
+        tree = PlaceTree()
+        tree.set(1, -17.7, 178.0)  # Fiji
+        tree.set(2, -13.8, -172.1)  # Samoa
+        tree.set(3, 51.5, -0.1)  # London
+
+        hits = tree.nearest(-15.0, -179.5, 2)
+        assert [place_id for _, place_id in hits] == [1, 2]
+
+    def test_max_km_and_removal(self):
+        """Test the distance cap and that places without coordinates drop out."""
+        tree = PlaceTree()
+        tree.set(1, 41.3851, 2.1734)
+        tree.set(2, 41.4036, 2.1744)
+        tree.set(3, 48.8566, 2.3522)
+
+        assert [place_id for _, place_id in tree.nearest(41.39, 2.17, 5, max_km=10)] == [1, 2]
+        tree.set(2, None, None)
+        assert [place_id for _, place_id in tree.nearest(41.39, 2.17, 5)] == [1, 3]
+
+    def test_rebuild_due_after_ttl(self, session, monkeypatch):
+        """Test that one caller claims the rebuild once the TTL runs out."""
+        tree = PlaceTree(ttl_sec=60)
+        tree.rebuild(session)
+        assert not tree.due()
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+        assert tree.due()
+        assert not tree.due()
+        assert not PlaceTree().due()
+
+
+class TestNearbyPlaces:
+    """Test GET /api/programs/{id}/nearby-places."""
+
+    def add_program_and_places(self, session):
+        program = StudyAbroadProgram(
+            program_name="Barcelona Semester",
+            institution="UB",
+            city="Barcelona",
+            country="Spain",
+            latitude=41.3870,
+            longitude=2.1700,
+        )
+        session.add(program)
+        session.add_all(
+            [
+                Place(
+                    name="Close",
+                    category="cafe",
+                    city="Barcelona",
+                    country="Spain",
+                    latitude=41.3875,
+                    longitude=2.1705,
+                    rating_sum=9,
+                    review_count=2,
+                ),
+                Place(
+                    name="Nearby",
+                    category="museum",
+                    city="Barcelona",
+                    country="Spain",
+                    latitude=41.4036,
+                    longitude=2.1744,
+                ),
+                Place(
+                    name="Far",
+                    category="museum",
+                    city="Paris",
+                    country="France",
+                    latitude=48.8606,
+                    longitude=2.3376,
+                ),
+                Place(name="Unmapped", category="bar", city="Barcelona", country="Spain"),
+            ]
+        )
+        session.commit()
+        place_tree.rebuild(session)
+        return program
+
+    def test_nearest_first_with_ratings(self, client, session, query_counter):
+        """Test ordering, distances and rating summaries in two queries."""
+        program = self.add_program_and_places(session)
+
+        query_counter.clear()
+        response = client.get(f"/api/programs/{program.id}/nearby-places?k=2")
+        assert response.status_code == 200
+        places = response.json()
+        assert [place["name"] for place in places] == ["Close", "Nearby"]
+        assert places[0]["average_rating"] == 4.5
+        assert places[0]["review_count"] == 2
+        assert places[0]["distance_km"] < places[1]["distance_km"] < 3
+        assert len(query_counter) == 2  # the program, then the places
+
+    def test_max_km(self, client, session):
+        """Test that max_km leaves out places further away."""
+        program = self.add_program_and_places(session)
+
+        places = client.get(f"/api/programs/{program.id}/nearby-places?max_km=1").json()
+        assert [place["name"] for place in places] == ["Close"]
+
+    def test_index_follows_place_writes(self, client, session):
+        """Test that place routes keep the index current without a rebuild."""
+        program = self.add_program_and_places(session)
+        cookies = client.get(
+            f"/auth/callback?token={make_magic_token('nearby@vanderbilt.edu')}"
+        ).cookies
+
+        created = client.post(
+            "/api/places/",
+            json={
+                "name": "Closest",
+                "category": "bar",
+                "city": "Barcelona",
+                "country": "Spain",
+                "latitude": 41.3870,
+                "longitude": 2.1701,
+            },
+            cookies=cookies,
+        ).json()
+        url = f"/api/programs/{program.id}/nearby-places?k=1"
+        assert client.get(url).json()[0]["name"] == "Closest"
+
+        client.put(f"/api/places/{created['id']}", json={"latitude": 10.0}, cookies=cookies)
+        assert client.get(url).json()[0]["name"] == "Close"
+
+        close_id = client.get(url).json()[0]["id"]
+        client.delete(f"/api/places/{close_id}", cookies=cookies)
+        assert client.get(url).json()[0]["name"] == "Nearby"
+
+    def test_rebuilt_after_ttl(self, client, session, monkeypatch):
+        """Test that places written by another worker show up once the tree expires."""
+        program = self.add_program_and_places(session)
+        monkeypatch.setattr(place_tree, "ttl_sec", 60)
+        place_tree.rebuild(session)
+        # Inserted without the place routes, as a write on another worker would be
+        session.add(
+            Place(
+                name="Elsewhere",
+                category="bar",
+                city="Barcelona",
+                country="Spain",
+                latitude=41.3870,
+                longitude=2.1701,
+            )
+        )
+        session.commit()
+        url = f"/api/programs/{program.id}/nearby-places?k=1"
+        assert client.get(url).json()[0]["name"] == "Close"
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+        assert client.get(url).json()[0]["name"] == "Elsewhere"
+
+    def test_program_without_coordinates(self, client, session):
+        """Test that a program with no coordinates has no nearby places."""
+        program = StudyAbroadProgram(program_name="P", institution="I", city="C", country="C")
+        session.add(program)
+        session.commit()
+
+        response = client.get(f"/api/programs/{program.id}/nearby-places")
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_missing_program(self, client):
+        """Test a 404 for an unknown program."""
+        assert client.get("/api/programs/999999/nearby-places").status_code == 404
@@ -1,5 +1,8 @@
 """Tests for Places API endpoints."""
 
+from app.models import Place, PlaceReview, User
+from app.ratings import recompute_rating_summaries
+
 
 class TestPlacesCRUD:
     """Test CRUD operations for places."""
@@ -166,3 +169,66 @@ class TestPlaceCategories:
         """Test filtering for museums."""
         response = client.get("/api/places/?category=museum")
         assert response.status_code == 200
+
+
+class TestPlacesQueryBudget:
+    """Test that listing places costs a constant number of queries."""
+
+    def test_list_places_rating_query_budget(self, client, session, query_counter):
+        """Test that a page of ratings is served from the summary columns in one query."""
+        user = User(email="place-budget@vanderbilt.edu")
+        session.add(user)
+        session.commit()
+        places = [
+            Place(name=f"Budget Cafe {i}", category="cafe", city="Budgetville", country="Spain")
+            for i in range(25)
+        ]
+        session.add_all(places)
+        session.commit()
+        for place in places:
+            for rating in (2, 4):
+                session.add(
+                    PlaceReview(user_id=user.id, place_id=place.id, rating=rating, review_text="ok")
+                )
+        session.commit()
+        # Reviews were inserted directly, so rebuild the summaries like the repair command
+        assert recompute_rating_summaries(session, Place, PlaceReview, "place_id") == 25
+        session.commit()
+
+        query_counter.clear()
+        response = client.get("/api/places/?city=Budgetville")
+
+        assert response.status_code == 200
+        places = response.json()
+        assert len(places) == 25
+        assert all(p["review_count"] == 2 and p["average_rating"] == 3.0 for p in places)
+        assert len(query_counter) == 1
+
+    def test_list_place_reviews_query_budget(self, client, session, query_counter):
+        """Test that a page of reviews loads all reviewers with a single extra query."""
+        place = Place(name="Reviewed Cafe", category="cafe", city="Budgetville", country="Spain")
+        session.add(place)
+        session.commit()
+        users = [
+            User(email=f"reviewer{i}@vanderbilt.edu", first_name=f"Reviewer{i}", age=20)
+            for i in range(10)
+        ]
+        session.add_all(users)
+        session.commit()
+        for user in users:
+            session.add(PlaceReview(user_id=user.id, place_id=place.id, rating=4, review_text="ok"))
+        session.commit()
+        url = f"/api/places/{place.id}/reviews"
+
+        query_counter.clear()
+        response = client.get(url)
+        statements = list(query_counter)
+
+        assert response.status_code == 200
+        reviews = response.json()
+        assert len(reviews) == 10
+        assert {r["reviewer"]["first_name"] for r in reviews} == {f"Reviewer{i}" for i in range(10)}
+        # Only the public profile is exposed
+        assert "email" not in reviews[0]["reviewer"]
+        assert "age" not in reviews[0]["reviewer"]
+        assert len(statements) <= 2
@@ -1,5 +1,9 @@
 """Tests for Programs API endpoints."""
 
+from app.models import ProgramReview, StudyAbroadProgram, User
+from app.ratings import recompute_rating_summaries
+from tests.conftest import login
+
 
 class TestProgramsCRUD:
     """Test CRUD operations for programs."""
@@ -134,3 +138,158 @@ class TestProgramValidation:
         }
         response = client.post("/api/programs/", json=incomplete_data)
         assert response.status_code in [401, 422]  # Auth or validation error
+
+
+class TestLegacyRatings:
+    """Test that stored ratings outside 1-5 stay out of the rating summary."""
+
+    def test_out_of_range_rating_skipped(self, client, session):
+        """Test that recompute ignores a legacy rating and deleting it leaves the summary alone."""
+        cookies, user_id = login(client, "legacy@vanderbilt.edu")
+        program = StudyAbroadProgram(
+            program_name="Legacy", institution="Test", city="Legacyville", country="France"
+        )
+        session.add(program)
+        session.commit()
+        legacy = ProgramReview(user_id=user_id, program_id=program.id, rating=0, review_text="x")
+        session.add_all(
+            [
+                legacy,
+                ProgramReview(user_id=user_id, program_id=program.id, rating=4, review_text="ok"),
+            ]
+        )
+        session.commit()
+        assert recompute_rating_summaries(session, StudyAbroadProgram, ProgramReview, "program_id")
+        session.commit()
+
+        response = client.delete(f"/auth/my-reviews/program/{legacy.id}", cookies=cookies)
+        assert response.status_code == 200
+
+        detail = client.get(f"/api/programs/{program.id}").json()
+        assert (detail["review_count"], detail["rating_sum"], detail["rating_4_count"]) == (1, 4, 1)
+
+
+class TestProgramsQueryBudget:
+    """Test that listing programs costs a constant number of queries."""
+
+    def test_list_programs_rating_query_budget(self, client, session, query_counter):
+        """Test that a page of ratings is served from the summary columns in one query."""
+        user = User(email="budget@vanderbilt.edu")
+        session.add(user)
+        session.commit()
+        programs = [
+            StudyAbroadProgram(
+                program_name=f"Budget Program {i}",
+                institution="Test University",
+                city="Budgetville",
+                country="France",
+            )
+            for i in range(25)
+        ]
+        session.add_all(programs)
+        session.commit()
+        for program in programs:
+            for rating in (3, 4, 5):
+                session.add(
+                    ProgramReview(
+                        user_id=user.id, program_id=program.id, rating=rating, review_text="ok"
+                    )
+                )
+        session.commit()
+        # Reviews were inserted directly, so rebuild the summaries like the repair command
+        repaired = recompute_rating_summaries(
+            session, StudyAbroadProgram, ProgramReview, "program_id"
+        )
+        assert repaired == 25
+        session.commit()
+
+        query_counter.clear()
+        response = client.get("/api/programs/?city=Budgetville")
+
+        assert response.status_code == 200
+        programs = response.json()
+        assert len(programs) == 25
+        assert all(p["review_count"] == 3 and p["average_rating"] == 4.0 for p in programs)
+        assert len(query_counter) == 1
+
+
+class TestProgramsCursorPagination:
+    """Test keyset (cursor) pagination for programs."""
+
+    def test_cursor_walks_every_program_once(self, client, session):
+        """Test that following next_cursor visits each program exactly once."""
+        session.add_all(
+            [
+                StudyAbroadProgram(
+                    program_name=f"Cursor Program {i}",
+                    institution="Test University",
+                    city="Cursorville",
+                    country="France",
+                )
+                for i in range(7)
+            ]
+        )
+        session.commit()
+
+        seen = []
+        cursor = ""
+        while cursor is not None:
+            response = client.get(
+                "/api/programs/", params={"city": "Cursorville", "limit": 3, "cursor": cursor}
+            )
+            assert response.status_code == 200
+            body = response.json()
+            assert len(body["items"]) <= 3
+            seen.extend(p["id"] for p in body["items"])
+            cursor = body["next_cursor"]
+
+        assert len(seen) == 7
+        assert len(set(seen)) == 7
+
+    def test_cursor_page_is_stable_under_inserts(self, client, session):
+        """Test that rows inserted after page one do not shift page two."""
+        session.add_all(
+            [
+                StudyAbroadProgram(
+                    program_name=f"Stable Program {i}",
+                    institution="Test University",
+                    city="Stableville",
+                    country="France",
+                )
+                for i in range(4)
+            ]
+        )
+        session.commit()
+
+        first = client.get("/api/programs/?city=Stableville&limit=2&cursor=").json()
+        session.add(
+            StudyAbroadProgram(
+                program_name="Late Program",
+                institution="Test University",
+                city="Stableville",
+                country="France",
+            )
+        )
+        session.commit()
+        second = client.get(
+            "/api/programs/",
+            params={"city": "Stableville", "limit": 2, "cursor": first["next_cursor"]},
+        ).json()
+
+        first_ids = {p["id"] for p in first["items"]}
+        assert not first_ids & {p["id"] for p in second["items"]}
+        assert [p["program_name"] for p in second["items"]] == [
+            "Stable Program 2",
+            "Stable Program 3",
+        ]
+
+    def test_invalid_cursor_rejected(self, client):
+        """Test that a malformed cursor returns 400."""
+        response = client.get("/api/programs/?cursor=not-a-cursor")
+        assert response.status_code == 400
+
+    def test_review_listing_supports_cursor(self, client):
+        """Test that review listings return the cursor envelope."""
+        response = client.get("/api/programs/1/reviews?cursor=")
+        assert response.status_code == 200
+        assert response.json()["next_cursor"] is None
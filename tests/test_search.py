@@ -0,0 +1,296 @@
+"""Tests for full-text search and autocomplete suggestions."""
+
+import time
+
+import pytest
+
+from app.auth.magic import make_magic_token
+from app.models import Place, StudyAbroadProgram, Trip
+from app.search.fts import search_terms
+from app.search.suggest import PrefixIndex, suggest_index
+
+
+def add_catalog(session):
+    """Add a small catalog of programs, places and trips."""
+    session.add_all(
+        [
+            StudyAbroadProgram(
+                program_name="Semester in Barcelona",
+                institution="Universitat de Barcelona",
+                city="Barcelona",
+                country="Spain",
+                description="Spanish language and Catalan culture",
+            ),
+            StudyAbroadProgram(
+                program_name="Art History in Florence",
+                institution="Florence University of the Arts",
+                city="Florence",
+                country="Italy",
+                description="Renaissance art with day trips to Barcelona-style markets",
+            ),
+            Place(
+                name="La Boqueria",
+                category="restaurant",
+                city="Barcelona",
+                country="Spain",
+                description="Covered food market off La Rambla",
+            ),
+            Place(name="Uffizi", category="museum", city="Florence", country="Italy"),
+            Trip(destination="Lisbon", country="Portugal", trip_type="weekend"),
+        ]
+    )
+    session.commit()
+
+
+class TestSearchTerms:
+    """Test parsing of search input."""
+
+    def test_operators_and_punctuation_dropped(self):
+        """Test that FTS syntax in user input is treated as plain words."""
+        assert search_terms('Barça "OR" city:* -Rome') == ["barça", "or", "city", "rome"]
+
+
+class TestListSearch:
+    """Test the search parameter on list endpoints."""
+
+    def test_matches_columns_other_than_name(self, client, session):
+        """Test that search covers city, institution, category and description."""
+        add_catalog(session)
+
+        assert [p["name"] for p in client.get("/api/places/?search=market").json()] == [
+            "La Boqueria"
+        ]
+        assert [p["name"] for p in client.get("/api/places/?search=museum").json()] == ["Uffizi"]
+        programs = client.get("/api/programs/?search=universitat").json()
+        assert [p["program_name"] for p in programs] == ["Semester in Barcelona"]
+
+    def test_prefix_and_all_terms(self, client, session):
+        """Test that every term must match, each as a word prefix."""
+        add_catalog(session)
+
+        places = client.get("/api/places/?search=barc").json()
+        assert [p["name"] for p in places] == ["La Boqueria"]
+        places = client.get("/api/places/?search=barc uffizi").json()
+        assert places == []
+
+    def test_results_ranked_by_relevance(self, client, session):
+        """Test that a name/city match outranks a mention in the description."""
+        add_catalog(session)
+
+        programs = client.get("/api/programs/?search=barcelona").json()
+        assert [p["program_name"] for p in programs] == [
+            "Semester in Barcelona",
+            "Art History in Florence",
+        ]
+
+    def test_search_without_terms_matches_nothing(self, client, session):
+        """Test that punctuation-only input filters everything out instead of nothing."""
+        add_catalog(session)
+
+        assert client.get("/api/places/?search=!!!").json() == []
+        assert client.get("/api/programs/?search=*").json() == []
+        assert client.get("/api/trips/?search=-&cursor=").json()["items"] == []
+
+    def test_index_follows_updates_and_deletes(self, client, session):
+        """Test that the index stays in sync when rows change."""
+        add_catalog(session)
+        trip = session.query(Trip).filter(Trip.destination == "Lisbon").one()
+
+        trip.destination = "Porto"
+        session.add(trip)
+        session.commit()
+        assert client.get("/api/trips/?search=lisbon").json() == []
+        assert [t["destination"] for t in client.get("/api/trips/?search=porto").json()] == [
+            "Porto"
+        ]
+
+        session.delete(trip)
+        session.commit()
+        assert client.get("/api/trips/?search=porto").json() == []
+
+    def test_search_with_cursor(self, client, session):
+        """Test that search combines with keyset pagination."""
+        add_catalog(session)
+
+        page = client.get("/api/places/?search=barcelona&cursor=").json()
+        assert [p["name"] for p in page["items"]] == ["La Boqueria"]
+        assert page["next_cursor"] is None
+
+
+class TestSearchEndpoint:
+    """Test the unified /api/search endpoint."""
+
+    def test_returns_typed_hits_per_entity(self, client, session):
+        """Test that one request returns minimal, typed hits for all three types."""
+        add_catalog(session)
+
+        response = client.get("/api/search?q=barcelona")
+        assert response.status_code == 200
+        data = response.json()
+        assert [hit["program_name"] for hit in data["programs"]] == [
+            "Semester in Barcelona",
+            "Art History in Florence",
+        ]
+        assert data["places"] == [
+            {
+                "type": "place",
+                "id": data["places"][0]["id"],
+                "name": "La Boqueria",
+                "category": "restaurant",
+                "city": "Barcelona",
+                "country": "Spain",
+            }
+        ]
+        assert data["trips"] == []
+
+    def test_limit_applies_per_type(self, client, session):
+        """Test that limit caps each entity list."""
+        add_catalog(session)
+
+        data = client.get("/api/search?q=barcelona&limit=1").json()
+        assert len(data["programs"]) == 1
+        assert data["programs"][0]["program_name"] == "Semester in Barcelona"
+
+    def test_query_without_terms(self, client):
+        """Test that punctuation-only input returns no hits instead of everything."""
+        data = client.get("/api/search?q=***").json()
+        assert data == {"programs": [], "places": [], "trips": []}
+
+    def test_query_required(self, client):
+        """Test that q is required."""
+        assert client.get("/api/search").status_code == 422
+
+    def test_one_query_per_entity_type(self, client, session, query_counter):
+        """Test that a search costs three queries however many rows match."""
+        add_catalog(session)
+
+        query_counter.clear()
+        response = client.get("/api/search?q=barcelona")
+
+        assert response.status_code == 200
+        assert len(query_counter) == 3
+
+
+@pytest.fixture
+def suggestions(session):
+    """Build the suggestion index from the test database, as startup does."""
+    add_catalog(session)
+    suggest_index.rebuild(session)
+    yield suggest_index
+    suggest_index.clear()
+
+
+class TestPrefixIndex:
+    """Test the in-memory autocomplete index."""
+
+    def test_prefix_lookup_folds_case_and_accents(self):
+        """Test that lookups ignore case and diacritics."""
+        index = PrefixIndex()
+        index.add([("city", "Barcelona"), ("city", "Bari"), ("city", "Zürich")])
+
+        assert index.suggest("BAR") == [
+            {"field": "city", "value": "Barcelona"},
+            {"field": "city", "value": "Bari"},
+        ]
+        assert index.suggest("zur") == [{"field": "city", "value": "Zürich"}]
+        assert index.suggest("  ") == []
+
+    def test_values_are_reference_counted(self):
+        """Test that a value stays until the last row using it is removed."""
+        index = PrefixIndex()
+        index.add([("country", "Spain")])
+        index.add([("country", "Spain")])
+
+        index.remove([("country", "Spain")])
+        assert index.suggest("spa") == [{"field": "country", "value": "Spain"}]
+        index.remove([("country", "Spain")])
+        assert index.suggest("spa") == []
+
+    def test_field_filter_and_limit(self):
+        """Test restricting suggestions to fields and capping the count."""
+        index = PrefixIndex()
+        index.add([("city", "Paris"), ("place", "Pantheon"), ("country", "Panama")])
+
+        assert index.suggest("pa", ["place"]) == [{"field": "place", "value": "Pantheon"}]
+        assert len(index.suggest("pa", limit=2)) == 2
+
+    def test_lookup_is_sub_millisecond(self):
+        """Test that a lookup in a large index stays well under a millisecond."""
+        index = PrefixIndex()
+        index.add(("city", f"City {n:06d}") for n in range(100_000))
+
+        started = time.perf_counter()
+        for _ in range(1000):
+            index.suggest("city 0500", limit=10)
+        assert (time.perf_counter() - started) / 1000 < 0.001
+
+    def test_rebuild_due_after_ttl(self, session, monkeypatch):
+        """Test that one caller claims the rebuild once the TTL runs out."""
+        index = PrefixIndex(ttl_sec=60)
+        index.rebuild(session)
+        assert not index.due()
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+        assert index.due()
+        assert not index.due()
+        assert not PrefixIndex().due()
+
+
+class TestSuggestEndpoint:
+    """Test the /api/suggest endpoint."""
+
+    def test_suggests_from_all_fields(self, client, suggestions, query_counter):
+        """Test that suggestions span fields and never query the database."""
+        query_counter.clear()
+        response = client.get("/api/suggest?q=flo")
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"field": "city", "value": "Florence"},
+            {"field": "institution", "value": "Florence University of the Arts"},
+        ]
+        assert query_counter == []
+
+    def test_field_parameter(self, client, suggestions):
+        """Test restricting suggestions to one field."""
+        response = client.get("/api/suggest?q=s&field=country")
+        assert response.json() == [{"field": "country", "value": "Spain"}]
+
+    def test_rebuilt_after_ttl(self, client, session, suggestions, monkeypatch):
+        """Test that values written by another worker show up once the index expires."""
+        monkeypatch.setattr(suggestions, "ttl_sec", 60)
+        suggestions.rebuild(session)
+        # Inserted without the trip routes, as a write on another worker would be
+        session.add(Trip(destination="Krakow", country="Poland", trip_type="weekend"))
+        session.commit()
+        assert client.get("/api/suggest?q=krak").json() == []
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+        assert client.get("/api/suggest?q=krak").json() == [
+            {"field": "destination", "value": "Krakow"}
+        ]
+
+    def test_index_updated_on_writes(self, client, session, suggestions):
+        """Test that creating, renaming and deleting a trip updates suggestions."""
+        token = make_magic_token("suggest@vanderbilt.edu")
+        cookies = client.get(f"/auth/callback?token={token}").cookies
+
+        created = client.post(
+            "/api/trips/", json={"destination": "Krakow", "country": "Poland"}, cookies=cookies
+        )
+        assert client.get("/api/suggest?q=krak").json() == [
+            {"field": "destination", "value": "Krakow"}
+        ]
+
+        trip_id = created.json()["id"]
+        client.put(f"/api/trips/{trip_id}", json={"destination": "Gdansk"}, cookies=cookies)
+        assert client.get("/api/suggest?q=krak").json() == []
+        assert client.get("/api/suggest?q=gda").json() == [
+            {"field": "destination", "value": "Gdansk"}
+        ]
+
+        client.delete(f"/api/trips/{trip_id}", cookies=cookies)
+        assert client.get("/api/suggest?q=gda").json() == []
+        assert client.get("/api/suggest?q=pol").json() == []
@@ -0,0 +1,88 @@
+"""Tests for application startup."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.db import check_schema_version
+from app.main import app
+
+# Cold-import budget for app.main; override on slow CI machines
+IMPORT_TIME_BUDGET_MS = int(os.getenv("IMPORT_TIME_BUDGET_MS", "3000"))
+
+
+def run_import(code: str) -> subprocess.CompletedProcess:
+    """Import the app in a fresh interpreter, as a new worker would."""
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+
+
+class TestLifespan:
+    """Test the startup lifespan hook."""
+
+    def test_startup_timings_reported(self):
+        """Test that the lifespan prepares the database and records cold-start timings."""
+        with TestClient(app) as test_client:
+            response = test_client.get("/health/startup")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["import_ms"] > 0
+        assert data["database_ms"] >= 0
+
+
+class TestSchemaVersionCheck:
+    """Test the Alembic-only mode schema check."""
+
+    @pytest.fixture
+    def database(self, tmp_path):
+        db_engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+        yield db_engine
+        db_engine.dispose()
+
+    def test_unmigrated_database_rejected(self, database):
+        """Test that a database without an Alembic revision refuses to start."""
+        with pytest.raises(RuntimeError, match="alembic upgrade head"):
+            check_schema_version(database)
+
+    def test_database_at_head_accepted(self, database):
+        """Test that a database stamped with the latest revision passes."""
+        (head,) = ScriptDirectory.from_config(Config("alembic.ini")).get_heads()
+        with database.begin() as connection:
+            connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32))"))
+            connection.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": head})
+
+        check_schema_version(database)
+
+
+class TestImportTime:
+    """Test cold-start import cost."""
+
+    def test_heavy_sdks_not_imported_at_startup(self):
+        """Test that openai and resend are only loaded when first used."""
+        result = run_import(
+            "import sys, app.main; print(sorted({'openai', 'resend'} & set(sys.modules)))"
+        )
+        assert result.stdout.strip() == "[]"
+
+    def test_import_time_within_budget(self):
+        """Test that importing app.main stays within the cold-start budget."""
+        result = run_import("import app.main")
+        # -X importtime lines: "import time: self [us] | cumulative | imported package"
+        cumulative_us = next(
+            int(line.split("|")[1])
+            for line in result.stderr.splitlines()
+            if line.rstrip().endswith("| app.main")
+        )
+        assert cumulative_us / 1000 < IMPORT_TIME_BUDGET_MS